@@ -1,17 +1,25 @@
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+import logging
 import os
+import threading
+import time
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, object_session
 from dotenv import load_dotenv
 
 from app.database.database import get_db
 from app.models.schemas import TokenData
+from app.models.user import User
 from app.database import crud
+from app.api.hashing import pwd_context, password_hasher
 
 # Load environment variables
 load_dotenv()
@@ -21,12 +29,132 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "fallback_secret_key")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Authenticated-user cache configuration
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# Trust the user id and active flag embedded in the token instead of loading the user
+JWT_TRUST_CLAIMS = os.getenv("JWT_TRUST_CLAIMS", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
 
 # OAuth2 with Password flow
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Detached copy of the fields protected endpoints need from a user.
+    """
+    id: int
+    username: str
+    is_active: bool
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=bool(user.is_active),
+            email=user.email,
+            created_at=user.created_at,
+        )
+
+class AuthCache:
+    """
+    Size-bounded, short-TTL cache of verified token -> user snapshot.
+
+    Invalidating a user bumps its generation, which turns every cached token
+    of that user into a miss without scanning the cache. Callers read the
+    generation before loading a user and pass it to put, so a snapshot
+    loaded before an invalidation is never cached after it.
+    """
+
+    def __init__(self, ttl: float = AUTH_CACHE_TTL_SECONDS, max_size: int = AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                snapshot, expires_at, generation = entry
+                if expires_at > now and generation == self._generations.get(snapshot.id, 0):
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return snapshot
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def generation(self, user_id: int) -> int:
+        """
+        The user's generation, to read before loading the snapshot passed to put.
+        """
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, token: str, snapshot: UserSnapshot, generation: int, token_expires_at: Optional[float] = None):
+        """
+        Cache a snapshot until the TTL or the token's own expiry, whichever is first.
+
+        Nothing is cached if the user was invalidated since `generation` was
+        read, as the snapshot may predate the change.
+        """
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, time.monotonic() + (token_expires_at - time.time()))
+        with self._lock:
+            if self._generations.get(snapshot.id, 0) != generation:
+                return
+            self._entries[token] = (snapshot, expires_at, generation)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "ttl_seconds": self.ttl,
+                    "hits": self.hits, "misses": self.misses}
+
+auth_cache = AuthCache()
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    # Any change to a user (deactivation, rename, ...) drops its cached tokens.
+    # This runs at flush, and lookups until the commit still read the old
+    # row, so the user is invalidated again when the session commits
+    auth_cache.invalidate_user(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("invalidated_users", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_flushed_users(session):
+    for user_id in session.info.pop("invalidated_users", ()):
+        auth_cache.invalidate_user(user_id)
+
 def verify_password(plain_password, hashed_password):
     """
     Verify a password against a hash.
@@ -50,6 +178,32 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     return user
 
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """
+    Authenticate a user without blocking the event loop or the threadpool.
+    
+    bcrypt runs on the dedicated password hashing pool. When the stored hash
+    uses a different cost than BCRYPT_ROUNDS, it is transparently replaced.
+    """
+    user = await run_in_threadpool(_load_user_detached, db, username)
+    if not user:
+        return False
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash is not None:
+        logger.info(f"Upgrading password hash cost for user {user.username}")
+        await run_in_threadpool(crud.update_user_password_hash, db, user.id, new_hash)
+    return user
+
+def _load_user_detached(db: Session, username: str):
+    user = crud.get_user_by_username(db, username)
+    if user is not None:
+        db.expunge(user)
+    # End the read transaction so no pooled connection is held while bcrypt runs
+    db.rollback()
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Create a JWT access token.
@@ -63,10 +217,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def user_token_claims(user) -> dict:
+    """
+    Claims identifying a user in an access token.
+    
+    Besides the username, the token carries the user id and active flag so
+    verification can use a primary key lookup or, with JWT_TRUST_CLAIMS,
+    skip the database entirely.
+    """
+    return {"sub": user.username, "uid": user.id, "act": bool(user.is_active)}
+
+async def get_current_user(response: Response, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """
     Get the current user from a JWT token.
+    
+    Verified tokens are cached briefly, so most requests skip the user
+    lookup. The time spent is reported in the Server-Timing header.
     """
+    start = time.perf_counter()
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -80,9 +248,39 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_username(db, username=token_data.username)
+    
+    source = "cache"
+    user = auth_cache.get(token)
     if user is None:
-        raise credentials_exception
+        user_id = payload.get("uid")
+        # Read before the lookup so a change to the user committed meanwhile
+        # keeps the loaded snapshot out of the cache. Tokens without a uid
+        # (issued before it was added) are not cached
+        generation = auth_cache.generation(user_id) if isinstance(user_id, int) else None
+        if JWT_TRUST_CLAIMS and isinstance(user_id, int) and "act" in payload:
+            source = "token"
+            user = UserSnapshot(id=user_id, username=token_data.username, is_active=bool(payload["act"]))
+        else:
+            source = "db"
+            if isinstance(user_id, int):
+                db_user = crud.get_user(db, user_id)
+                if db_user is not None and db_user.username != token_data.username:
+                    db_user = None
+            else:
+                db_user = crud.get_user_by_username(db, username=token_data.username)
+            user = UserSnapshot.from_user(db_user) if db_user is not None else None
+            # End the read transaction so the pooled connection goes back now:
+            # streaming routes such as GET /events keep this session until
+            # the stream ends
+            db.rollback()
+            if user is None:
+                raise credentials_exception
+        if generation is not None:
+            auth_cache.put(token, user, generation, payload.get("exp"))
+    
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    response.headers["Server-Timing"] = f'auth;dur={elapsed_ms:.3f};desc="{source}"'
+    logger.debug(f"Authenticated {user.username} via {source} in {elapsed_ms:.3f}ms")
     return user
 
 async def get_current_active_user(current_user = Depends(get_current_user)):
@@ -0,0 +1,87 @@
+"""
+Conditional GET support: ETag / If-None-Match and Last-Modified / If-Modified-Since.
+
+Validators are built from version counters kept by the database (see
+app.database.versions), so a request can be answered with 304 before the
+response body is loaded or serialized.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# Clients may store responses but must revalidate them on every use
+CACHE_CONTROL = "private, no-cache"
+
+def note_etag(note_id: int, change_seq: int) -> str:
+    """
+    Strong ETag of a single note.
+
+    Built from the note's change_seq rather than its version: SQLite reuses
+    the ID of a deleted note, and the new note starts again at version 1,
+    while the owner's change sequence never repeats.
+    """
+    return f'"n{note_id}.{change_seq}"'
+
+def listing_etag(owner_id: int, version: int, *params) -> str:
+    """
+    Strong ETag of one page of a user's note listing.
+
+    `params` are the query parameters that select the page, since different
+    pages of the same version have different bodies.
+    """
+    digest = hashlib.sha256(repr(params).encode("utf-8")).hexdigest()[:16]
+    return f'"l{owner_id}.{version}.{digest}"'
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes in UTC (CURRENT_TIMESTAMP)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    """
+    Validator headers for a cacheable response.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison function (RFC 9110, 13.1.2)
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return _as_utc(last_modified).replace(microsecond=0) <= since
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """
+    Return a 304 response if the request's validators still match, else None.
+
+    If-Modified-Since is only consulted when If-None-Match is absent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        matched = (
+            if_modified_since is not None
+            and last_modified is not None
+            and _not_modified_since(if_modified_since, last_modified)
+        )
+    if matched:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, last_modified))
+    return None
@@ -0,0 +1,186 @@
+"""
+In-process pub/sub for server-sent events.
+
+Routes and the sentiment worker publish note and sentiment events to the
+owner of the note; each GET /events connection holds a Subscription with a
+bounded queue. A consumer that falls behind never grows memory: when its
+queue is full the buffered events are dropped and replaced by a single
+`resync` event, telling the client to catch up through GET /notes/changes.
+
+Events only reach connections served by the same process.
+"""
+import asyncio
+import logging
+import os
+import threading
+from typing import AsyncIterator, Dict, Optional, Set
+
+import orjson
+from fastapi import HTTPException, Request, status
+
+from app.models.schemas import NoteResponse
+
+logger = logging.getLogger(__name__)
+
+# Event stream configuration
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+RESYNC_MESSAGE = b'event: resync\ndata: {"reason":"slow consumer"}\n\n'
+HEARTBEAT_MESSAGE = b": keepalive\n\n"
+NOTE_EVENT_FIELDS = tuple(NoteResponse.model_fields)
+
+def format_event(event_id: int, event: str, data: dict) -> bytes:
+    """
+    Encode one server-sent event.
+    """
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, event.encode("utf-8"), orjson.dumps(data))
+
+class Subscription:
+    """
+    One connected client: a bounded queue of encoded events on its event loop.
+    """
+
+    def __init__(self, owner_id: int, loop: asyncio.AbstractEventLoop, max_size: int):
+        self.owner_id = owner_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+
+    def offer(self, message: bytes):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: replace the backlog with one resync event
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_MESSAGE)
+
+class EventBroker:
+    """
+    Fans events out to the subscriptions of a note owner.
+
+    publish() may be called from any thread: route handlers in the
+    threadpool, async handlers on the event loop and the sentiment
+    dispatcher thread.
+    """
+
+    def __init__(self, max_subscribers: int = EVENTS_MAX_SUBSCRIBERS, queue_size: int = EVENTS_QUEUE_SIZE,
+                 heartbeat_seconds: float = EVENTS_HEARTBEAT_SECONDS):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._count = 0
+        self._next_event_id = 1
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, owner_id: int) -> Subscription:
+        """
+        Register a subscription for `owner_id` on the running event loop.
+
+        Raises:
+            HTTPException: 503 when EVENTS_MAX_SUBSCRIBERS connections are open
+        """
+        subscription = Subscription(owner_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many event stream connections",
+                    headers={"Retry-After": "5"},
+                )
+            self._subscriptions.setdefault(owner_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.owner_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.owner_id]
+            self._count -= 1
+            self.dropped += subscription.dropped
+
+    def has_subscribers(self, owner_id: Optional[int] = None) -> bool:
+        """
+        Whether anyone (or anyone watching `owner_id`) is listening.
+
+        Lets publishers skip building event payloads nobody will receive.
+        """
+        with self._lock:
+            return bool(self._subscriptions if owner_id is None else self._subscriptions.get(owner_id))
+
+    def publish(self, owner_id: int, event: str, data: dict) -> int:
+        """
+        Send an event to every subscription of `owner_id`.
+
+        Returns:
+            int: Number of subscriptions the event was queued for
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(owner_id, ()))
+            if not subscriptions:
+                return 0
+            event_id = self._next_event_id
+            self._next_event_id += 1
+            self.published += 1
+        message = format_event(event_id, event, data)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # The subscription's loop has closed
+                self.unsubscribe(subscription)
+        return len(subscriptions)
+
+    async def stream(self, subscription: Subscription, request: Request) -> AsyncIterator[bytes]:
+        """
+        Yield a subscription's events, with heartbeats while idle.
+
+        The subscription is removed when the client disconnects.
+        """
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    message = HEARTBEAT_MESSAGE
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "owners": len(self._subscriptions),
+                "published": self.published,
+                "dropped": self.dropped + sum(
+                    subscription.dropped for subscriptions in self._subscriptions.values() for subscription in subscriptions
+                ),
+            }
+
+# Shared broker used by the routes, the sentiment worker and GET /events
+event_broker = EventBroker()
+
+def publish_note_event(owner_id: int, event: str, note):
+    """
+    Publish a note's NoteResponse fields, skipping the work when nobody listens.
+    """
+    if event_broker.has_subscribers(owner_id):
+        event_broker.publish(owner_id, event, {field: getattr(note, field) for field in NOTE_EVENT_FIELDS})
+
+def publish_sentiment_completed(owner_id: int, note_id: int, sentiment: str):
+    event_broker.publish(owner_id, "sentiment.completed", {"id": note_id, "sentiment": sentiment})
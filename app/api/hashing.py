@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# Password hashing configuration
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_WAITING = int(os.getenv("PASSWORD_HASH_MAX_WAITING", "100"))
+
+# Hashes made with a different cost are upgraded on the next successful login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited executor.
+
+    At most `max_workers` hashes run at once; up to `max_waiting` more wait
+    for a slot and anything beyond that is rejected with 503, so a login
+    storm cannot starve the threadpool that serves other endpoints. Time
+    spent waiting for a slot is recorded as queue time.
+    """
+
+    def __init__(self, kind: str = PASSWORD_HASH_EXECUTOR, max_workers: int = PASSWORD_HASH_WORKERS,
+                 max_waiting: int = PASSWORD_HASH_MAX_WAITING):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_waiting = max_waiting
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = None
+        self._slots_loop = None
+        self._lock = threading.Lock()
+        self._queue_times = deque(maxlen=1000)
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app never forks
+        with self._executor_lock:
+            if self._executor is None:
+                if self.kind == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+                else:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                logger.info(f"Password hashing {self.kind} pool started with {self.max_workers} workers")
+            return self._executor
+
+    def _get_slots(self, loop) -> asyncio.Semaphore:
+        # asyncio primitives belong to one event loop; the server runs a single loop per process
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.waiting += 1
+
+        queued_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots(loop)
+        try:
+            await slots.acquire()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+        with self._lock:
+            self._queue_times.append(time.perf_counter() - queued_at)
+            self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            slots.release()
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured bcrypt cost.
+        """
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password; also return a new hash when the stored one uses an outdated cost.
+        """
+        return await self._run(_verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            queue_times = sorted(self._queue_times)
+            def percentile(p):
+                if not queue_times:
+                    return 0.0
+                return queue_times[min(len(queue_times) - 1, int(len(queue_times) * p))] * 1000
+            return {
+                "executor": self.kind,
+                "max_workers": self.max_workers,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_time_p50_ms": percentile(0.50),
+                "queue_time_p99_ms": percentile(0.99),
+                "queue_time_max_ms": queue_times[-1] * 1000 if queue_times else 0.0,
+            }
+
+# Shared hasher used by the authentication endpoints
+password_hasher = PasswordHasher()
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.database.database import get_db
+from app.database import crud
+from app.models.schemas import JobCreate, JobResponse
+from app.api.auth import get_current_active_user
+from app.ml.worker import worker_pool
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"]
+)
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_job(job: JobCreate, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+    """
+    Queue sentiment analysis of a note for the background worker pool.
+    """
+    db_job = crud.enqueue_analysis_job(db, note_id=job.note_id, owner_id=current_user.id)
+    worker_pool.notify()
+    return db_job
+
+@router.get("/{job_id}", response_model=JobResponse)
+def read_job(job_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+    """
+    Get the status of an analysis job.
+    """
+    db_job = crud.get_job(db, job_id=job_id, owner_id=current_user.id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
@@ -0,0 +1,190 @@
+"""
+Prometheus metrics for requests, database queries and sentiment analysis.
+
+MetricsMiddleware times every HTTP request and labels it with the route
+template (/notes/{note_id}, not /notes/42) so the number of series stays
+bounded. SQLAlchemy cursor events time every query, and sentiment scoring
+reports its own time. Both are also added up per request, so a route's
+latency can be split into database, sentiment and everything else.
+
+The metrics are prometheus_client metrics on its default registry. By
+default they live in process memory, so GET /metrics reports only the
+process that serves the scrape, and scoring done in the worker pool's
+processes only shows up as job batch durations. With PROMETHEUS_MULTIPROC_DIR
+set before the app is imported, every process writes its metrics to that
+directory and GET /metrics adds them up; app.server sets it up for its
+workers.
+"""
+import os
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Metrics configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Read by prometheus_client when it is imported, like here
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Request latencies span cached reads (sub-millisecond) to long analyses
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUESTS = Counter(
+    "http_requests", "HTTP requests by route template and status code", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is sent", ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+# livesum: with several processes, the sum over the ones still running
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled, including open event streams",
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time a request spent in database queries", ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUEST_SENTIMENT_DURATION = Histogram(
+    "http_request_sentiment_duration_seconds", "Time a request spent scoring sentiment", ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Database query execution time by statement type", ("operation",),
+    buckets=QUERY_BUCKETS,
+)
+SENTIMENT_DURATION = Histogram(
+    "sentiment_analysis_duration_seconds", "Sentiment scoring time per text, whole or in chunks", ("engine", "mode"),
+    buckets=LATENCY_BUCKETS,
+)
+SENTIMENT_JOB_BATCH_DURATION = Histogram(
+    "sentiment_job_batch_duration_seconds", "Time from dispatching a batch of analysis jobs to its result",
+    buckets=LATENCY_BUCKETS,
+)
+
+def render_metrics() -> bytes:
+    """
+    The metrics in the Prometheus text format, added up over every process
+    in multiprocess mode.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+class RequestTimings:
+    """
+    Database and sentiment time accumulated while handling one request.
+    """
+    __slots__ = ("db_seconds", "sentiment_seconds")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.sentiment_seconds = 0.0
+
+# Set by the middleware; threadpool calls run in a copy of the request's
+# context, so sync routes and dependencies add to the same object
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def observe_sentiment(engine: str, mode: str, seconds: float):
+    """
+    Record the time spent scoring one text.
+    """
+    SENTIMENT_DURATION.labels(engine, mode).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.sentiment_seconds += seconds
+
+@lru_cache(maxsize=1024)
+def _query_operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in QUERY_OPERATIONS else "OTHER"
+
+# The start time lives on the execution context, which is per statement, so
+# failed statements (no after_cursor_execute) leave nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    DB_QUERY_DURATION.labels(_query_operation(statement)).observe(elapsed)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.db_seconds += elapsed
+
+def instrument_engine(engine: Engine):
+    """
+    Time every query run through a (sync) engine; safe to call more than once.
+
+    For an AsyncEngine pass its sync_engine.
+    """
+    for name, listener in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+    ):
+        if not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status codes, in-flight requests and
+    the database and sentiment time of each HTTP request.
+
+    Written against the raw ASGI interface rather than BaseHTTPMiddleware so
+    streaming responses are passed through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _request_timings.reset(token)
+            # The router stores the matched route (or, for plain Starlette
+            # routes such as /docs, just the endpoint) in the shared scope
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+            else:
+                path = scope["path"] if "endpoint" in scope else UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(method, path).observe(elapsed)
+            HTTP_REQUEST_DB_DURATION.labels(method, path).observe(timings.db_seconds)
+            HTTP_REQUEST_SENTIMENT_DURATION.labels(method, path).observe(timings.sentiment_seconds)
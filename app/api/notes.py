@@ -1,11 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+import os
+import time
 
 from app.database.database import get_db
-from app.database import crud
-from app.models.schemas import NoteCreate, NoteResponse, SentimentResponse
+from app.database import analytics, crud, duplicates, search, similarity
+from app.models.schemas import NoteCreate, NoteResponse, NoteSearchResult, SentimentResponse, BatchAnalyzeRequest, BatchAnalyzeResponse, BulkImportResponse, NoteChanges, NoteSentimentChunks, NoteStats, SimilarNote, DuplicateReport
 from app.api.auth import get_current_active_user
+from app.api.caching import cache_headers, listing_etag, note_etag, not_modified
+from app.api.events import event_broker, publish_note_event, publish_sentiment_completed
+from app.api.sentiment import select_engine
+from app.ml.engines import NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD
+from app.ml.minhash import DUPLICATE_DETECTION
+from app.ml.worker import worker_pool, AUTO_ANALYZE_NOTES
+
+# Bulk import/export configuration
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+BULK_IMPORT_MAX_LINE_BYTES = int(os.getenv("BULK_IMPORT_MAX_LINE_BYTES", str(16 * 1024 * 1024)))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
 
 router = APIRouter(
     prefix="/notes",
@@ -13,37 +31,360 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
-def create_note(note: NoteCreate, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+def create_note(note: NoteCreate, response: Response, analyze: Optional[bool] = None, on_duplicate: Optional[str] = Query(None, pattern="^(flag|reject)$"), db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
     """
     Create a new note.
+    
+    With analyze=true (or AUTO_ANALYZE_NOTES enabled) a sentiment analysis job
+    is queued and its ID returned in the X-Analysis-Job-Id header.
+    
+    A near-duplicate of an earlier note is created with the original's ID in
+    the X-Duplicate-Of header, or refused with 409 when on_duplicate=reject
+    (the default follows DUPLICATE_DETECTION).
     """
     # Validate input (FastAPI will handle this automatically based on Pydantic models)
-    return crud.create_note(db=db, note=note)
+    enqueue = AUTO_ANALYZE_NOTES if analyze is None else analyze
+    db_note = crud.create_note(db=db, note=note, owner_id=current_user.id, enqueue_analysis=enqueue, on_duplicate=on_duplicate or DUPLICATE_DETECTION)
+    if db_note.analysis_job_id is not None:
+        response.headers["X-Analysis-Job-Id"] = str(db_note.analysis_job_id)
+        worker_pool.notify()
+    if db_note.duplicate_of is not None:
+        response.headers["X-Duplicate-Of"] = str(db_note.duplicate_of)
+        response.headers["X-Duplicate-Similarity"] = f"{db_note.duplicate_similarity:.4f}"
+    publish_note_event(current_user.id, "note.created", db_note)
+    return db_note
+
+@router.post("/analyze", response_model=BatchAnalyzeResponse)
+def analyze_notes(request: BatchAnalyzeRequest, engine: str = Depends(select_engine), db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+    """
+    Analyze the sentiment of many notes in one request.
+    
+    Pass either a list of note IDs or all_unanalyzed=true to backfill every
+    note that has no sentiment yet.
+    """
+    if request.note_ids is None and not request.all_unanalyzed:
+        raise HTTPException(status_code=400, detail="Provide note_ids or set all_unanalyzed to true")
+    if request.note_ids is not None and request.all_unanalyzed:
+        raise HTTPException(status_code=400, detail="Use either note_ids or all_unanalyzed, not both")
+    result = crud.analyze_notes_sentiment_batch(db, current_user.id, note_ids=request.note_ids, engine=engine)
+    for note in result["results"]:
+        publish_sentiment_completed(current_user.id, note["id"], note["sentiment"])
+    if result["analyzed"] and request.all_unanalyzed:
+        event_broker.publish(current_user.id, "sentiment.batch_completed", {"analyzed": result["analyzed"], "counts": result["counts"]})
+    return result
+
+async def _iter_ndjson_lines(request: Request, max_line_bytes: int = BULK_IMPORT_MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    # Split the request body into numbered lines as it arrives. Only each new
+    # chunk is split, and a line longer than max_line_bytes is yielded as
+    # None with its bytes dropped, so a body without newlines is neither
+    # buffered whole nor rescanned on every chunk
+    buffer = bytearray()
+    too_long = False
+    line_number = 0
+    async for chunk in request.stream():
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            # The first line completes the one carried over from earlier chunks
+            first = lines[0]
+            if too_long or len(buffer) + len(first) > max_line_bytes:
+                lines[0] = None
+            elif buffer:
+                buffer += first
+                lines[0] = bytes(buffer)
+            buffer.clear()
+            too_long = False
+            for line in lines:
+                line_number += 1
+                yield line_number, line if line is None or len(line) <= max_line_bytes else None
+        if too_long:
+            continue
+        if len(buffer) + len(rest) > max_line_bytes:
+            too_long = True
+            buffer.clear()
+        else:
+            buffer += rest
+    if too_long:
+        yield line_number + 1, None
+    elif buffer:
+        yield line_number + 1, bytes(buffer)
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    )
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_notes(request: Request, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+    """
+    Import notes from an NDJSON request body (one NoteCreate object per line).
+    
+    Lines are validated as they stream in and inserted in transactions of
+    BULK_IMPORT_CHUNK_SIZE notes. Invalid lines, and lines longer than
+    BULK_IMPORT_MAX_LINE_BYTES, are skipped and reported by line number;
+    blank lines are ignored.
+    """
+    start = time.perf_counter()
+    imported = 0
+    failed = 0
+    errors = []
+    chunk = []
+
+    def record_error(line_number: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < BULK_IMPORT_MAX_ERRORS:
+            errors.append({"line": line_number, "error": message})
+
+    async def flush():
+        nonlocal imported
+        try:
+            imported += await run_in_threadpool(crud.bulk_create_notes, db, [note for _, note in chunk], current_user.id)
+        except HTTPException as e:
+            for line_number, _ in chunk:
+                record_error(line_number, f"Insert failed: {e.detail}")
+        chunk.clear()
+
+    async for line_number, line in _iter_ndjson_lines(request):
+        if line is None:
+            record_error(line_number, f"Line longer than {BULK_IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            chunk.append((line_number, NoteCreate.model_validate_json(line)))
+        except ValidationError as e:
+            record_error(line_number, _format_validation_error(e))
+            continue
+        if len(chunk) >= BULK_IMPORT_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+
+    elapsed = time.perf_counter() - start
+    if imported:
+        event_broker.publish(current_user.id, "notes.imported", {"imported": imported})
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "notes_per_second": imported / elapsed if elapsed > 0 else 0.0,
+    }
+
+@router.get("/export")
+def export_notes(db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+    """
+    Stream all of the current user's notes as NDJSON, oldest first.
+    
+    The output can be fed back into POST /notes/bulk.
+    """
+    return StreamingResponse(
+        crud.iter_notes_ndjson(db, current_user.id, batch_size=EXPORT_BATCH_SIZE),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="notes.ndjson"'},
+    )
 
 @router.get("/", response_model=List[NoteResponse])
-def read_notes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+def read_notes(
+    request: Request,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,sentiment"),
+    tag: Optional[str] = Query(None, min_length=1, max_length=64, description="Only notes with this tag (see GET /tags)"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Get the current user's notes, most recent first, with cursor pagination.
+    
+    When more notes follow, the cursor of the next page is returned in the
+    X-Next-Cursor header. `skip` is still accepted but gets slower with depth.
+    `tag` lists only the notes tagged with it when they were analyzed.
+    
+    Rows are selected as plain tuples and serialized straight to JSON with
+    orjson, skipping ORM hydration and response model validation.
+    
+    Responses carry an ETag and Last-Modified derived from the user's notes
+    version; a matching If-None-Match or If-Modified-Since gets a 304
+    without querying the notes.
+    """
+    selected = crud.parse_note_fields(fields)
+    version, last_modified = crud.get_owner_version(db, current_user.id)
+    etag = listing_etag(current_user.id, version, skip, limit, cursor, selected, tag)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    headers = cache_headers(etag, last_modified)
+    
+    if skip and not cursor:
+        notes = crud.get_notes(db, current_user.id, skip=skip, limit=limit, tag=tag)
+        return ORJSONResponse([{field: getattr(note, field) for field in selected} for note in notes], headers=headers)
+    notes, next_cursor = crud.get_note_dicts_page(db, current_user.id, selected, limit=limit, cursor=cursor, tag=tag)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(notes, headers=headers)
+
+@router.get("/search", response_model=List[NoteSearchResult])
+def search_notes(
+    q: str = Query(..., min_length=1, description="Words to search for; end a word with * for prefix matching"),
+    sentiment: Optional[str] = Query(None, pattern="^(positive|neutral|negative)$"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Full-text search over the current user's note titles and contents, best match first.
+    
+    Each result carries a snippet with the matching words wrapped in <mark> tags.
+    """
+    return search.search_notes(
+        db, q, current_user.id, sentiment=sentiment, created_after=created_after, created_before=created_before,
+        limit=limit, offset=offset
+    )
+
+@router.get("/search/semantic", response_model=List[SimilarNote])
+def semantic_search_notes(
+    q: str = Query(..., min_length=1, description="Text to find related notes for"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
     """
-    Get all notes with pagination.
+    Find the current user's notes most related to free text, best match first.
+    
+    Notes are ranked by TF-IDF cosine similarity of their hashed embeddings,
+    so they do not need to contain every word of the query.
     """
-    notes = crud.get_notes(db, skip=skip, limit=limit)
-    return notes
+    return similarity.semantic_search(db, q, current_user.id, limit=limit)
+
+@router.get("/duplicates", response_model=DuplicateReport)
+def read_duplicate_notes(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of groups"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Report the current user's near-duplicate notes, grouped under the note they copy.
+    
+    Groups with the most duplicates come first. Notes from before duplicate
+    detection appear once `python -m app.database.duplicates index` has run.
+    """
+    return ORJSONResponse(duplicates.get_duplicate_report(db, current_user.id, limit=limit))
+
+@router.get("/changes", response_model=NoteChanges)
+def read_note_changes(
+    since: int = Query(0, ge=0, description="next_since from the previous call; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Get the current user's notes created, updated or deleted since a watermark.
+    
+    Apply `deleted` first and then `notes` to a local copy, store
+    `next_since` and call again while `has_more` is true.
+    """
+    return ORJSONResponse(crud.get_note_changes(db, current_user.id, since=since, limit=limit))
+
+@router.get("/stats", response_model=NoteStats)
+def read_note_stats(
+    positive_threshold: float = Query(POSITIVE_THRESHOLD, ge=-1, le=1, description="Polarity above which a note counts as positive"),
+    negative_threshold: float = Query(NEGATIVE_THRESHOLD, ge=-1, le=1, description="Polarity below which a note counts as negative"),
+    bins: int = Query(10, ge=1, le=100, description="Number of bins in each histogram"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Sentiment analytics over the current user's notes.
+    
+    The distribution classifies the stored polarity scores against the
+    given thresholds, so trying other thresholds needs no re-analysis.
+    Notes analyzed before scores were stored count under their stored label.
+    """
+    if negative_threshold > positive_threshold:
+        raise HTTPException(status_code=400, detail="negative_threshold cannot be above positive_threshold")
+    return ORJSONResponse(analytics.get_sentiment_stats(
+        db, current_user.id, positive_threshold=positive_threshold, negative_threshold=negative_threshold,
+        bins=bins, created_after=created_after, created_before=created_before
+    ))
 
 @router.get("/{note_id}", response_model=NoteResponse)
-def read_note(note_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+def read_note(note_id: int, request: Request, response: Response, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
     """
     Get a specific note by ID.
+    
+    Supports conditional requests with If-None-Match and If-Modified-Since.
     """
-    db_note = crud.get_note(db, note_id=note_id)
+    db_note = crud.get_note(db, note_id=note_id, owner_id=current_user.id)
     if db_note is None:
         raise HTTPException(status_code=404, detail="Note not found")
+    etag = note_etag(db_note.id, db_note.change_seq)
+    last_modified = db_note.updated_at or db_note.created_at
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag, last_modified))
     return db_note
 
 @router.get("/{note_id}/analyze", response_model=SentimentResponse)
-def analyze_note(note_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+def analyze_note(note_id: int, engine: str = Depends(select_engine), db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
     """
-    Analyze the sentiment of a note.
+    Analyze the sentiment of a note; the response includes the note's tags.
     """
-    db_note = crud.analyze_note_sentiment(db, note_id=note_id)
+    db_note = crud.analyze_note_sentiment(db, note_id=note_id, owner_id=current_user.id, engine=engine)
     if db_note is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    return db_note
\ No newline at end of file
+    publish_sentiment_completed(current_user.id, db_note.id, db_note.sentiment)
+    return db_note
+
+@router.get("/{note_id}/chunks", response_model=NoteSentimentChunks)
+def read_note_chunks(
+    note_id: int,
+    order: str = Query("position", pattern="^(position|impact)$"),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Get the per-section scores of a long note.
+    
+    Notes longer than SENTIMENT_CHUNK_THRESHOLD characters are analyzed in
+    windows; order=impact lists the windows that drove the result first.
+    Shorter notes have no windows.
+    """
+    result = crud.get_note_sentiment_chunks(db, note_id, current_user.id, order=order, limit=limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return result
+
+@router.get("/{note_id}/similar", response_model=List[SimilarNote])
+def read_similar_notes(
+    note_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Get the current user's notes most related to a note, best match first.
+    """
+    result = similarity.similar_notes(db, note_id, current_user.id, limit=limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return result
+
+@router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_note(note_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+    """
+    Delete a note.
+    """
+    if not crud.delete_note(db, note_id=note_id, owner_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Note not found")
+    event_broker.publish(current_user.id, "note.deleted", {"id": note_id})
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
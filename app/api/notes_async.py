@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.database.async_database import get_async_db
+from app.database import async_crud, crud
+from app.models.schemas import NoteCreate, NoteResponse, SentimentResponse
+from app.api.auth import get_current_active_user
+from app.api.caching import cache_headers, listing_etag, note_etag, not_modified
+from app.api.events import publish_note_event, publish_sentiment_completed
+from app.api.sentiment import select_engine
+from app.ml.minhash import DUPLICATE_DETECTION
+from app.ml.worker import worker_pool, AUTO_ANALYZE_NOTES
+
+# Async versions of the core note routes, served when DATABASE_MODE=async.
+# They replace the matching routes of app.api.notes; everything else is
+# still served by that router.
+router = APIRouter(
+    prefix="/notes",
+    tags=["notes"]
+)
+
+@router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
+async def create_note(note: NoteCreate, response: Response, analyze: Optional[bool] = None, on_duplicate: Optional[str] = Query(None, pattern="^(flag|reject)$"), db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_active_user)):
+    """
+    Create a new note, flagging or rejecting near-duplicates.
+    """
+    enqueue = AUTO_ANALYZE_NOTES if analyze is None else analyze
+    db_note = await async_crud.create_note(db=db, note=note, owner_id=current_user.id, enqueue_analysis=enqueue, on_duplicate=on_duplicate or DUPLICATE_DETECTION)
+    if db_note.analysis_job_id is not None:
+        response.headers["X-Analysis-Job-Id"] = str(db_note.analysis_job_id)
+        worker_pool.notify()
+    if db_note.duplicate_of is not None:
+        response.headers["X-Duplicate-Of"] = str(db_note.duplicate_of)
+        response.headers["X-Duplicate-Similarity"] = f"{db_note.duplicate_similarity:.4f}"
+    publish_note_event(current_user.id, "note.created", db_note)
+    return db_note
+
+@router.get("/", response_model=List[NoteResponse])
+async def read_notes(
+    request: Request,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,sentiment"),
+    tag: Optional[str] = Query(None, min_length=1, max_length=64, description="Only notes with this tag (see GET /tags)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Get the current user's notes, most recent first, with cursor pagination.
+    
+    `skip` is still accepted but gets slower with depth.
+    """
+    selected = crud.parse_note_fields(fields)
+    version, last_modified = await async_crud.get_owner_version(db, current_user.id)
+    etag = listing_etag(current_user.id, version, skip, limit, cursor, selected, tag)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    headers = cache_headers(etag, last_modified)
+    
+    if skip and not cursor:
+        notes = await async_crud.get_notes(db, current_user.id, skip=skip, limit=limit, tag=tag)
+        return ORJSONResponse([{field: getattr(note, field) for field in selected} for note in notes], headers=headers)
+    notes, next_cursor = await async_crud.get_note_dicts_page(db, current_user.id, selected, limit=limit, cursor=cursor, tag=tag)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(notes, headers=headers)
+
+@router.get("/{note_id}", response_model=NoteResponse)
+async def read_note(note_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_active_user)):
+    """
+    Get a specific note by ID.
+    """
+    db_note = await async_crud.get_note(db, note_id=note_id, owner_id=current_user.id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    etag = note_etag(db_note.id, db_note.change_seq)
+    last_modified = db_note.updated_at or db_note.created_at
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag, last_modified))
+    return db_note
+
+@router.get("/{note_id}/analyze", response_model=SentimentResponse)
+async def analyze_note(note_id: int, engine: str = Depends(select_engine), db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_active_user)):
+    """
+    Analyze the sentiment of a note; the response includes the note's tags.
+    """
+    db_note = await async_crud.analyze_note_sentiment(db, note_id=note_id, owner_id=current_user.id, engine=engine)
+    publish_sentiment_completed(current_user.id, db_note.id, db_note.sentiment)
+    return db_note
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from app.models.schemas import SentimentCacheStats, SentimentEngines
+from app.api.auth import get_current_active_user
+from app.ml.cache import sentiment_cache
+from app.ml.engines import ENGINES, get_engine
+
+router = APIRouter(
+    prefix="/sentiment",
+    tags=["sentiment"]
+)
+
+def select_engine(engine: Optional[str] = Query(None, description="Sentiment engine, e.g. textblob or lexicon; defaults to SENTIMENT_ENGINE")) -> str:
+    """
+    Resolve the `engine` query parameter to a registered engine name.
+    """
+    try:
+        return get_engine(engine).name
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/engines", response_model=SentimentEngines)
+def read_engines(current_user = Depends(get_current_active_user)):
+    """
+    List the available sentiment engines and the default one.
+    """
+    return {"default": get_engine().name, "engines": sorted(ENGINES)}
+
+@router.get("/cache", response_model=SentimentCacheStats)
+def read_cache_stats(current_user = Depends(get_current_active_user)):
+    """
+    Get hit, miss and eviction counters of the sentiment result cache.
+    """
+    return sentiment_cache.stats()
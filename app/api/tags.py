@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database.database import get_db
+from app.database import tags
+from app.models.schemas import TagCount
+from app.api.auth import get_current_active_user
+
+router = APIRouter(
+    prefix="/tags",
+    tags=["tags"]
+)
+
+@router.get("/", response_model=List[TagCount])
+def read_tags(
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    List the current user's tags with the number of notes carrying each, most used first.
+    
+    Notes are tagged with keywords from their content when they are analyzed;
+    list the notes with a tag with GET /notes?tag=.
+    """
+    return tags.get_tag_counts(db, current_user.id, limit=limit)
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta
+from typing import List, Optional
 import logging
 
 from app.database.database import get_db
 from app.database import crud
-from app.models.schemas import UserCreate, UserResponse, Token, UserLogin
-from app.api.auth import authenticate_user, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user
+from app.models.schemas import UserCreate, UserResponse, Token, UserLogin, PasswordHashingStats
+from app.api.auth import authenticate_user_async, create_access_token, user_token_claims, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user
+from app.api.hashing import password_hasher
 
 router = APIRouter(
     prefix="/users",
@@ -18,13 +21,19 @@ router = APIRouter(
 logger = logging.getLogger(__name__)
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user.
+    
+    The password is hashed on the dedicated hashing pool; database work runs
+    in the threadpool.
     """
     logger.info(f"Registering new user with username: {user.username}, email: {user.email}")
     try:
-        new_user = crud.create_user(db=db, user=user)
+        # Reject duplicates before spending CPU on bcrypt
+        await run_in_threadpool(crud.ensure_user_available, db, user)
+        hashed_password = await password_hasher.hash(user.password)
+        new_user = await run_in_threadpool(crud.create_user, db, user, hashed_password)
         logger.info(f"User registered successfully: {user.username}")
         return new_user
     except HTTPException as e:
@@ -38,11 +47,11 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -51,16 +60,16 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=user_token_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     """
     Login endpoint for non-OAuth2 clients.
     """
-    user = authenticate_user(db, user_data.username, user_data.password)
+    user = await authenticate_user_async(db, user_data.username, user_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,13 +78,37 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=user_token_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.get("/", response_model=List[UserResponse])
+def read_users(response: Response, limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
+    """
+    List users, most recently registered first, with cursor pagination.
+    
+    When more users follow, the cursor of the next page is returned in the
+    X-Next-Cursor header.
+    """
+    users, next_cursor = crud.get_users_page(db, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return users
+
+@router.get("/password-hashing", response_model=PasswordHashingStats)
+def read_password_hashing_stats(current_user = Depends(get_current_active_user)):
+    """
+    Get load and queue-time metrics of the password hashing pool.
+    """
+    return password_hasher.stats()
+
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user = Depends(get_current_active_user)):
+def read_users_me(db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
     """
     Get current user information.
     """
-    return current_user
\ No newline at end of file
+    # The authenticated user may be a cached snapshot; load the full record by primary key
+    user = crud.get_user(db, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
\ No newline at end of file
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.database.async_database import get_async_db
+from app.database import async_crud
+from app.models.schemas import UserResponse
+from app.api.auth import get_current_active_user
+
+# Async versions of the user listing routes, served when DATABASE_MODE=async.
+# Registration and login are already async in app.api.users.
+router = APIRouter(
+    prefix="/users",
+    tags=["users"]
+)
+
+@router.get("/", response_model=List[UserResponse])
+async def read_users(response: Response, limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_active_user)):
+    """
+    List users, most recently registered first, with cursor pagination.
+    """
+    users, next_cursor = await async_crud.get_users_page(db, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return users
+
+@router.get("/me", response_model=UserResponse)
+async def read_users_me(db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_active_user)):
+    """
+    Get current user information.
+    """
+    user = await async_crud.get_user(db, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
@@ -0,0 +1,142 @@
+"""
+Sentiment analytics computed with SQL aggregates.
+
+Notes keep the polarity and subjectivity scores their sentiment label was
+derived from, so distributions, daily averages and histograms are single
+GROUP BY queries over indexed columns, and classifying against different
+thresholds is a CASE expression rather than a re-analysis. Run
+`python -m app.database.analytics relabel` to rewrite stored labels after
+the thresholds change.
+"""
+import argparse
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Integer, String, and_, case, cast, func, select, type_coerce, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.database.search import format_timestamp
+from app.ml.engines import NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD
+from app.models.note import Note
+
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = ("positive", "neutral", "negative")
+
+def sentiment_label(positive_threshold: float = POSITIVE_THRESHOLD, negative_threshold: float = NEGATIVE_THRESHOLD):
+    """
+    SQL expression classifying a note's polarity like classify_polarity.
+
+    Notes labelled before scores were stored keep their stored label; notes
+    never analyzed classify as NULL.
+    """
+    return case(
+        (Note.polarity.is_(None), Note.sentiment),
+        (Note.polarity > positive_threshold, "positive"),
+        (Note.polarity < negative_threshold, "negative"),
+        else_="neutral",
+    )
+
+def _histogram(db: Session, column, filters, low: float, high: float, bins: int) -> List[dict]:
+    width = (high - low) / bins
+    # The top edge belongs to the last bin
+    bucket = func.min(cast((column - low) / width, Integer), bins - 1)
+    counts = dict(db.execute(
+        select(bucket, func.count()).where(*filters, column.is_not(None)).group_by(bucket)
+    ).all())
+    return [
+        {"start": low + i * width, "end": low + (i + 1) * width, "count": counts.get(i, 0)}
+        for i in range(bins)
+    ]
+
+def get_sentiment_stats(db: Session, owner_id: int, positive_threshold: float = POSITIVE_THRESHOLD,
+                        negative_threshold: float = NEGATIVE_THRESHOLD, bins: int = 10,
+                        created_after: Optional[datetime] = None, created_before: Optional[datetime] = None) -> dict:
+    """
+    Aggregate a user's sentiment scores.
+
+    Args:
+        db (Session): Database session
+        owner_id (int): ID of the user whose notes are aggregated
+        positive_threshold (float): Polarity above which a note counts as positive
+        negative_threshold (float): Polarity below which a note counts as negative
+        bins (int): Number of equal-width bins in each histogram
+        created_after (Optional[datetime]): Only include notes created at or after this time
+        created_before (Optional[datetime]): Only include notes created before this time
+
+    Returns:
+        dict: Note and scored-note counts, the thresholds used, the label
+        distribution, average scores, per-day averages and polarity and
+        subjectivity histograms
+    """
+    filters = [Note.owner_id == owner_id]
+    # created_at is stored as text; compare it as text so the index applies
+    if created_after is not None:
+        filters.append(type_coerce(Note.created_at, String) >= format_timestamp(created_after))
+    if created_before is not None:
+        filters.append(type_coerce(Note.created_at, String) < format_timestamp(created_before))
+
+    total, scored, average_polarity, average_subjectivity = db.execute(
+        select(func.count(), func.count(Note.polarity), func.avg(Note.polarity), func.avg(Note.subjectivity))
+        .where(*filters)
+    ).one()
+
+    label = sentiment_label(positive_threshold, negative_threshold)
+    distribution = {sentiment: 0 for sentiment in SENTIMENTS}
+    distribution["unanalyzed"] = 0
+    for sentiment, count in db.execute(select(label, func.count()).where(*filters).group_by(label)).all():
+        distribution[sentiment if sentiment is not None else "unanalyzed"] += count
+
+    day = func.date(Note.created_at)
+    daily = db.execute(
+        select(day, func.count(), func.avg(Note.polarity), func.avg(Note.subjectivity))
+        .where(*filters, Note.polarity.is_not(None))
+        .group_by(day)
+        .order_by(day)
+    ).all()
+
+    return {
+        "total": total,
+        "scored": scored,
+        "thresholds": {"positive": positive_threshold, "negative": negative_threshold},
+        "distribution": distribution,
+        "average_polarity": average_polarity,
+        "average_subjectivity": average_subjectivity,
+        "daily": [
+            {"date": date, "notes": count, "polarity": polarity, "subjectivity": subjectivity}
+            for date, count, polarity, subjectivity in daily
+        ],
+        "polarity_histogram": _histogram(db, Note.polarity, filters, -1.0, 1.0, bins),
+        "subjectivity_histogram": _histogram(db, Note.subjectivity, filters, 0.0, 1.0, bins),
+    }
+
+def relabel_sentiments(engine: Engine, positive_threshold: float = POSITIVE_THRESHOLD,
+                       negative_threshold: float = NEGATIVE_THRESHOLD) -> int:
+    """
+    Reclassify every scored note's stored label against the given thresholds.
+
+    Only notes whose label changes are written, so only their versions go up.
+
+    Returns:
+        int: Number of notes relabelled
+    """
+    label = sentiment_label(positive_threshold, negative_threshold)
+    with engine.begin() as conn:
+        result = conn.execute(
+            update(Note)
+            .where(and_(Note.polarity.is_not(None), Note.sentiment.is_distinct_from(label)))
+            .values(sentiment=label)
+        )
+    logger.info(f"Relabelled {result.rowcount} notes")
+    return result.rowcount
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage stored sentiment labels")
+    parser.add_argument("command", choices=["relabel"], help="reclassify stored scores against the current thresholds")
+    args = parser.parse_args()
+
+    from app.database.database import engine
+    logging.basicConfig(level=logging.INFO)
+    relabel_sentiments(engine)
@@ -0,0 +1,100 @@
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Sequence, Tuple
+from datetime import datetime
+from app.models.note import Note
+from app.models.note_version import NoteOwnerVersion
+from app.models.user import User
+from app.models.schemas import NoteCreate
+from app.ml.minhash import DUPLICATE_DETECTION
+from app.database.pagination import keyset_statement, keyset_result, keyset_rows_result
+from app.database import crud
+from app.database.crud import NOTE_FIELDS, note_rows_statement, note_rows_to_dicts
+import logging
+
+# Async counterparts of the crud functions behind the core note and user
+# routes, used when DATABASE_MODE=async. Writes run the crud functions on
+# the session's connection, so only the I/O differs between the two modes.
+
+logger = logging.getLogger(__name__)
+
+async def get_notes(db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100, tag: Optional[str] = None):
+    """
+    Get a user's notes with OFFSET pagination, most recent first.
+    """
+    result = await db.execute(crud.notes_offset_statement(owner_id, skip, limit, tag))
+    return result.scalars().all()
+
+async def get_note_dicts_page(db: AsyncSession, owner_id: int, fields: Sequence[str] = NOTE_FIELDS,
+                              limit: int = 100, cursor: Optional[str] = None, tag: Optional[str] = None):
+    """
+    Get a page of a user's notes as plain dicts, most recent first.
+    """
+    result = await db.execute(note_rows_statement(owner_id, fields, limit, cursor, tag))
+    rows, next_cursor = keyset_rows_result(result.all(), limit)
+    return note_rows_to_dicts(rows, fields), next_cursor
+
+async def get_note(db: AsyncSession, note_id: int, owner_id: int):
+    """
+    Get a specific note by ID, if it belongs to the given user.
+    """
+    result = await db.execute(select(Note).where(Note.id == note_id, Note.owner_id == owner_id))
+    return result.scalars().first()
+
+async def get_owner_version(db: AsyncSession, owner_id: int) -> Tuple[int, Optional[datetime]]:
+    """
+    Get the version of a user's notes and when it last changed.
+    """
+    result = await db.execute(
+        select(NoteOwnerVersion.version, NoteOwnerVersion.updated_at).where(NoteOwnerVersion.owner_id == owner_id)
+    )
+    row = result.first()
+    return (row.version, row.updated_at) if row is not None else (0, None)
+
+async def create_note(db: AsyncSession, note: NoteCreate, owner_id: int, enqueue_analysis: bool = False,
+                      on_duplicate: str = DUPLICATE_DETECTION):
+    """
+    Create a new note owned by the given user, with validation.
+
+    Runs the steps of crud.create_note; the embedding and signature are
+    computed in the threadpool so they never block the event loop.
+    """
+    prepared = await run_in_threadpool(crud.prepare_note, note, on_duplicate)
+    return await db.run_sync(crud.save_note, prepared, owner_id, enqueue_analysis, on_duplicate)
+
+async def analyze_note_sentiment(db: AsyncSession, note_id: int, owner_id: int, engine: Optional[str] = None):
+    """
+    Analyze sentiment of a note and update the database.
+
+    Runs the steps of crud.analyze_note_sentiment; NLP runs in the
+    threadpool so it never blocks the event loop.
+    """
+    try:
+        inputs = await db.run_sync(crud.load_analysis_inputs, note_id, owner_id, engine)
+        outcome = await run_in_threadpool(crud.compute_analysis, inputs)
+        return await db.run_sync(crud.save_analysis, inputs, outcome)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error analyzing sentiment for note ID {note_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing sentiment: {str(e)}"
+        )
+
+# User operations
+async def get_user(db: AsyncSession, user_id: int):
+    """
+    Get a user by ID.
+    """
+    return await db.get(User, user_id)
+
+async def get_users_page(db: AsyncSession, limit: int = 100, cursor: Optional[str] = None):
+    """
+    Get a page of users after `cursor`, most recently registered first.
+    """
+    result = await db.execute(keyset_statement(select(User), User, limit, cursor))
+    return keyset_result(result.all(), limit)
@@ -0,0 +1,23 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database.database import SQLALCHEMY_DATABASE_URL, DATABASE_PROFILE, configure_engine
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync SQLite URL to its aiosqlite equivalent.
+    """
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+# Create async engine (requires aiosqlite)
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL))
+configure_engine(async_engine.sync_engine, SQLALCHEMY_DATABASE_URL, DATABASE_PROFILE)
+
+# Create AsyncSessionLocal class
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,30 +1,162 @@
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import desc 
+from sqlalchemy import delete, desc, func, insert, select, update
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 from app.models.note import Note 
+from app.models.note_version import NoteOwnerVersion
+from app.models.note_tombstone import NoteTombstone
+from app.models.job import AnalysisJob
+from app.models.sentiment_cache import SentimentCacheEntry
+from app.models.note_chunk import NoteSentimentChunk
+from app.models.note_embedding import NoteEmbedding
+from app.models.note_tag import NoteTag
 from app.models.user import User
-from app.models.schemas import NoteCreate, UserCreate
-from app.ml.sentiment import analyze_sentiment
+from app.models.schemas import NoteCreate, NoteResponse, UserCreate
+from app.ml.sentiment import TextAnalysis, analyze_long_text, analyze_text, analyze_texts_batch, tag_text
+from app.ml.engines import SentimentScore, classify_polarity, get_engine
+from app.ml.chunking import SENTIMENT_CHUNK_THRESHOLD, ChunkedAnalysis, ChunkScore, has_text_after
+from app.ml.cache import sentiment_cache, content_hash, SENTIMENT_CACHE_PERSIST
+from app.ml.embeddings import embed_note, to_blob
+from app.ml.minhash import DUPLICATE_DETECTION, signature
+from app.database import duplicates, similarity, tags
+from app.database.pagination import keyset_page, keyset_statement, keyset_rows_result
 from app.api.auth import get_password_hash
+import json
 import logging
+import time
+import numpy as np
+from datetime import datetime
 
-def get_notes(db: Session, skip: int = 0, limit: int = 100):
+logger = logging.getLogger(__name__)
+
+# Fields a note listing can be projected to
+NOTE_FIELDS = tuple(NoteResponse.model_fields)
+
+def notes_offset_statement(owner_id: int, skip: int = 0, limit: int = 100, tag: Optional[str] = None):
     """
-    Get all notes with pagination, ordered by creation date (most recent first).
+    Build the OFFSET statement of get_notes, shared with async_crud.get_notes.
     """
+    statement = select(Note).where(Note.owner_id == owner_id)
+    if tag is not None:
+        statement = statement.where(Note.id.in_(tags.tagged_note_ids(owner_id, tag)))
     # Order by Note.created_at in descending order
-   
-    return db.query(Note).order_by(desc(Note.created_at)).offset(skip).limit(limit).all()
+    return statement.order_by(desc(Note.created_at), desc(Note.id)).offset(skip).limit(limit)
+
+def get_notes(db: Session, owner_id: int, skip: int = 0, limit: int = 100, tag: Optional[str] = None):
+    """
+    Get a user's notes with pagination, ordered by creation date (most recent first).
+    
+    OFFSET pagination gets slower with depth; prefer get_notes_page.
+    """
+    return db.execute(notes_offset_statement(owner_id, skip, limit, tag)).scalars().all()
+
+def get_notes_page(db: Session, owner_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """
+    Get a page of a user's notes after `cursor`, most recent first.
+    
+    The (owner_id, created_at, id) index turns this into a range scan over
+    the owner's notes only.
+    
+    Returns:
+        Tuple[List[Note], Optional[str]]: The notes and the next page's cursor
+    """
+    return keyset_page(db, select(Note).where(Note.owner_id == owner_id), Note, limit, cursor)
+
+def parse_note_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated field projection such as "id,title,sentiment".
+    
+    Raises:
+        HTTPException: If a field is not part of NoteResponse
+    """
+    if not fields:
+        return NOTE_FIELDS
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in NOTE_FIELDS]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(NOTE_FIELDS)}"
+        )
+    return requested
+
+def note_rows_statement(owner_id: int, fields: Sequence[str], limit: int, cursor: Optional[str], tag: Optional[str] = None):
+    """
+    Build the keyset statement of a note listing that selects only `fields`.
+    
+    `id` is always selected first because the next cursor needs it. With a
+    tag, only notes carrying it are listed.
+    """
+    columns = [Note.id] + [getattr(Note, field) for field in fields if field != "id"]
+    statement = select(*columns).where(Note.owner_id == owner_id)
+    if tag is not None:
+        statement = statement.where(Note.id.in_(tags.tagged_note_ids(owner_id, tag)))
+    return keyset_statement(statement, Note, limit, cursor)
+
+def note_rows_to_dicts(rows, fields: Sequence[str]) -> List[dict]:
+    """
+    Turn rows of note_rows_statement into plain dicts with only `fields`.
+    """
+    selected = ["id"] + [field for field in fields if field != "id"]
+    positions = [(field, selected.index(field)) for field in fields]
+    return [{field: row[i] for field, i in positions} for row in rows]
+
+def get_note_dicts_page(db: Session, owner_id: int, fields: Sequence[str] = NOTE_FIELDS,
+                        limit: int = 100, cursor: Optional[str] = None, tag: Optional[str] = None):
+    """
+    Get a page of a user's notes as plain dicts, most recent first.
+    
+    Only the requested columns are selected and no ORM objects are built,
+    so the page can be serialized straight to JSON without re-validation.
+    
+    Returns:
+        Tuple[List[dict], Optional[str]]: The notes and the next page's cursor
+    """
+    rows, next_cursor = keyset_rows_result(db.execute(note_rows_statement(owner_id, fields, limit, cursor, tag)).all(), limit)
+    return note_rows_to_dicts(rows, fields), next_cursor
+
+def get_note(db: Session, note_id: int, owner_id: int):
+    """
+    Get a specific note by ID, if it belongs to the given user.
+    """
+    return db.query(Note).filter(Note.id == note_id, Note.owner_id == owner_id).first()
 
-def get_note(db: Session, note_id: int):
+def get_note_owners(db: Session, note_ids: List[int]) -> Dict[int, Optional[int]]:
     """
-    Get a specific note by ID.
+    Map note IDs to their owners' IDs; missing notes are left out.
     """
-    return db.query(Note).filter(Note.id == note_id).first()
+    if not note_ids:
+        return {}
+    return dict(db.execute(select(Note.id, Note.owner_id).where(Note.id.in_(note_ids))).all())
 
-def create_note(db: Session, note: NoteCreate):
+def get_owner_version(db: Session, owner_id: int) -> Tuple[int, Optional[datetime]]:
+    """
+    Get the version of a user's notes and when it last changed.
+    
+    The version goes up on every change to any of the user's notes; it is 0
+    for a user whose notes have never changed.
     """
-    Create a new note with validation.
+    row = db.execute(
+        select(NoteOwnerVersion.version, NoteOwnerVersion.updated_at).where(NoteOwnerVersion.owner_id == owner_id)
+    ).first()
+    return (row.version, row.updated_at) if row is not None else (0, None)
+
+class PreparedNote(NamedTuple):
+    """
+    A validated note with what create_note computes from its text, by prepare_note.
+    """
+    note: NoteCreate
+    vector: np.ndarray
+    # MinHash signature; None with duplicate detection off or for text without words
+    signature: Optional[np.ndarray]
+
+def prepare_note(note: NoteCreate, on_duplicate: str = DUPLICATE_DETECTION) -> PreparedNote:
+    """
+    Validate a new note and compute its embedding and signature; touches no
+    database, so it can run in a worker thread.
+    
+    Raises:
+        HTTPException: 400 if the title is empty or the content too short
     """
     if not note.title:
         raise HTTPException(status_code=400, detail="Title cannot be empty")
@@ -35,60 +167,329 @@ def create_note(db: Session, note: NoteCreate):
             detail="Content must be at least 10 characters long"
         )
     
+    sig = signature(note.content) if on_duplicate != "off" else None
+    return PreparedNote(note, embed_note(note.title, note.content), sig)
+
+def save_note(db: Session, prepared: PreparedNote, owner_id: int, enqueue_analysis: bool = False,
+              on_duplicate: str = DUPLICATE_DETECTION):
+    """
+    Check a prepared note for duplicates, insert it and commit.
+    
+    Raises:
+        HTTPException: 409 if it nearly duplicates a note and on_duplicate is
+        "reject", 500 on database errors
+    """
+    note, vector, sig = prepared
+    duplicate = duplicates.find_duplicate(db, owner_id, sig) if sig is not None else None
+    if duplicate is not None and on_duplicate == "reject":
+        raise HTTPException(status_code=409, detail={
+            "message": "Note nearly duplicates an existing note",
+            "duplicate_of": duplicate[0],
+            "similarity": round(duplicate[1], 4),
+        })
+    
     try:
         db_note = Note(
             title=note.title,
             content=note.content,
-            sentiment=None
+            sentiment=None,
+            owner_id=owner_id
         )
         
         db.add(db_note)
+        db.flush()
+        db.add(NoteEmbedding(note_id=db_note.id, vector=to_blob(vector)))
+        if sig is not None:
+            duplicates.index_note(db, db_note.id, owner_id, sig, duplicate)
+        job = None
+        if enqueue_analysis:
+            job = AnalysisJob(note_id=db_note.id, status="queued")
+            db.add(job)
         db.commit()
         db.refresh(db_note)
+        similarity.note_added(owner_id, db_note.id, vector, db_note.change_seq)
+        db_note.analysis_job_id = job.id if job is not None else None
+        db_note.duplicate_of, db_note.duplicate_similarity = duplicate or (None, None)
         return db_note
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-def analyze_note_sentiment(db: Session, note_id: int):
+def create_note(db: Session, note: NoteCreate, owner_id: int, enqueue_analysis: bool = False,
+                on_duplicate: str = DUPLICATE_DETECTION):
+    """
+    Create a new note owned by the given user, with validation.
+    
+    When enqueue_analysis is set, a sentiment analysis job is queued in the
+    same transaction and its ID is available as db_note.analysis_job_id.
+    The note's embedding is stored with it and added to the owner's
+    similarity index.
+    
+    Near-duplicates of the user's earlier notes are flagged (db_note.duplicate_of
+    and db_note.duplicate_similarity) or, with on_duplicate="reject",
+    refused with a 409. The work is split into prepare_note and save_note,
+    which async_crud runs with its own I/O.
+    """
+    return save_note(db, prepare_note(note, on_duplicate), owner_id, enqueue_analysis, on_duplicate)
+
+def bulk_create_notes(db: Session, notes: List[NoteCreate], owner_id: int) -> int:
+    """
+    Insert many validated notes owned by the given user in a single transaction.
+    
+    Uses one executemany INSERT instead of a commit and refresh per note.
+    The notes' embeddings are stored in the same transaction, like
+    create_note does. Unless DUPLICATE_DETECTION is off, the notes are
+    also indexed for duplicate detection and their near-duplicates
+    flagged, but never rejected.
+    
+    Returns:
+        int: Number of notes inserted
+    """
+    if not notes:
+        return 0
+    rows = [{"title": note.title, "content": note.content, "owner_id": owner_id} for note in notes]
+    try:
+        note_ids = db.scalars(insert(Note).returning(Note.id, sort_by_parameter_order=True), rows).all()
+        db.execute(insert(NoteEmbedding), [
+            {"note_id": note_id, "vector": to_blob(embed_note(row["title"], row["content"]))}
+            for note_id, row in zip(note_ids, rows)
+        ])
+        if DUPLICATE_DETECTION != "off":
+            duplicates.index_contents(db, [(note_id, owner_id, row["content"]) for note_id, row in zip(note_ids, rows)])
+        db.commit()
+        return len(notes)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+def iter_notes_ndjson(db: Session, owner_id: int, batch_size: int = 1000) -> Iterator[bytes]:
+    """
+    Stream all of a user's notes as NDJSON, oldest first.
+    
+    Rows are fetched `batch_size` at a time from a server-side cursor and
+    each batch is yielded as one chunk, so memory stays flat however many
+    notes there are.
+    """
+    statement = select(
+        Note.id, Note.title, Note.content, Note.sentiment, Note.created_at, Note.updated_at
+    ).where(Note.owner_id == owner_id).order_by(Note.id).execution_options(yield_per=batch_size)
+    for rows in db.execute(statement).partitions():
+        yield "".join(
+            json.dumps({
+                "id": row.id,
+                "title": row.title,
+                "content": row.content,
+                "sentiment": row.sentiment,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+            }) + "\n"
+            for row in rows
+        ).encode()
+
+def delete_note(db: Session, note_id: int, owner_id: int) -> bool:
+    """
+    Delete one of a user's notes.
+    
+    Triggers record a tombstone for the changes feed and drop the note from
+    the search index.
+    
+    Returns:
+        bool: False if the note does not exist or belongs to someone else
+    """
+    try:
+        result = db.execute(delete(Note).where(Note.id == note_id, Note.owner_id == owner_id))
+        if result.rowcount:
+            db.execute(delete(NoteSentimentChunk).where(NoteSentimentChunk.note_id == note_id))
+            db.execute(delete(NoteEmbedding).where(NoteEmbedding.note_id == note_id))
+            db.execute(delete(NoteTag).where(NoteTag.note_id == note_id))
+            # Queued and running jobs go too; SQLite may give the note's ID to
+            # the next note, which they would then analyze
+            db.execute(delete(AnalysisJob).where(AnalysisJob.note_id == note_id))
+            duplicates.remove_note(db, note_id)
+        db.commit()
+        return result.rowcount > 0
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+def get_note_changes(db: Session, owner_id: int, since: int = 0, limit: int = 500):
+    """
+    Get a user's notes changed and deleted after change sequence `since`.
+    
+    Live notes and tombstones are read from their (owner_id, change_seq)
+    indexes and merged in sequence order, so the cost depends on the number
+    of changes, not the number of notes.
+    
+    Returns:
+        dict: Changed notes (as dicts with NOTE_FIELDS), IDs of deleted
+        notes, the sequence to pass as `since` next time and whether more
+        changes are waiting
+    """
+    columns = [Note.change_seq] + [getattr(Note, field) for field in NOTE_FIELDS]
+    notes = db.execute(
+        select(*columns)
+        .where(Note.owner_id == owner_id, Note.change_seq > since)
+        .order_by(Note.change_seq)
+        .limit(limit + 1)
+    ).all()
+    tombstones = db.execute(
+        select(NoteTombstone.change_seq, NoteTombstone.note_id)
+        .where(NoteTombstone.owner_id == owner_id, NoteTombstone.change_seq > since)
+        .order_by(NoteTombstone.change_seq)
+        .limit(limit + 1)
+    ).all()
+    
+    changes = sorted(
+        [(row.change_seq, row, False) for row in notes] + [(row.change_seq, row, True) for row in tombstones],
+        key=lambda change: change[0]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    return {
+        "notes": [{field: row[i + 1] for i, field in enumerate(NOTE_FIELDS)} for _, row, deleted in changes if not deleted],
+        "deleted": [row.note_id for _, row, deleted in changes if deleted],
+        "next_since": changes[-1][0] if changes else since,
+        "has_more": has_more,
+    }
+
+class AnalysisInputs(NamedTuple):
+    """
+    What analyzing a note needs from the database, read by load_analysis_inputs.
+    """
+    note: Note
+    engine_name: str
+    key: str
+    # Score of the content from the result cache, if any
+    cached: Optional[SentimentScore]
+    stored_tags: List[str]
+    # Long note whose window scores are not stored yet
+    needs_chunks: bool
+
+class AnalysisOutcome(NamedTuple):
+    """
+    Result of compute_analysis, written by save_analysis.
+    """
+    score: SentimentScore
+    chunked: Optional[ChunkedAnalysis]
+    # Tags of a note that has none stored yet
+    new_tags: Optional[List[str]]
+    new_cache_entry: Optional[SentimentCacheEntry]
+
+def load_analysis_inputs(db: Session, note_id: int, owner_id: int, engine: Optional[str] = None) -> AnalysisInputs:
+    """
+    Read the note, its cached score and its stored tags before analysis.
+    
+    Raises:
+        HTTPException: 404 if the note does not exist or belongs to another user
+    """
+    db_note = get_note(db, note_id, owner_id)
+    if db_note is None:
+        logger.warning(f"Note with ID {note_id} not found")
+        raise HTTPException(status_code=404, detail=f"Note with ID {note_id} not found")
+    
+    # Look the content up in the result cache before running NLP
+    engine_name = get_engine(engine).name
+    key = content_hash(db_note.content, engine_name)
+    score = sentiment_cache.get(key)
+    if score is None and SENTIMENT_CACHE_PERSIST:
+        score = get_cached_score(db, key)
+        if score is not None:
+            sentiment_cache.record_persistent_hit()
+            sentiment_cache.put(key, score)
+    # Long notes are scored window by window and the windows' scores kept;
+    # a cached result is not enough while the stored windows do not reach
+    # the end of the note, because there are none or the budget ran out
+    needs_chunks = len(db_note.content) > SENTIMENT_CHUNK_THRESHOLD and (
+        score is None or not has_complete_sentiment_chunks(db, note_id, db_note.content)
+    )
+    # Content never changes, so a note's tags are extracted only once
+    return AnalysisInputs(db_note, engine_name, key, score, tags.get_note_tags(db, note_id), needs_chunks)
+
+def compute_analysis(inputs: AnalysisInputs) -> AnalysisOutcome:
+    """
+    Run the NLP an analysis needs; touches no database, so it can run in a
+    worker thread.
+    """
+    content, engine_name, key, score = inputs.note.content, inputs.engine_name, inputs.key, inputs.cached
+    logger.info(f"Analyzing sentiment for note ID {inputs.note.id}")
+    new_tags = new_cache_entry = chunked = None
+    if inputs.needs_chunks:
+        chunked = analyze_long_text(content, engine_name)
+        if chunked.partial:
+            # Kept on the note, but not cached: the next analysis redoes it
+            logger.warning(f"Chunked analysis of note ID {inputs.note.id} ran out of budget after {len(chunked.chunks)} chunks")
+        elif score is None:
+            sentiment_cache.put(key, chunked.score)
+            if SENTIMENT_CACHE_PERSIST:
+                new_cache_entry = sentiment_cache_entry(key, chunked.score)
+        # Cached scores are complete, so one beats a partial chunked score
+        if score is None:
+            score = chunked.score
+    elif score is None:
+        score, new_tags = analyze_text(content, engine=engine_name)
+        sentiment_cache.put(key, score)
+        if SENTIMENT_CACHE_PERSIST:
+            new_cache_entry = sentiment_cache_entry(key, score)
+    if inputs.stored_tags:
+        new_tags = None
+    elif new_tags is None:
+        new_tags = tag_text(content, get_engine(engine_name))
+    return AnalysisOutcome(score, chunked, new_tags, new_cache_entry)
+
+def save_analysis(db: Session, inputs: AnalysisInputs, outcome: AnalysisOutcome) -> Note:
+    """
+    Write an analysis to the note and commit, unless nothing changed.
+    """
+    db_note, score, new_tags = inputs.note, outcome.score, outcome.new_tags
+    sentiment = classify_polarity(score.polarity)
+    logger.info(f"Sentiment analysis result for note ID {db_note.id}: {sentiment} (polarity: {score.polarity})")
+    
+    # Unchanged result and nothing new to persist: skip the write
+    if (db_note.sentiment, db_note.polarity, db_note.subjectivity) == (sentiment, *score) \
+            and outcome.new_cache_entry is None and outcome.chunked is None and not new_tags:
+        db_note.tags = inputs.stored_tags
+        return db_note
+    
+    # Update note with sentiment and the scores behind it
+    db_note.sentiment = sentiment
+    db_note.polarity, db_note.subjectivity = score
+    if outcome.new_cache_entry is not None:
+        db.merge(outcome.new_cache_entry)
+    if outcome.chunked is not None:
+        replace_sentiment_chunks(db, db_note.id, outcome.chunked.chunks)
+    if new_tags:
+        tags.set_note_tags(db, {db_note.id: new_tags})
+    db.commit()
+    db.refresh(db_note)
+    db_note.tags = inputs.stored_tags or sorted(new_tags or [])
+    return db_note
+
+def analyze_note_sentiment(db: Session, note_id: int, owner_id: int, engine: Optional[str] = None):
     """
     Analyze sentiment of a note and update the database.
     
+    The note's tags are extracted from the same tokens on its first
+    analysis and are available as db_note.tags. The work is split into
+    load_analysis_inputs, compute_analysis and save_analysis, which
+    async_crud runs with its own I/O.
+    
     Args:
         db (Session): Database session
         note_id (int): ID of the note to analyze
+        owner_id (int): ID of the user the note must belong to
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
         
     Returns:
         Note: The updated note with sentiment analysis
-        None: If the note is not found
         
     Raises:
-        HTTPException: If there's an error during sentiment analysis or database operations
+        HTTPException: 404 if the note is not found, 500 if there's an error
+        during sentiment analysis or database operations
     """
-    logger = logging.getLogger(__name__)
-    
     try:
-        # Get note
-        db_note = get_note(db, note_id)
-        
-        if db_note is None:
-            logger.warning(f"Note with ID {note_id} not found")
-            # Raise 404 if note not found for analysis endpoint
-            raise HTTPException(status_code=404, detail=f"Note with ID {note_id} not found")
-        
-        logger.info(f"Analyzing sentiment for note ID {note_id}")
-        
-        # Analyze sentiment
-        sentiment = analyze_sentiment(db_note.content)
-        logger.info(f"Sentiment analysis result for note ID {note_id}: {sentiment}")
-        
-        # Update note with sentiment
-        db_note.sentiment = sentiment
-        db.commit()
-        db.refresh(db_note)
-        
-        return db_note
-        
+        inputs = load_analysis_inputs(db, note_id, owner_id, engine)
+        return save_analysis(db, inputs, compute_analysis(inputs))
     except HTTPException as http_exc:
         # Re-raise HTTPExceptions directly
         raise http_exc
@@ -101,6 +502,349 @@ def analyze_note_sentiment(db: Session, note_id: int):
             detail=f"Error analyzing sentiment: {str(e)}"
         )
 
+def get_cached_score(db: Session, key: str) -> Optional[SentimentScore]:
+    """
+    Get a persisted sentiment score by content hash.
+
+    Entries stored before scores were kept have no polarity and count as misses.
+    """
+    row = db.execute(
+        select(SentimentCacheEntry.polarity, SentimentCacheEntry.subjectivity)
+        .where(SentimentCacheEntry.content_hash == key, SentimentCacheEntry.polarity.is_not(None))
+    ).first()
+    return SentimentScore(*row) if row is not None else None
+
+def sentiment_cache_entry(key: str, score: SentimentScore) -> SentimentCacheEntry:
+    """
+    Build the persistent cache row for a score.
+    """
+    return SentimentCacheEntry(
+        content_hash=key, sentiment=classify_polarity(score.polarity),
+        polarity=score.polarity, subjectivity=score.subjectivity,
+    )
+
+def has_complete_sentiment_chunks(db: Session, note_id: int, content: str) -> bool:
+    """
+    Whether chunked analysis has stored window scores for a note up to its end.
+
+    Windows stored by an analysis that ran out of budget stop early and do
+    not count.
+    """
+    end = db.execute(
+        select(func.max(NoteSentimentChunk.end)).where(NoteSentimentChunk.note_id == note_id)
+    ).scalar()
+    return end is not None and not has_text_after(content, end)
+
+def replace_sentiment_chunks(db: Session, note_id: int, chunks: List[ChunkScore]):
+    """
+    Replace a note's stored window scores; the caller commits.
+    """
+    db.execute(delete(NoteSentimentChunk).where(NoteSentimentChunk.note_id == note_id))
+    if chunks:
+        db.execute(insert(NoteSentimentChunk), [
+            {
+                "note_id": note_id,
+                "chunk_index": chunk.index,
+                "start": chunk.start,
+                "end": chunk.end,
+                "polarity": chunk.polarity,
+                "subjectivity": chunk.subjectivity,
+            }
+            for chunk in chunks
+        ])
+
+def get_sentiment_chunks(db: Session, note_id: int) -> List[NoteSentimentChunk]:
+    """
+    Get a note's stored window scores in text order.
+    """
+    return db.execute(
+        select(NoteSentimentChunk).where(NoteSentimentChunk.note_id == note_id).order_by(NoteSentimentChunk.chunk_index)
+    ).scalars().all()
+
+def get_note_sentiment_chunks(db: Session, note_id: int, owner_id: int, order: str = "position",
+                              limit: Optional[int] = None, excerpt_chars: int = 160):
+    """
+    Get the window scores of one of a user's notes, with an excerpt of each window.
+    
+    Args:
+        order (str): "position" for text order, or "impact" for the windows
+            that moved the note's polarity most (|polarity| x length) first
+        limit (Optional[int]): Return at most this many windows
+        
+    Returns:
+        dict: The note's sentiment, whether its analysis stopped early, and
+        its windows; None if the note does not exist or belongs to someone else
+    """
+    db_note = get_note(db, note_id, owner_id)
+    if db_note is None:
+        return None
+    chunks = get_sentiment_chunks(db, note_id)
+    partial = bool(chunks) and has_text_after(db_note.content, chunks[-1].end)
+    if order == "impact":
+        chunks = sorted(chunks, key=lambda chunk: abs(chunk.polarity) * (chunk.end - chunk.start), reverse=True)
+    return {
+        "note_id": note_id,
+        "sentiment": db_note.sentiment,
+        "partial": partial,
+        "chunks": [
+            {
+                "index": chunk.chunk_index,
+                "start": chunk.start,
+                "end": chunk.end,
+                "polarity": chunk.polarity,
+                "subjectivity": chunk.subjectivity,
+                "sentiment": classify_polarity(chunk.polarity),
+                "excerpt": db_note.content[chunk.start:min(chunk.end, chunk.start + excerpt_chars)].strip(),
+            }
+            for chunk in chunks[:limit]
+        ],
+    }
+
+def _iter_notes_for_analysis(db: Session, owner_id: int, note_ids: Optional[List[int]], chunk_size: int):
+    """
+    Yield chunks of (id, content) rows to analyze.
+
+    With explicit IDs the list is walked in chunks; otherwise notes without a
+    sentiment score are walked in primary key order so each chunk is an index
+    range. That includes notes labelled before scores were stored.
+    """
+    if note_ids is not None:
+        unique_ids = list(dict.fromkeys(note_ids))
+        for i in range(0, len(unique_ids), chunk_size):
+            chunk_ids = unique_ids[i:i + chunk_size]
+            yield chunk_ids, db.execute(
+                select(Note.id, Note.content).where(Note.id.in_(chunk_ids), Note.owner_id == owner_id)
+            ).all()
+        return
+
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Note.id, Note.content)
+            .where(Note.owner_id == owner_id, Note.polarity.is_(None), Note.id > last_id)
+            .order_by(Note.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield None, rows
+
+def analyze_notes_sentiment_batch(db: Session, owner_id: int, note_ids: Optional[List[int]] = None, chunk_size: int = 500, engine: Optional[str] = None):
+    """
+    Analyze sentiment of many of a user's notes and update the database in bulk.
+    
+    Each note is scored the same way as by analyze_note_sentiment. The
+    speed-up comes from reading and writing notes a chunk at a time (one
+    executemany UPDATE and one commit per chunk) and from scoring duplicate
+    contents once, not from scoring texts together.
+    
+    Args:
+        db (Session): Database session
+        owner_id (int): ID of the user whose notes are analyzed; other users'
+            notes are reported as not found
+        note_ids (Optional[List[int]]): IDs of the notes to analyze, or None to
+            analyze every note that has no sentiment score yet
+        chunk_size (int): Number of notes scored and written per transaction
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
+        
+    Returns:
+        dict: Number of analyzed notes, counts per sentiment, IDs that were not
+        found, per-note results (only when note_ids is given) and throughput
+        
+    Raises:
+        HTTPException: If there's an error during sentiment analysis or database operations
+    """
+    logger = logging.getLogger(__name__)
+    start = time.perf_counter()
+    analyzed = 0
+    counts = {"positive": 0, "neutral": 0, "negative": 0}
+    not_found = []
+    results = []
+    
+    try:
+        for requested_ids, rows in _iter_notes_for_analysis(db, owner_id, note_ids, chunk_size):
+            if requested_ids is not None:
+                found = {row.id for row in rows}
+                not_found.extend(note_id for note_id in requested_ids if note_id not in found)
+            if not rows:
+                continue
+            
+            # Texts are scored one by one; duplicate contents only once
+            analyses = analyze_texts_batch([row.content for row in rows], engine=engine)
+            updates = [
+                {
+                    "id": row.id,
+                    "sentiment": classify_polarity(score.polarity),
+                    "polarity": score.polarity,
+                    "subjectivity": score.subjectivity,
+                }
+                for row, (score, _) in zip(rows, analyses)
+            ]
+            
+            # One executemany UPDATE, the tags and one commit per chunk
+            db.execute(update(Note), updates)
+            tags.set_note_tags(db, {row.id: analysis.tags for row, analysis in zip(rows, analyses)})
+            db.commit()
+            
+            analyzed += len(updates)
+            for result in updates:
+                counts[result["sentiment"]] += 1
+            if note_ids is not None:
+                results.extend(updates)
+            logger.info(f"Batch sentiment analysis stored {len(updates)} notes ({analyzed} so far)")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error in batch sentiment analysis after {analyzed} notes: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing sentiment: {str(e)}"
+        )
+    
+    elapsed = time.perf_counter() - start
+    notes_per_second = analyzed / elapsed if elapsed > 0 else 0.0
+    logger.info(f"Batch sentiment analysis finished: {analyzed} notes in {elapsed:.3f}s ({notes_per_second:.1f} notes/sec)")
+    
+    return {
+        "analyzed": analyzed,
+        "counts": counts,
+        "not_found": not_found,
+        "results": results,
+        "elapsed_seconds": elapsed,
+        "notes_per_second": notes_per_second,
+    }
+
+# Analysis job operations
+def get_job(db: Session, job_id: int, owner_id: int):
+    """
+    Get an analysis job by ID, if its note belongs to the given user.
+    """
+    return (
+        db.query(AnalysisJob)
+        .join(Note, Note.id == AnalysisJob.note_id)
+        .filter(AnalysisJob.id == job_id, Note.owner_id == owner_id)
+        .first()
+    )
+
+def enqueue_analysis_job(db: Session, note_id: int, owner_id: int):
+    """
+    Queue a sentiment analysis job for one of the given user's notes.
+    """
+    if get_note(db, note_id, owner_id) is None:
+        raise HTTPException(status_code=404, detail=f"Note with ID {note_id} not found")
+    
+    try:
+        job = AnalysisJob(note_id=note_id, status="queued")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error queueing analysis job: {str(e)}")
+
+def claim_analysis_jobs(db: Session, limit: int) -> List[Tuple[int, int, str]]:
+    """
+    Atomically mark up to `limit` of the oldest queued jobs as running.
+    
+    Returns:
+        List[Tuple[int, int, str]]: (job_id, note_id, content) for each claimed
+        job; content is None when the note no longer exists
+    """
+    oldest_queued = (
+        select(AnalysisJob.id)
+        .where(AnalysisJob.status == "queued")
+        .order_by(AnalysisJob.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    claimed = db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id.in_(oldest_queued))
+        .values(status="running", started_at=func.now(), attempts=AnalysisJob.attempts + 1)
+        .returning(AnalysisJob.id, AnalysisJob.note_id)
+    ).all()
+    db.commit()
+    if not claimed:
+        return []
+    
+    contents = dict(db.execute(
+        select(Note.id, Note.content).where(Note.id.in_({note_id for _, note_id in claimed}))
+    ).all())
+    return [(job_id, note_id, contents.get(note_id)) for job_id, note_id in sorted(claimed)]
+
+def complete_analysis_jobs(db: Session, results: List[Tuple[int, int, TextAnalysis]]) -> List[Tuple[int, int, TextAnalysis]]:
+    """
+    Store finished job results and the notes' sentiment and tags in one transaction.
+    
+    Results of jobs deleted with their note while they ran are dropped, as
+    the note's ID may already belong to a new note.
+    
+    Args:
+        results: (job_id, note_id, analysis) for each finished job
+        
+    Returns:
+        List[Tuple[int, int, TextAnalysis]]: The results that were stored
+    """
+    if not results:
+        return []
+    try:
+        remaining = set(db.execute(
+            select(AnalysisJob.id).where(AnalysisJob.id.in_([job_id for job_id, _, _ in results]))
+        ).scalars())
+        results = [result for result in results if result[0] in remaining]
+        if not results:
+            db.rollback()
+            return []
+        db.execute(update(Note), [
+            {
+                "id": note_id,
+                "sentiment": classify_polarity(analysis.score.polarity),
+                "polarity": analysis.score.polarity,
+                "subjectivity": analysis.score.subjectivity,
+            }
+            for _, note_id, analysis in results
+        ])
+        tags.set_note_tags(db, {note_id: analysis.tags for _, note_id, analysis in results})
+        db.execute(update(AnalysisJob), [
+            {"id": job_id, "sentiment": classify_polarity(analysis.score.polarity)} for job_id, _, analysis in results
+        ])
+        db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id.in_([job_id for job_id, _, _ in results]))
+            .values(status="completed", error=None, finished_at=func.now())
+        )
+        db.commit()
+        return results
+    except Exception:
+        db.rollback()
+        raise
+
+def fail_analysis_jobs(db: Session, job_ids: List[int], error: str):
+    """
+    Mark jobs as failed with an error message.
+    """
+    if not job_ids:
+        return
+    db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id.in_(job_ids))
+        .values(status="failed", error=error, finished_at=func.now())
+    )
+    db.commit()
+
+def requeue_running_jobs(db: Session) -> int:
+    """
+    Put jobs left running by a stopped worker pool back in the queue.
+    """
+    result = db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.status == "running")
+        .values(status="queued", started_at=None)
+    )
+    db.commit()
+    return result.rowcount
+
 # User operations
 def get_user(db: Session, user_id: int):
     """
@@ -126,31 +870,81 @@ def get_users(db: Session, skip: int = 0, limit: int = 100):
     """
     return db.query(User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: UserCreate):
+def get_users_page(db: Session, limit: int = 100, cursor: Optional[str] = None):
+    """
+    Get a page of users after `cursor`, most recently registered first.
+    
+    Returns:
+        Tuple[List[User], Optional[str]]: The users and the next page's cursor
+    """
+    return keyset_page(db, select(User), User, limit, cursor)
+
+def set_user_active(db: Session, user_id: int, is_active: bool):
+    """
+    Activate or deactivate a user.
+    
+    Updating through the ORM fires the User after_update event, which drops
+    the user's cached tokens in this process.
+    """
+    db_user = get_user(db, user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    db_user.is_active = is_active
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+def ensure_user_available(db: Session, user: UserCreate):
+    """
+    Raise if the username or email of a new user is already registered.
+    """
+    logger = logging.getLogger(__name__)
+    
+    # Check if username already exists
+    logger.info(f"Checking if username '{user.username}' already exists")
+    existing_user = get_user_by_username(db, user.username)
+    if existing_user:
+        logger.warning(f"Username '{user.username}' already registered")
+        raise HTTPException(status_code=400, detail="Username already registered")
+    
+    # Check if email already exists
+    logger.info(f"Checking if email '{user.email}' already exists")
+    existing_email = get_user_by_email(db, user.email)
+    if existing_email:
+        logger.warning(f"Email '{user.email}' already registered")
+        raise HTTPException(status_code=400, detail="Email already registered")
+    
+    # End the read transaction so no pooled connection is held while the caller hashes
+    db.rollback()
+
+def update_user_password_hash(db: Session, user_id: int, hashed_password: str):
+    """
+    Replace a user's stored password hash, e.g. after a bcrypt cost change.
+    """
+    try:
+        db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
     """
     Create a new user.
+    
+    Pass hashed_password when the password was already hashed off-thread;
+    otherwise it is hashed here.
     """
     logger = logging.getLogger(__name__)
     logger.info(f"Creating user with username: {user.username}, email: {user.email}")
     
     try:
-        # Check if username already exists
-        logger.info(f"Checking if username '{user.username}' already exists")
-        existing_user = get_user_by_username(db, user.username)
-        if existing_user:
-            logger.warning(f"Username '{user.username}' already registered")
-            raise HTTPException(status_code=400, detail="Username already registered")
-        
-        # Check if email already exists
-        logger.info(f"Checking if email '{user.email}' already exists")
-        existing_email = get_user_by_email(db, user.email)
-        if existing_email:
-            logger.warning(f"Email '{user.email}' already registered")
-            raise HTTPException(status_code=400, detail="Email already registered")
+        ensure_user_available(db, user)
             
         # Hash the password
-        logger.info("Hashing password")
-        hashed_password = get_password_hash(user.password)
+        if hashed_password is None:
+            logger.info("Hashing password")
+            hashed_password = get_password_hash(user.password)
         
         # Create user instance
         logger.info("Creating user instance")
@@ -1,15 +1,91 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # Create SQLite database URL
 # Store in data directory to ensure persistence with Docker volume
-SQLALCHEMY_DATABASE_URL = "sqlite:///./data/notes.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/notes.db")
+
+# "sync" serves the API with SessionLocal in Starlette's threadpool;
+# "async" serves the core note and user routes with AsyncSessionLocal
+DATABASE_MODE = os.getenv("DATABASE_MODE", "sync").lower()
+
+# "tuned" applies the SQLite pragmas below on every connection; "default"
+# leaves SQLite's own defaults (rollback journal, synchronous=FULL)
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "tuned").lower()
+
+# SQLite pragmas of the tuned profile
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB, so -65536 is a 64 MiB page cache per connection
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+
+# Connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+def is_file_sqlite(url: str) -> bool:
+    """
+    Whether the URL points at an on-disk SQLite database.
+    """
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+def ensure_sqlite_directory(url: str):
+    """
+    Create the directory holding an on-disk SQLite database.
+    """
+    if is_file_sqlite(url):
+        directory = os.path.dirname(os.path.abspath(make_url(url).database))
+        os.makedirs(directory, exist_ok=True)
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Connect event handler applying the tuned profile's pragmas.
+
+    WAL lets readers proceed while a writer commits, synchronous=NORMAL is
+    durable in WAL mode except on power loss, and busy_timeout makes
+    writers wait for the lock instead of failing immediately.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+def configure_engine(engine: Engine, url: str, profile: str = DATABASE_PROFILE):
+    """
+    Attach the profile's connect-time settings to a (sync) engine.
+    """
+    if profile == "tuned" and is_file_sqlite(url):
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+def create_database_engine(url: str = SQLALCHEMY_DATABASE_URL, profile: str = DATABASE_PROFILE) -> Engine:
+    """
+    Create a sync engine for `url` using the given profile.
+    """
+    ensure_sqlite_directory(url)
+    kwargs = {}
+    if make_url(url).get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if is_file_sqlite(url):
+        kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return configure_engine(create_engine(url, **kwargs), url, profile)
 
 # Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_database_engine()
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -24,4 +100,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,220 @@
+"""
+Near-duplicate detection for notes with MinHash signatures and LSH buckets.
+
+Each note's signature is stored in note_signatures and its band keys in
+note_lsh_buckets, a WITHOUT ROWID table keyed by (owner_id, bucket,
+note_id). Finding the duplicates of a new note reads at most
+DUPLICATE_MAX_CANDIDATES rows from each of its LSH_BANDS buckets through
+that key, and compares at most DUPLICATE_MAX_CANDIDATES signatures. The
+cost of an insert is therefore logarithmic in the number of notes, even when
+a user has pasted the same text thousands of times.
+
+Notes are only compared with the same owner's notes. Bulk imports are
+indexed chunk by chunk as they are inserted. Notes from before this existed
+are indexed with `python -m app.database.duplicates index`.
+"""
+import argparse
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, delete, insert, select, union, update
+from sqlalchemy.orm import Session
+
+from app.ml import minhash
+from app.models.note import Note
+from app.models.note_lsh_bucket import NoteLshBucket
+from app.models.note_signature import NoteSignature
+
+logger = logging.getLogger(__name__)
+
+# Candidates compared per insert; the oldest are preferred, as they are the
+# originals that later copies are flagged against
+DUPLICATE_MAX_CANDIDATES = int(os.getenv("DUPLICATE_MAX_CANDIDATES", "50"))
+INDEX_BATCH_SIZE = 1000
+
+@lru_cache(maxsize=None)
+def _candidates_statement(bands: int):
+    # The oldest DUPLICATE_MAX_CANDIDATES notes of the owner sharing one of
+    # the `bands` bucket keys bound as bucket_0, bucket_1, ... Each bucket is
+    # read through its own LIMIT on the primary key before the buckets are
+    # merged, so a bucket holding thousands of copies of one text costs no
+    # more than one holding a few. Built once, as building the sixteen-way
+    # UNION costs a hundred times more than running it.
+    per_bucket = [
+        select(NoteLshBucket.note_id)
+        .where(NoteLshBucket.owner_id == bindparam("owner_id"), NoteLshBucket.bucket == bindparam(f"bucket_{band}"))
+        .order_by(NoteLshBucket.note_id)
+        .limit(DUPLICATE_MAX_CANDIDATES)
+        .subquery()
+        for band in range(bands)
+    ]
+    merged = union(*(select(bucket.c.note_id) for bucket in per_bucket)).subquery()
+    return (
+        select(NoteSignature.note_id, NoteSignature.signature, NoteSignature.duplicate_of)
+        .where(NoteSignature.note_id.in_(
+            select(merged.c.note_id).order_by(merged.c.note_id).limit(DUPLICATE_MAX_CANDIDATES)
+        ))
+    )
+
+def find_duplicate(db: Session, owner_id: int, sig: np.ndarray,
+                   threshold: float = minhash.DUPLICATE_THRESHOLD) -> Optional[Tuple[int, float]]:
+    """
+    Find the owner's note that `sig` most nearly duplicates.
+
+    Returns:
+        Optional[Tuple[int, float]]: ID of the original note (a flagged
+        duplicate's own original) and the estimated similarity, or None
+    """
+    keys = minhash.band_keys(sig)
+    candidates = db.execute(
+        _candidates_statement(len(keys)),
+        {"owner_id": owner_id, **{f"bucket_{band}": key for band, key in enumerate(keys)}},
+    ).all()
+    best = None
+    for note_id, blob, duplicate_of in candidates:
+        stored = minhash.from_blob(blob)
+        if len(stored) != len(sig):
+            # Signed with another MINHASH_PERMUTATIONS
+            continue
+        score = minhash.similarity(sig, stored)
+        if score >= threshold and (best is None or score > best[1]):
+            best = (duplicate_of or note_id, score)
+    return best
+
+def index_note(db: Session, note_id: int, owner_id: int, sig: np.ndarray,
+               duplicate: Optional[Tuple[int, float]] = None):
+    """
+    Store a note's signature and LSH keys (without committing).
+    """
+    # Core inserts on the tables skip the ORM bulk-insert machinery, which
+    # costs more than the inserts themselves
+    db.execute(insert(NoteSignature.__table__), [{
+        "note_id": note_id, "owner_id": owner_id, "signature": minhash.to_blob(sig),
+        "duplicate_of": duplicate[0] if duplicate else None, "similarity": duplicate[1] if duplicate else None,
+    }])
+    db.execute(insert(NoteLshBucket.__table__).prefix_with("OR IGNORE"), [
+        {"owner_id": owner_id, "bucket": key, "note_id": note_id} for key in minhash.band_keys(sig)
+    ])
+
+def remove_note(db: Session, note_id: int):
+    """
+    Drop a note's signature and LSH keys (without committing).
+
+    If the note was an original, its oldest duplicate becomes the original
+    of the others.
+    """
+    row = db.execute(
+        select(NoteSignature.owner_id, NoteSignature.signature).where(NoteSignature.note_id == note_id)
+    ).first()
+    if row is None:
+        return
+    db.execute(delete(NoteLshBucket).where(
+        NoteLshBucket.owner_id == row.owner_id,
+        NoteLshBucket.bucket.in_(minhash.band_keys(minhash.from_blob(row.signature))),
+        NoteLshBucket.note_id == note_id,
+    ))
+    db.execute(delete(NoteSignature).where(NoteSignature.note_id == note_id))
+
+    copies = db.execute(
+        select(NoteSignature.note_id)
+        .where(NoteSignature.owner_id == row.owner_id, NoteSignature.duplicate_of == note_id)
+        .order_by(NoteSignature.note_id)
+    ).scalars().all()
+    if copies:
+        db.execute(update(NoteSignature).where(NoteSignature.note_id == copies[0]).values(duplicate_of=None, similarity=None))
+        db.execute(update(NoteSignature).where(NoteSignature.note_id.in_(copies[1:])).values(duplicate_of=copies[0]))
+
+def index_contents(db: Session, notes: Iterable[Tuple[int, int, str]]):
+    """
+    Sign and index notes in order, flagging the ones that duplicate earlier
+    notes (without committing).
+
+    Args:
+        notes (Iterable[Tuple[int, int, str]]): Note ID, owner ID and content
+            of each note
+    """
+    for note_id, owner_id, content in notes:
+        sig = minhash.signature(content)
+        if sig is not None:
+            index_note(db, note_id, owner_id, sig, find_duplicate(db, owner_id, sig))
+
+def index_missing(db: Session, owner_id: Optional[int] = None) -> int:
+    """
+    Index notes without a signature in ID order, flagging the ones that
+    duplicate earlier notes.
+
+    Returns:
+        int: Number of notes indexed
+    """
+    statement = (
+        select(Note.id)
+        .outerjoin(NoteSignature, NoteSignature.note_id == Note.id)
+        .where(NoteSignature.note_id.is_(None), Note.owner_id.is_not(None))
+        .order_by(Note.id)
+    )
+    if owner_id is not None:
+        statement = statement.where(Note.owner_id == owner_id)
+    note_ids = db.execute(statement).scalars().all()
+    for start in range(0, len(note_ids), INDEX_BATCH_SIZE):
+        rows = db.execute(
+            select(Note.id, Note.owner_id, Note.content)
+            .where(Note.id.in_(note_ids[start:start + INDEX_BATCH_SIZE]))
+            .order_by(Note.id)
+        ).all()
+        index_contents(db, rows)
+        db.commit()
+    return len(note_ids)
+
+def get_duplicate_report(db: Session, owner_id: int, limit: int = 100) -> dict:
+    """
+    A user's near-duplicate notes grouped under the note they copy.
+
+    Only reads: notes that were never checked, such as notes from before
+    duplicate detection, are left out until index_missing has run.
+
+    Returns:
+        dict: Number of duplicate notes, and up to `limit` groups with the
+        most duplicates first, each with its original note and duplicates
+    """
+    rows = db.execute(
+        select(NoteSignature.duplicate_of, NoteSignature.similarity, Note.id, Note.title, Note.created_at)
+        .join(Note, Note.id == NoteSignature.note_id)
+        .where(NoteSignature.owner_id == owner_id, NoteSignature.duplicate_of.is_not(None))
+        .order_by(NoteSignature.duplicate_of, Note.id)
+    ).all()
+    groups: Dict[int, List[dict]] = {}
+    for row in rows:
+        groups.setdefault(row.duplicate_of, []).append(
+            {"id": row.id, "title": row.title, "created_at": row.created_at, "similarity": round(row.similarity, 4)}
+        )
+    originals = {
+        row.id: {"id": row.id, "title": row.title, "created_at": row.created_at}
+        for row in db.execute(
+            select(Note.id, Note.title, Note.created_at).where(Note.id.in_(list(groups)), Note.owner_id == owner_id)
+        )
+    }
+    # Originals deleted outside delete_note leave their duplicates out
+    ordered = sorted((original_id for original_id in groups if original_id in originals),
+                     key=lambda original_id: (-len(groups[original_id]), original_id))
+    return {
+        "duplicate_notes": sum(len(groups[original_id]) for original_id in ordered),
+        "groups": [{"original": originals[original_id], "duplicates": groups[original_id]} for original_id in ordered[:limit]],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage near-duplicate detection for notes")
+    parser.add_argument("command", choices=["index"], help="sign and flag every note without a signature")
+    args = parser.parse_args()
+
+    from app.database.database import SessionLocal, engine
+    from app.database.migrations import prepare_database
+    logging.basicConfig(level=logging.INFO)
+    prepare_database(engine)
+    db = SessionLocal()
+    try:
+        logger.info(f"Indexed {index_missing(db)} notes for duplicate detection")
+    finally:
+        db.close()
@@ -0,0 +1,160 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine, make_url
+
+from app.database.database import Base, ensure_sqlite_directory, is_file_sqlite
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one process at a time
+    fcntl = None
+from app.database.search import ensure_search_index
+from app.database.versions import backfill_change_seq, drop_live_tombstones, install_version_triggers
+
+logger = logging.getLogger(__name__)
+
+# Lock file serializing schema preparation across processes; by default it
+# sits next to an on-disk SQLite database, or in the temp directory
+MIGRATION_LOCK_FILE = os.getenv("MIGRATION_LOCK_FILE", "")
+
+# Database URLs already prepared by this process (and inherited by forks)
+_prepared_urls = set()
+
+# Columns added to existing tables after their first release, as
+# (table, column, DDL type). SQLite can only add them one at a time.
+ADDED_COLUMNS = [
+    ("notes", "owner_id", "INTEGER REFERENCES users(id)"),
+    ("notes", "version", "INTEGER NOT NULL DEFAULT 1"),
+    ("notes", "change_seq", "INTEGER"),
+    ("notes", "polarity", "FLOAT"),
+    ("notes", "subjectivity", "FLOAT"),
+    ("sentiment_cache", "polarity", "FLOAT"),
+    ("sentiment_cache", "subjectivity", "FLOAT"),
+]
+
+def add_missing_columns(conn: Connection):
+    """
+    Add ADDED_COLUMNS that an existing table does not have yet.
+
+    Tables that do not exist are skipped; create_all creates them complete.
+    """
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in tables:
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            logger.info(f"Added column {table}.{column}")
+
+def upgrade(engine: Engine):
+    """
+    Bring an existing database up to date with the models.
+
+    Base.metadata.create_all only creates missing tables, so columns and
+    indexes added to existing tables and the full-text search index are
+    created here, along with the triggers that maintain them. Every step is
+    idempotent.
+    """
+    with engine.begin() as conn:
+        add_missing_columns(conn)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        ensure_search_index(conn)
+        install_version_triggers(None, conn)
+        backfill_change_seq(conn)
+        drop_live_tombstones(conn)
+    logger.info("Database schema is up to date")
+
+def migration_lock_path(url: str) -> str:
+    """
+    Path of the lock file guarding schema preparation of `url`.
+    """
+    if MIGRATION_LOCK_FILE:
+        return MIGRATION_LOCK_FILE
+    if is_file_sqlite(url):
+        return os.path.abspath(make_url(url).database) + ".migrate.lock"
+    return os.path.join(tempfile.gettempdir(), "notes-migrate.lock")
+
+@contextmanager
+def migration_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on `path` for the duration of the block.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def prepare_database(engine: Engine):
+    """
+    Create missing tables and run upgrade, once per process and database.
+
+    Several server processes starting together would otherwise race on
+    CREATE TABLE and ALTER TABLE, so the work runs under a file lock; the
+    processes that wait find the schema already up to date. Forked workers
+    inherit the prepared state and skip it entirely.
+    """
+    url = engine.url.render_as_string(hide_password=False)
+    if url in _prepared_urls:
+        return
+    # Register every model on Base.metadata
+    from app.models import job, note, note_chunk, note_embedding, note_lsh_bucket, note_signature, note_tag, note_tombstone, note_version, sentiment_cache, tag, user  # noqa: F401
+
+    ensure_sqlite_directory(url)
+    start = time.perf_counter()
+    with migration_lock(migration_lock_path(url)):
+        Base.metadata.create_all(bind=engine)
+        upgrade(engine)
+    _prepared_urls.add(url)
+    logger.info(f"Database prepared in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def assign_unowned_notes(engine: Engine, username: str) -> int:
+    """
+    Give every note without an owner to the named user.
+
+    Notes created before ownership existed have no owner_id and are not
+    visible to anyone until they are assigned.
+
+    Returns:
+        int: Number of notes assigned
+    """
+    with engine.begin() as conn:
+        owner_id = conn.execute(
+            text("SELECT id FROM users WHERE username = :username"), {"username": username}
+        ).scalar_one_or_none()
+        if owner_id is None:
+            raise ValueError(f"User {username} not found")
+        result = conn.execute(
+            text("UPDATE notes SET owner_id = :owner_id WHERE owner_id IS NULL"), {"owner_id": owner_id}
+        )
+    logger.info(f"Assigned {result.rowcount} unowned notes to {username}")
+    return result.rowcount
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the notes database schema")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("upgrade", help="bring the database up to date with the models")
+    assign = subparsers.add_parser("assign-notes", help="give notes without an owner to a user")
+    assign.add_argument("username")
+    args = parser.parse_args()
+
+    from app.database.database import engine
+    logging.basicConfig(level=logging.INFO)
+    prepare_database(engine)
+    if args.command == "assign-notes":
+        assign_unowned_notes(engine, args.username)
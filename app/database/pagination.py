@@ -0,0 +1,86 @@
+import base64
+import json
+from typing import Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, String, desc, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """
+    Encode a (created_at, id) position as an opaque URL-safe cursor.
+    """
+    payload = json.dumps([created_at, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(created_at, str) or not isinstance(row_id, int):
+            raise ValueError("unexpected cursor payload")
+        return created_at, row_id
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_statement(statement: Select, model, limit: int, cursor: str = None) -> Select:
+    """
+    Restrict `statement` to one page, newest first, after the position in `cursor`.
+
+    Rows are ordered by (created_at, id) descending so the composite index
+    on those columns serves both the seek and the sort; every page costs the
+    same regardless of depth. created_at is compared as the raw stored
+    string so the cursor matches SQLite's own ordering exactly. One extra row
+    is fetched to detect whether another page follows.
+    """
+    created_at = type_coerce(model.created_at, String)
+    statement = statement.add_columns(created_at.label("cursor_created_at"))
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(created_at, model.id) < tuple_(last_created_at, last_id))
+    return statement.order_by(desc(model.created_at), desc(model.id)).limit(limit + 1)
+
+def keyset_result(rows, limit: int):
+    """
+    Split rows fetched with keyset_statement into the page and the next cursor.
+
+    Returns:
+        Tuple[list, Optional[str]]: The page of model instances and the
+        cursor of the next page, or None on the last page
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_created_at = rows[-1]
+        next_cursor = encode_cursor(last_created_at, last.id)
+    return [row[0] for row in rows], next_cursor
+
+def keyset_rows_result(rows, limit: int):
+    """
+    Like keyset_result, for statements that select columns instead of a model.
+
+    Each row must include the model's `id` column.
+
+    Returns:
+        Tuple[list, Optional[str]]: The page of rows (still carrying the
+        cursor_created_at column) and the cursor of the next page
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.cursor_created_at, last.id)
+    return rows, next_cursor
+
+def keyset_page(db: Session, statement: Select, model, limit: int, cursor: str = None):
+    """
+    Fetch one keyset page of `statement` (see keyset_statement).
+    """
+    rows = db.execute(keyset_statement(statement, model, limit, cursor)).all()
+    return keyset_result(rows, limit)
@@ -0,0 +1,158 @@
+"""
+Full-text search over notes backed by an SQLite FTS5 index.
+
+notes_fts is an external-content FTS5 table that shadows notes.title and
+notes.content. Triggers on the notes table keep it in sync for every write
+path (ORM, bulk and raw SQL), so the index never has to be maintained by
+hand. Run `python -m app.database.search rebuild` to rebuild it for an
+existing database.
+"""
+import argparse
+import logging
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import DateTime, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of title matches over content matches in BM25 ranking
+TITLE_WEIGHT = 5.0
+CONTENT_WEIGHT = 1.0
+
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        title, content, content='notes', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, content ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+_TERM = re.compile(r"\w+\*?", re.UNICODE)
+
+def install_search_index(target, connection: Connection, **kw):
+    """
+    Create the FTS5 table and its sync triggers (SQLite only).
+
+    Registered as an after_create listener on the notes table, so it runs
+    whenever Base.metadata.create_all creates that table.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SEARCH_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+
+def ensure_search_index(connection: Connection):
+    """
+    Create and populate the search index on a database that predates it.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'"
+    ).first()
+    install_search_index(None, connection)
+    if not exists:
+        logger.info("Building full-text search index for existing notes")
+        connection.exec_driver_sql("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+
+def rebuild_search_index(engine: Engine):
+    """
+    Rebuild the search index from the notes table.
+    """
+    with engine.begin() as conn:
+        install_search_index(None, conn)
+        conn.exec_driver_sql("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+        conn.exec_driver_sql("INSERT INTO notes_fts(notes_fts) VALUES ('optimize')")
+    logger.info("Full-text search index rebuilt")
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query that matches all terms.
+
+    Each term is quoted so user input can never be parsed as FTS5 syntax; a
+    trailing * on a term is kept as a prefix match.
+    """
+    terms = []
+    for term in _TERM.findall(query):
+        if term.endswith("*"):
+            terms.append(f'"{term[:-1]}"*')
+        else:
+            terms.append(f'"{term}"')
+    return " ".join(terms) if terms else None
+
+def format_timestamp(value: datetime) -> str:
+    """
+    Format a datetime the way SQLite's CURRENT_TIMESTAMP stores created_at (UTC).
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+def search_notes(db: Session, query: str, owner_id: int, sentiment: Optional[str] = None,
+                 created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                 limit: int = 20, offset: int = 0) -> List[dict]:
+    """
+    Search a user's note titles and contents, best BM25 match first.
+
+    Returns:
+        List[dict]: id, title, sentiment, created_at, a highlighted snippet
+        and the BM25 rank (lower is better) of each matching note
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    filters = []
+    params = {"match": match, "owner_id": owner_id, "limit": limit, "offset": offset}
+    if sentiment is not None:
+        filters.append("AND notes.sentiment = :sentiment")
+        params["sentiment"] = sentiment
+    if created_after is not None:
+        filters.append("AND notes.created_at >= :created_after")
+        params["created_after"] = format_timestamp(created_after)
+    if created_before is not None:
+        filters.append("AND notes.created_at < :created_before")
+        params["created_before"] = format_timestamp(created_before)
+
+    statement = text(f"""
+        SELECT notes.id, notes.title, notes.sentiment, notes.created_at,
+               snippet(notes_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet,
+               bm25(notes_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS rank
+        FROM notes_fts
+        JOIN notes ON notes.id = notes_fts.rowid
+        WHERE notes_fts MATCH :match
+        AND notes.owner_id = :owner_id
+        {" ".join(filters)}
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """).columns(created_at=DateTime(timezone=True))
+    return [dict(row._mapping) for row in db.execute(statement, params)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the notes full-text search index")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild the index from the notes table")
+    args = parser.parse_args()
+
+    from app.database.database import engine
+    logging.basicConfig(level=logging.INFO)
+    rebuild_search_index(engine)
@@ -0,0 +1,208 @@
+"""
+Semantic similarity over notes: related notes and free-text semantic search.
+
+Every note's embedding (see app.ml.embeddings) is stored in note_embeddings
+when the note is created, singly or in bulk. Queries never write: notes
+without a usable stored vector, such as notes from before this existed or
+from before EMBEDDING_DIMENSIONS changed, are left out of the index until
+`python -m app.database.similarity embed` stores their vectors.
+
+Each server process keeps an in-memory index per owner, loaded on first use.
+On every query it compares the index against the owner's change sequence
+(see app.database.versions) and catches up from notes.change_seq and
+note_tombstones. Writes made through other processes are therefore picked
+up without rescanning the owner's notes.
+"""
+import argparse
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.ml.embeddings import (
+    EMBEDDING_DIMENSIONS, SimilarityIndex, embed_note, embed_text, from_blobs, index_cache, to_blob,
+)
+from app.models.note import Note
+from app.models.note_embedding import NoteEmbedding
+from app.models.note_tombstone import NoteTombstone
+from app.models.note_version import NoteOwnerVersion
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BATCH_SIZE = 1000
+
+def _owner_seq(db: Session, owner_id: int) -> int:
+    seq = db.execute(select(NoteOwnerVersion.version).where(NoteOwnerVersion.owner_id == owner_id)).scalar()
+    return seq or 0
+
+def embed_missing(db: Session, note_ids: Sequence[int]) -> Dict[int, np.ndarray]:
+    """
+    Embed notes that have no usable stored vector, store their vectors and commit.
+
+    Vectors of another dimension (after EMBEDDING_DIMENSIONS changed) are
+    replaced.
+    """
+    vectors = {}
+    for start in range(0, len(note_ids), EMBEDDING_BATCH_SIZE):
+        batch = note_ids[start:start + EMBEDDING_BATCH_SIZE]
+        rows = db.execute(select(Note.id, Note.title, Note.content).where(Note.id.in_(batch))).all()
+        embedded = {row.id: embed_note(row.title, row.content) for row in rows}
+        if embedded:
+            db.execute(
+                insert(NoteEmbedding).prefix_with("OR REPLACE"),
+                [{"note_id": note_id, "vector": to_blob(vector)} for note_id, vector in embedded.items()],
+            )
+        vectors.update(embedded)
+    db.commit()
+    return vectors
+
+def load_vectors(db: Session, owner_id: int, since: Optional[int] = None) -> Tuple[List[int], np.ndarray]:
+    """
+    Read the stored vectors of a user's notes, or of those changed after
+    `since`; notes without a usable vector are skipped.
+    """
+    statement = (
+        select(Note.id, NoteEmbedding.vector)
+        .outerjoin(NoteEmbedding, NoteEmbedding.note_id == Note.id)
+        .where(Note.owner_id == owner_id)
+    )
+    if since is not None:
+        statement = statement.where(Note.change_seq > since)
+
+    blob_size = EMBEDDING_DIMENSIONS * 4
+    ids, blobs, missing = [], [], 0
+    for note_id, blob in db.execute(statement):
+        if blob is not None and len(blob) == blob_size:
+            ids.append(note_id)
+            blobs.append(blob)
+        else:
+            missing += 1
+    if missing:
+        logger.warning(f"{missing} notes of user {owner_id} have no stored embedding; "
+                       f"run `python -m app.database.similarity embed` to index them")
+    return ids, from_blobs(blobs)
+
+def _catch_up(db: Session, owner_id: int, index: SimilarityIndex, seq: int):
+    # Deletions first: a new note may reuse a deleted note's ID
+    deleted = db.execute(
+        select(NoteTombstone.note_id)
+        .where(NoteTombstone.owner_id == owner_id, NoteTombstone.change_seq > index.seq)
+    ).scalars().all()
+    index.remove(deleted)
+    # Changes also include sentiment updates; content never changes, so
+    # only notes that are not indexed yet need their vectors
+    ids, matrix = load_vectors(db, owner_id, since=index.seq)
+    new = [i for i, note_id in enumerate(ids) if note_id not in index]
+    index.add([ids[i] for i in new], matrix[new])
+    index.seq = seq
+
+def get_owner_index(db: Session, owner_id: int) -> SimilarityIndex:
+    """
+    A user's similarity index, loaded or brought up to date as needed.
+    """
+    seq = _owner_seq(db, owner_id)
+    index = index_cache.get(owner_id)
+    if index is not None and index.seq == seq:
+        return index
+
+    with index_cache.build_lock(owner_id):
+        index = index_cache.get(owner_id)
+        if index is None:
+            index = SimilarityIndex(seq=seq)
+            index.add(*load_vectors(db, owner_id))
+            index_cache.put(owner_id, index)
+            logger.info(f"Loaded similarity index of user {owner_id} with {len(index)} notes")
+        else:
+            with index.lock:
+                if index.seq < seq:
+                    _catch_up(db, owner_id, index, seq)
+    return index
+
+def note_added(owner_id: int, note_id: int, vector: np.ndarray, change_seq: int):
+    """
+    Add a just-created note to its owner's index, if loaded and current.
+
+    Otherwise the next query catches up from the change sequence.
+    """
+    index = index_cache.get(owner_id)
+    if index is None:
+        return
+    with index.lock:
+        if index.seq == change_seq - 1:
+            index.add([note_id], vector.reshape(1, -1))
+            index.seq = change_seq
+
+def _describe(db: Session, hits: List[Tuple[int, float]]) -> List[dict]:
+    if not hits:
+        return []
+    rows = db.execute(
+        select(Note.id, Note.title, Note.sentiment, Note.created_at).where(Note.id.in_([note_id for note_id, _ in hits]))
+    ).all()
+    notes = {row.id: row for row in rows}
+    return [
+        {"id": note_id, "title": notes[note_id].title, "sentiment": notes[note_id].sentiment,
+         "created_at": notes[note_id].created_at, "score": round(score, 4)}
+        for note_id, score in hits if note_id in notes
+    ]
+
+def similar_notes(db: Session, note_id: int, owner_id: int, limit: int = 10) -> Optional[List[dict]]:
+    """
+    A user's notes most similar to one of their notes, most similar first.
+
+    Returns:
+        Optional[List[dict]]: id, title, sentiment, created_at and cosine
+        similarity score of each note, or None if the note does not exist
+        or belongs to someone else
+    """
+    note = db.execute(
+        select(Note.title, Note.content).where(Note.id == note_id, Note.owner_id == owner_id)
+    ).first()
+    if note is None:
+        return None
+    index = get_owner_index(db, owner_id)
+    vector = index.vector(note_id)
+    if vector is None:
+        vector = embed_note(note.title, note.content)
+    return _describe(db, index.query(vector, limit, exclude=[note_id]))
+
+def semantic_search(db: Session, query: str, owner_id: int, limit: int = 10) -> List[dict]:
+    """
+    A user's notes most similar to free text, most similar first.
+
+    Unlike full-text search, notes match without containing every word.
+    """
+    vector = embed_text(query)
+    if not vector.any():
+        return []
+    return _describe(db, get_owner_index(db, owner_id).query(vector, limit))
+
+def embed_all(db: Session) -> int:
+    """
+    Embed every note that has no stored vector of the current dimension.
+
+    Returns:
+        int: Number of notes embedded
+    """
+    missing = db.execute(
+        select(Note.id)
+        .outerjoin(NoteEmbedding, NoteEmbedding.note_id == Note.id)
+        .where(or_(NoteEmbedding.vector.is_(None), func.length(NoteEmbedding.vector) != EMBEDDING_DIMENSIONS * 4))
+    ).scalars().all()
+    return len(embed_missing(db, missing))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the note embeddings behind similarity search")
+    parser.add_argument("command", choices=["embed"], help="embed every note without a stored vector")
+    args = parser.parse_args()
+
+    from app.database.database import SessionLocal, engine
+    from app.database.migrations import prepare_database
+    logging.basicConfig(level=logging.INFO)
+    prepare_database(engine)
+    db = SessionLocal()
+    try:
+        logger.info(f"Embedded {embed_all(db)} notes")
+    finally:
+        db.close()
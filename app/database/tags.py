@@ -0,0 +1,134 @@
+"""
+Note tags: keywords extracted during sentiment analysis (see app.ml.keywords).
+
+Tag names are stored once in `tags`. `note_tags` links notes to them and
+is keyed by (owner_id, tag_id, note_id), so listing a user's notes with a
+tag and counting a user's tags are both range scans of its primary key.
+
+Notes are tagged when they are analyzed. Notes analyzed before tagging
+existed get their tags on their next analysis, or all at once with
+`python -m app.database.tags extract`.
+"""
+import argparse
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.versions import bump_owner_versions
+from app.ml.engines import get_engine
+from app.ml.keywords import normalize_tag
+from app.ml.sentiment import tag_text
+from app.models.note import Note
+from app.models.note_tag import NoteTag
+from app.models.tag import Tag
+
+logger = logging.getLogger(__name__)
+
+TAG_BATCH_SIZE = 500
+
+def set_note_tags(db: Session, note_tags: Dict[int, List[str]]):
+    """
+    Replace the tags of the given notes (without committing).
+
+    Their owners' notes versions go up, so tag-filtered listings are not
+    answered from stale ETags.
+
+    Args:
+        note_tags (Dict[int, List[str]]): Tags per note ID; an empty list
+            removes a note's tags
+    """
+    if not note_tags:
+        return
+    names = {name for names in note_tags.values() for name in names}
+    tag_ids = {}
+    if names:
+        # Core inserts on the tables skip the ORM bulk-insert machinery
+        db.execute(insert(Tag.__table__).prefix_with("OR IGNORE"), [{"name": name} for name in names])
+        tag_ids = dict(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    owners = dict(db.execute(select(Note.id, Note.owner_id).where(Note.id.in_(list(note_tags)))).all())
+    db.execute(delete(NoteTag).where(NoteTag.note_id.in_(list(note_tags))))
+    rows = [
+        {"owner_id": owners[note_id], "tag_id": tag_ids[name], "note_id": note_id}
+        for note_id, names in note_tags.items() if owners.get(note_id) is not None
+        for name in dict.fromkeys(names)
+    ]
+    if rows:
+        db.execute(insert(NoteTag.__table__), rows)
+    # Listings filtered by tag are cached by the owner's notes version
+    bump_owner_versions(db, owners.values())
+
+def get_note_tags(db: Session, note_id: int) -> List[str]:
+    """
+    A note's tags in alphabetical order.
+    """
+    return db.execute(
+        select(Tag.name).join(NoteTag, NoteTag.tag_id == Tag.id).where(NoteTag.note_id == note_id).order_by(Tag.name)
+    ).scalars().all()
+
+def tagged_note_ids(owner_id: int, tag: str):
+    """
+    Subquery of the IDs of a user's notes with a tag, for Note.id.in_().
+    """
+    return (
+        select(NoteTag.note_id)
+        .join(Tag, Tag.id == NoteTag.tag_id)
+        .where(NoteTag.owner_id == owner_id, Tag.name == normalize_tag(tag))
+    )
+
+def get_tag_counts(db: Session, owner_id: int, limit: int = 100) -> List[dict]:
+    """
+    A user's tags with the number of notes carrying each, most used first.
+    """
+    count = func.count().label("count")
+    rows = db.execute(
+        select(Tag.name, count)
+        .select_from(NoteTag)
+        .join(Tag, Tag.id == NoteTag.tag_id)
+        .where(NoteTag.owner_id == owner_id)
+        .group_by(NoteTag.tag_id)
+        .order_by(count.desc(), Tag.name)
+        .limit(limit)
+    ).all()
+    return [{"tag": name, "count": n} for name, n in rows]
+
+def extract_missing(db: Session, owner_id: Optional[int] = None, engine: Optional[str] = None) -> int:
+    """
+    Tag analyzed notes that have no tags, tokenizing them with `engine`.
+
+    Returns:
+        int: Number of notes that got tags
+    """
+    sentiment_engine = get_engine(engine)
+    statement = (
+        select(Note.id)
+        .where(Note.polarity.is_not(None), Note.owner_id.is_not(None), ~Note.id.in_(select(NoteTag.note_id)))
+        .order_by(Note.id)
+    )
+    if owner_id is not None:
+        statement = statement.where(Note.owner_id == owner_id)
+    note_ids = db.execute(statement).scalars().all()
+    tagged = 0
+    for start in range(0, len(note_ids), TAG_BATCH_SIZE):
+        rows = db.execute(select(Note.id, Note.content).where(Note.id.in_(note_ids[start:start + TAG_BATCH_SIZE]))).all()
+        note_tags = {note_id: tag_text(content, sentiment_engine) for note_id, content in rows}
+        set_note_tags(db, note_tags)
+        db.commit()
+        tagged += sum(1 for names in note_tags.values() if names)
+    return tagged
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage note tags")
+    parser.add_argument("command", choices=["extract"], help="tag every analyzed note that has no tags")
+    args = parser.parse_args()
+
+    from app.database.database import SessionLocal, engine
+    from app.database.migrations import prepare_database
+    logging.basicConfig(level=logging.INFO)
+    prepare_database(engine)
+    db = SessionLocal()
+    try:
+        logger.info(f"Tagged {extract_missing(db)} notes")
+    finally:
+        db.close()
@@ -0,0 +1,137 @@
+"""
+Change versions for HTTP caching and incremental sync of notes.
+
+note_owner_versions holds one counter per owner that goes up whenever any
+of that owner's notes is created, updated, deleted or moved to another
+owner. Each change stamps the affected note with the new counter value as
+its change_seq (or writes a note_tombstones row for deletions), so the
+counter doubles as a per-owner change sequence. Every note also carries a
+`version` that goes up on each update.
+
+Like the search index they are maintained by triggers, so every write path
+(ORM, bulk and raw SQL) keeps them current, and ETags and change feeds can
+be computed from them without loading or serializing the notes themselves.
+"""
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+_BUMP_OWNER = """
+    INSERT INTO note_owner_versions (owner_id, version, updated_at) VALUES ({owner}, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (owner_id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;
+"""
+
+_OWNER_SEQ = "(SELECT version FROM note_owner_versions WHERE owner_id = {owner})"
+
+_TOMBSTONE = f"""
+    INSERT OR REPLACE INTO note_tombstones (owner_id, note_id, change_seq, deleted_at)
+    VALUES (old.owner_id, old.id, {_OWNER_SEQ.format(owner="old.owner_id")}, CURRENT_TIMESTAMP);
+"""
+
+# SQLite reuses the IDs of deleted notes; a note that is back under an ID
+# must not also be reported as deleted
+_UNTOMBSTONE = "DELETE FROM note_tombstones WHERE owner_id = new.owner_id AND note_id = new.id;"
+
+# Triggers from earlier releases that have since been replaced or merged
+OBSOLETE_TRIGGERS = ["notes_owner_version_update"]
+
+VERSION_TRIGGERS = {
+    # Only updates that change neither version nor change_seq are user
+    # writes; the nested UPDATE sets both, so it never re-triggers this.
+    # Unowned notes are invisible to every user and are not versioned
+    "notes_version_bump": f"""
+        AFTER UPDATE ON notes
+        WHEN new.version = old.version AND new.change_seq IS old.change_seq
+        AND new.owner_id IS NOT NULL BEGIN
+            {_BUMP_OWNER.format(owner="new.owner_id")}
+            UPDATE notes SET version = old.version + 1, change_seq = {_OWNER_SEQ.format(owner="new.owner_id")}
+            WHERE id = new.id;
+        END
+    """,
+    "notes_owner_version_insert": f"""
+        AFTER INSERT ON notes
+        WHEN new.owner_id IS NOT NULL BEGIN
+            {_BUMP_OWNER.format(owner="new.owner_id")}
+            UPDATE notes SET change_seq = {_OWNER_SEQ.format(owner="new.owner_id")} WHERE id = new.id;
+            {_UNTOMBSTONE}
+        END
+    """,
+    # The previous owner sees a moved note as deleted; an owner it moves
+    # back to sees it as changed
+    "notes_owner_version_reassign": f"""
+        AFTER UPDATE OF owner_id ON notes
+        WHEN old.owner_id IS NOT NULL AND old.owner_id IS NOT new.owner_id BEGIN
+            {_BUMP_OWNER.format(owner="old.owner_id")}
+            {_TOMBSTONE}
+            {_UNTOMBSTONE}
+        END
+    """,
+    "notes_owner_version_delete": f"""
+        AFTER DELETE ON notes
+        WHEN old.owner_id IS NOT NULL BEGIN
+            {_BUMP_OWNER.format(owner="old.owner_id")}
+            {_TOMBSTONE}
+        END
+    """,
+}
+
+def install_version_triggers(target, connection: Connection, **kw):
+    """
+    (Re)create the triggers that maintain note versions and change sequences (SQLite only).
+
+    Registered as an after_create listener on the notes table; also run by
+    migrations.upgrade, which replaces triggers from earlier releases.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for name in OBSOLETE_TRIGGERS + list(VERSION_TRIGGERS):
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    for name, body in VERSION_TRIGGERS.items():
+        connection.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+
+def backfill_change_seq(connection: Connection):
+    """
+    Give owned notes that predate change sequences a change_seq.
+
+    Note IDs are unique, so they serve as the initial sequence values; each
+    owner's counter is then raised past them so later changes sort after.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    result = connection.exec_driver_sql(
+        "UPDATE notes SET change_seq = id WHERE change_seq IS NULL AND owner_id IS NOT NULL"
+    )
+    if result.rowcount:
+        connection.exec_driver_sql("""
+            INSERT INTO note_owner_versions (owner_id, version, updated_at)
+            SELECT owner_id, max(change_seq), CURRENT_TIMESTAMP FROM notes
+            WHERE owner_id IS NOT NULL GROUP BY owner_id
+            ON CONFLICT (owner_id) DO UPDATE SET version = max(version, excluded.version)
+        """)
+
+def drop_live_tombstones(connection: Connection):
+    """
+    Delete tombstones of notes that are live again under the same owner and
+    ID, which triggers from earlier releases left behind.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    connection.exec_driver_sql("""
+        DELETE FROM note_tombstones WHERE EXISTS (
+            SELECT 1 FROM notes
+            WHERE notes.id = note_tombstones.note_id AND notes.owner_id = note_tombstones.owner_id
+        )
+    """)
+
+def bump_owner_versions(db: Session, owner_ids: Iterable[int]):
+    """
+    Advance the version of each owner's notes (without committing).
+
+    For changes that show in an owner's listings without updating a notes
+    row, such as new tags; updates of notes advance it through the triggers.
+    """
+    params = [{"owner_id": owner_id} for owner_id in set(owner_ids) if owner_id is not None]
+    if params:
+        db.execute(text(_BUMP_OWNER.format(owner=":owner_id")), params)
@@ -1,14 +1,20 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import logging
 import sys
-import os
+import threading
 
-# Ensure data directory exists
-os.makedirs("./data", exist_ok=True)
-
-from app.api import notes, users
-from app.database.database import engine, Base
+from app.api import notes, users, jobs, sentiment, tags
+from app.database.database import engine, DATABASE_MODE
+from app.database import migrations
+from app.ml.worker import worker_pool
+from app.ml.engines import SENTIMENT_WARMUP, SENTIMENT_WARMUP_ENGINES, engine_status, warm_up
+from app.api.hashing import password_hasher
+from app.api.auth import UserSnapshot, get_current_active_user
+from app.api.events import event_broker
+from app.api.metrics import CONTENT_TYPE, METRICS_ENABLED, MetricsMiddleware, instrument_engine, render_metrics
 
 # Configure logging
 logging.basicConfig(
@@ -20,14 +26,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and bring existing databases up to date; a no-op
+# in workers forked by app.server, which prepared the database beforehand
+migrations.prepare_database(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load sentiment models in the background so the first analysis doesn't
+    # pay for it; GET /ready reports when they are loaded
+    if SENTIMENT_WARMUP:
+        threading.Thread(target=warm_up, name="sentiment-warmup", daemon=True).start()
+    # Start draining the analysis job queue in the background
+    worker_pool.start()
+    yield
+    worker_pool.stop()
+    password_hasher.shutdown()
+    if DATABASE_MODE == "async":
+        from app.database.async_database import async_engine
+        await async_engine.dispose()
 
 # Create FastAPI app
 app = FastAPI(
     title="AI-Powered Notes API",
     description="A FastAPI application for creating and analyzing notes with sentiment analysis",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -37,16 +60,52 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "X-Analysis-Job-Id", "X-Duplicate-Of", "X-Duplicate-Similarity", "ETag", "Last-Modified"],  # Let the frontend read pagination, job, duplicate and cache headers
 )
 
 # Log CORS configuration
 logger.info("CORS middleware configured with allow_origins=['*']")
 
+# Time requests and database queries for GET /metrics; added last so it is
+# the outermost middleware and sees the full latency
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    if DATABASE_MODE == "async":
+        from app.database.async_database import async_engine
+        instrument_engine(async_engine.sync_engine)
+    logger.info("Request metrics enabled at /metrics")
+
+def replace_routes(router, replacements):
+    """
+    Drop the routes of `router` that `replacements` serves (same path and methods).
+    """
+    replaced = {(route.path, frozenset(route.methods)) for route in replacements.routes}
+    router.routes = [
+        route for route in router.routes
+        if (route.path, frozenset(getattr(route, "methods", None) or ())) not in replaced
+    ]
+
 # Include routers
+if DATABASE_MODE == "async":
+    from app.api import notes_async, users_async
+    replace_routes(users.router, users_async.router)
+    replace_routes(notes.router, notes_async.router)
 logger.info("Registering users router")
 app.include_router(users.router)
 logger.info("Registering notes router")
 app.include_router(notes.router)
+if DATABASE_MODE == "async":
+    # Registered after the sync routers so static paths like /notes/search win over /notes/{note_id}
+    logger.info("DATABASE_MODE=async: registering async note and user routes")
+    app.include_router(users_async.router)
+    app.include_router(notes_async.router)
+logger.info("Registering jobs router")
+app.include_router(jobs.router)
+logger.info("Registering sentiment router")
+app.include_router(sentiment.router)
+logger.info("Registering tags router")
+app.include_router(tags.router)
 logger.info("All routers registered successfully")
 
 # Root endpoint
@@ -59,9 +118,51 @@ async def root():
         "endpoints": {
             "notes": "/notes",
             "users": "/users",
-            "analyze": "/notes/{id}/analyze"
+            "analyze": "/notes/{id}/analyze",
+            "jobs": "/jobs",
+            "tags": "/tags",
+            "events": "/events",
+            "ready": "/ready"
         }
     }
 
+@app.get("/ready")
+async def readiness():
+    """
+    Report whether the sentiment models are loaded.
+
+    Returns 503 until the startup warm-up has loaded every engine in
+    SENTIMENT_WARMUP_ENGINES; with warm-up disabled models load on first use
+    and the app is always ready.
+    """
+    engines = engine_status()
+    ready = not SENTIMENT_WARMUP or all(engines.get(name, False) for name in SENTIMENT_WARMUP_ENGINES)
+    return JSONResponse({"ready": ready, "engines": engines}, status_code=200 if ready else 503)
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """
+        Request, database and sentiment metrics in the Prometheus text format.
+        """
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/events")
+async def stream_events(request: Request, current_user: UserSnapshot = Depends(get_current_active_user)):
+    """
+    Push the current user's note and sentiment events as server-sent events.
+
+    Emits note.created, note.deleted, notes.imported and sentiment.completed;
+    a `resync` event means events were dropped for a slow connection and the
+    client should catch up through GET /notes/changes.
+    """
+    subscription = event_broker.subscribe(current_user.id)
+    logger.info(f"Event stream opened for user {current_user.id}")
+    return StreamingResponse(
+        event_broker.stream(subscription, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # Log application startup
 logger.info("Application initialized successfully")
\ No newline at end of file
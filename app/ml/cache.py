@@ -0,0 +1,101 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from app.ml.engines import SentimentScore
+
+# Cache configuration
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "10000"))
+SENTIMENT_CACHE_PERSIST = os.getenv("SENTIMENT_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_content(text: str) -> str:
+    """
+    Normalize text so that equivalent note contents share a cache key.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def content_hash(text: str, engine: Optional[str] = None) -> str:
+    """
+    Hash the normalized text (hex SHA-256).
+
+    Sentiment results are keyed with the engine name mixed in, so engines
+    never serve each other's cached results.
+    """
+    normalized = normalize_content(text)
+    if engine is not None:
+        normalized = f"{engine}\0{normalized}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+class SentimentCache:
+    """
+    Thread-safe, size-bounded LRU cache of sentiment scores keyed by content hash.
+    """
+
+    def __init__(self, max_size: int = SENTIMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persistent_hits = 0
+
+    def get(self, key: str) -> Optional[SentimentScore]:
+        """
+        Return the cached score for a key, or None on a miss.
+        """
+        with self._lock:
+            score = self._entries.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key: str, score: SentimentScore):
+        """
+        Store a result, evicting the least recently used entries when full.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_persistent_hit(self):
+        with self._lock:
+            self.persistent_hits += 1
+
+    def clear(self):
+        """
+        Drop all entries and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.persistent_hits = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "persistent_hits": self.persistent_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+# Process-wide cache shared by the API and the crud layer
+sentiment_cache = SentimentCache()
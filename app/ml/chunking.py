@@ -0,0 +1,162 @@
+"""
+Chunked sentiment analysis for long notes.
+
+Note contents are unbounded, and scoring a multi-megabyte note in one call
+blocks a worker and builds every token of the note in memory at once. Notes
+longer than SENTIMENT_CHUNK_THRESHOLD characters are instead split into
+windows of about SENTIMENT_CHUNK_SIZE characters at paragraph or sentence
+boundaries, scored one window at a time and aggregated into a
+length-weighted polarity. Scoring stops once SENTIMENT_CHUNK_BUDGET seconds
+are spent, and the result is marked partial rather than stalling.
+"""
+import re
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from app.ml.engines import SentimentScore, get_engine
+
+# Chunked analysis configuration
+SENTIMENT_CHUNK_THRESHOLD = int(os.getenv("SENTIMENT_CHUNK_THRESHOLD", "10000"))
+SENTIMENT_CHUNK_SIZE = int(os.getenv("SENTIMENT_CHUNK_SIZE", "2000"))
+SENTIMENT_CHUNK_BUDGET = float(os.getenv("SENTIMENT_CHUNK_BUDGET", "2.0"))
+
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s+")
+_WHITESPACE = re.compile(r"\s+")
+_NON_SPACE = re.compile(r"\S")
+
+class ChunkScore(NamedTuple):
+    index: int
+    start: int
+    end: int
+    polarity: float
+    subjectivity: float
+
+class ChunkedAnalysis(NamedTuple):
+    score: SentimentScore
+    chunks: List[ChunkScore]
+    partial: bool
+
+def has_text_after(text: str, pos: int) -> bool:
+    """
+    Whether anything but whitespace follows offset `pos`, without copying the rest.
+    """
+    return _NON_SPACE.search(text, pos) is not None
+
+def _last_match_end(pattern: re.Pattern, text: str, pos: int, endpos: int) -> int:
+    end = -1
+    for match in pattern.finditer(text, pos, endpos):
+        end = match.end()
+    return end
+
+def iter_chunks(text: str, size: int = SENTIMENT_CHUNK_SIZE) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) offsets of windows of at most `size` characters.
+
+    Windows end at the last paragraph break in their second half, else the
+    last sentence end, else the last whitespace, so sentences are only cut
+    when a single one is longer than half a window. Whitespace-only windows
+    are skipped.
+    """
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            half = start + size // 2
+            cut = text.rfind("\n\n", half, end)
+            if cut < 0:
+                cut = _last_match_end(_SENTENCE_END, text, half, end)
+            if cut < 0:
+                cut = _last_match_end(_WHITESPACE, text, half, end)
+            if cut > start:
+                end = cut
+        if not text[start:end].isspace():
+            yield start, end
+        start = end
+
+def _score_texts(engine: str, texts: List[str]) -> List[Tuple[float, float]]:
+    # Module-level so it can run in worker processes
+    sentiment_engine = get_engine(engine)
+    return [tuple(sentiment_engine.score(text)) for text in texts]
+
+def _iter_chunk_scores(text: str, engine: str, size: int, executor: Optional[Executor], group_size: int,
+                       max_pending: int) -> Iterator[Tuple[int, int, float, float]]:
+    spans = iter_chunks(text, size)
+    if executor is None:
+        sentiment_engine = get_engine(engine)
+        for start, end in spans:
+            polarity, subjectivity = sentiment_engine.score(text[start:end])
+            yield start, end, polarity, subjectivity
+        return
+
+    # Keep a bounded number of chunk groups in flight and yield in order
+    pending = deque()
+    try:
+        while True:
+            while len(pending) < max_pending:
+                group = list(islice(spans, group_size))
+                if not group:
+                    break
+                pending.append((group, executor.submit(_score_texts, engine, [text[start:end] for start, end in group])))
+            if not pending:
+                return
+            group, future = pending.popleft()
+            for (start, end), (polarity, subjectivity) in zip(group, future.result()):
+                yield start, end, polarity, subjectivity
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+def analyze_chunks(text: str, engine: Optional[str] = None, size: int = SENTIMENT_CHUNK_SIZE,
+                   budget: float = SENTIMENT_CHUNK_BUDGET, executor: Optional[Executor] = None,
+                   group_size: int = 8, max_pending: int = 4) -> ChunkedAnalysis:
+    """
+    Score a text window by window and aggregate the windows' scores.
+
+    Polarity and subjectivity are averaged over the windows weighted by
+    their length. Windows without any opinion words (scored 0, 0) are left
+    out of the average, the way the engines ignore neutral words, so long
+    stretches of plain text do not dilute the result.
+
+    Args:
+        text (str): The text to analyze
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
+        size (int): Maximum characters per window
+        budget (float): Seconds after which scoring stops with a partial result
+        executor (Optional[Executor]): Pool used to score groups of windows
+            in parallel; when None windows are scored in the calling thread
+        group_size (int): Windows per executor task
+        max_pending (int): Executor tasks submitted ahead of the one being read
+
+    Returns:
+        ChunkedAnalysis: Aggregate score, per-window scores in text order,
+        and whether the budget ran out before the end of the text
+    """
+    engine = get_engine(engine).name
+    deadline = time.perf_counter() + budget
+    chunks = []
+    weighted_polarity = weighted_subjectivity = weight = 0.0
+    partial = False
+
+    scores = _iter_chunk_scores(text, engine, size, executor, group_size, max_pending)
+    try:
+        for start, end, polarity, subjectivity in scores:
+            chunks.append(ChunkScore(len(chunks), start, end, polarity, subjectivity))
+            if polarity or subjectivity:
+                length = end - start
+                weighted_polarity += polarity * length
+                weighted_subjectivity += subjectivity * length
+                weight += length
+            if time.perf_counter() > deadline and has_text_after(text, end):
+                partial = True
+                break
+    finally:
+        scores.close()
+
+    if not weight:
+        return ChunkedAnalysis(SentimentScore(0.0, 0.0), chunks, partial)
+    return ChunkedAnalysis(SentimentScore(weighted_polarity / weight, weighted_subjectivity / weight), chunks, partial)
@@ -0,0 +1,275 @@
+"""
+Hashed TF-IDF note embeddings and an in-memory top-k similarity index.
+
+Words are hashed into EMBEDDING_DIMENSIONS buckets with a random sign (the
+"hashing trick"), so there is no vocabulary to fit or store and a note's
+vector never changes once computed. Stored vectors carry sublinear term
+frequencies only; inverse document frequencies depend on the whole
+collection and are applied at query time from the per-bucket document
+counts the index keeps up to date, so adding notes never rewrites older
+vectors.
+
+Vectors are float32. At the default 128 dimensions a note takes 512 bytes,
+and a top-k query is one matrix-vector product over the owner's notes.
+"""
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Embedding configuration
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "128"))
+# Notes kept in memory across all owners' indexes before the least recently
+# used owners are dropped (about 0.5 KB each at 128 dimensions)
+EMBEDDING_INDEX_MAX_NOTES = int(os.getenv("EMBEDDING_INDEX_MAX_NOTES", "1000000"))
+
+# Title words count this many times as often as content words
+TITLE_WEIGHT = 2
+# Recompute IDF weights once the number of notes has drifted this much
+REWEIGHT_DRIFT = 0.1
+NORM_CHUNK_ROWS = 65536
+
+STOPWORDS = frozenset("""
+    a about after again all also am an and any are as at be because been before being but by can could did do does
+    doing down during each few for from further had has have having he her here hers him his how i if in into is it
+    its just me more most my no nor not now of off on once only or other our out over own same she should so some
+    such than that the their them then there these they this those through to too under until up very was we were
+    what when where which while who whom why will with would you your
+""".split())
+
+_WORD = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased words of two or more letters, without stopwords.
+    """
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+@lru_cache(maxsize=100000)
+def _bucket(word: str, dimensions: int) -> Tuple[int, float]:
+    # crc32 rather than hash(), which is salted per process
+    h = zlib.crc32(word.encode("utf-8"))
+    return h % dimensions, -1.0 if h & 0x80000000 else 1.0
+
+def embed_tokens(tokens: Iterable[str], dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Unit-length hashed vector of sublinear (1 + log) term frequencies.
+
+    Returns the zero vector when there are no tokens.
+    """
+    buckets, values = [], []
+    for word, count in Counter(tokens).items():
+        index, sign = _bucket(word, dimensions)
+        buckets.append(index)
+        values.append(sign * (1.0 + math.log(count)))
+    # One bincount instead of a numpy scalar update per word
+    vector = np.bincount(buckets, weights=values, minlength=dimensions).astype(np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+def embed_text(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Embed free text, such as a search query.
+    """
+    return embed_tokens(tokenize(text), dimensions)
+
+def embed_note(title: str, content: str, dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Embed a note, counting title words TITLE_WEIGHT times.
+    """
+    return embed_tokens(tokenize(title) * TITLE_WEIGHT + tokenize(content), dimensions)
+
+def to_blob(vector: np.ndarray) -> bytes:
+    """
+    Serialize a vector as little-endian float32.
+    """
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+def from_blobs(blobs: Sequence[bytes], dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Stack serialized vectors into an (n, dimensions) float32 matrix.
+    """
+    return np.frombuffer(b"".join(blobs), dtype="<f4").astype(np.float32).reshape(len(blobs), dimensions)
+
+class SimilarityIndex:
+    """
+    One owner's note vectors, answering top-k queries by IDF-weighted cosine.
+
+    Rows live in a preallocated matrix that doubles when full; removing a
+    note moves the last row into its place. `seq` is the owner's change
+    sequence the index reflects, so callers can tell when it needs to catch
+    up. Safe to share between threads.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS, seq: int = 0):
+        self.dimensions = dimensions
+        self.seq = seq
+        self.lock = threading.RLock()
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        # Number of notes with a non-zero value in each bucket
+        self._df = np.zeros(dimensions, dtype=np.float64)
+        # IDF² weights and the weighted row norms computed with them
+        self._weights: Optional[np.ndarray] = None
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._weighted_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, note_id: int) -> bool:
+        return note_id in self._rows
+
+    def vector(self, note_id: int) -> Optional[np.ndarray]:
+        """
+        A copy of the note's vector, or None if it is not indexed.
+        """
+        with self.lock:
+            row = self._rows.get(note_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def _reserve(self, size: int):
+        capacity = len(self._matrix)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[:self._size] = self._norms[:self._size]
+        self._matrix, self._ids, self._norms = matrix, ids, norms
+
+    def _weighted_norms(self, rows: np.ndarray) -> np.ndarray:
+        return np.sqrt(np.square(rows) @ self._weights).astype(np.float32)
+
+    def add(self, note_ids: Sequence[int], vectors: np.ndarray):
+        """
+        Add or replace the vectors of the given notes.
+        """
+        with self.lock:
+            self.remove([note_id for note_id in note_ids if note_id in self._rows])
+            count = len(note_ids)
+            if count == 0:
+                return
+            start = self._size
+            self._reserve(start + count)
+            self._matrix[start:start + count] = vectors
+            self._ids[start:start + count] = note_ids
+            for offset, note_id in enumerate(note_ids):
+                self._rows[int(note_id)] = start + offset
+            self._size += count
+            self._df += np.count_nonzero(vectors, axis=0)
+            if self._weights is not None:
+                self._norms[start:start + count] = self._weighted_norms(self._matrix[start:start + count])
+
+    def remove(self, note_ids: Iterable[int]):
+        """
+        Drop the given notes; IDs that are not indexed are ignored.
+        """
+        with self.lock:
+            for note_id in note_ids:
+                row = self._rows.pop(int(note_id), None)
+                if row is None:
+                    continue
+                self._df -= self._matrix[row] != 0
+                last = self._size - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = self._ids[last]
+                    self._norms[row] = self._norms[last]
+                    self._rows[int(self._ids[row])] = row
+                self._size = last
+
+    def _reweight(self):
+        # IDF changes with every note added, but recomputing every norm is
+        # O(notes), so it only happens once the collection has drifted
+        if self._weights is not None and abs(self._size - self._weighted_size) <= REWEIGHT_DRIFT * self._weighted_size:
+            return
+        idf = np.log((1.0 + self._size) / (1.0 + self._df)) + 1.0
+        self._weights = np.square(idf).astype(np.float32)
+        for start in range(0, self._size, NORM_CHUNK_ROWS):
+            end = min(start + NORM_CHUNK_ROWS, self._size)
+            self._norms[start:end] = self._weighted_norms(self._matrix[start:end])
+        self._weighted_size = self._size
+
+    def query(self, vector: np.ndarray, k: int = 10, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """
+        The k notes most similar to `vector`, best first.
+
+        Returns:
+            List[Tuple[int, float]]: (note ID, cosine similarity) pairs with
+            a positive similarity
+        """
+        with self.lock:
+            if self._size == 0:
+                return []
+            self._reweight()
+            weighted = (np.asarray(vector, dtype=np.float32) * self._weights).astype(np.float32)
+            query_norm = float(np.sqrt(np.dot(np.square(vector), self._weights)))
+            if query_norm == 0:
+                return []
+            scores = self._matrix[:self._size] @ weighted
+            scores /= np.maximum(self._norms[:self._size], 1e-12) * query_norm
+            for note_id in exclude:
+                row = self._rows.get(note_id)
+                if row is not None:
+                    scores[row] = -np.inf
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[row]), float(scores[row])) for row in top if scores[row] > 0]
+
+class SimilarityIndexCache:
+    """
+    Owners' similarity indexes, dropping the least recently used owners
+    once they hold more than `max_notes` notes in total.
+    """
+
+    def __init__(self, max_notes: int = EMBEDDING_INDEX_MAX_NOTES):
+        self.max_notes = max_notes
+        self._indexes: "OrderedDict[int, SimilarityIndex]" = OrderedDict()
+        self._build_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, owner_id: int) -> Optional[SimilarityIndex]:
+        with self._lock:
+            index = self._indexes.get(owner_id)
+            if index is not None:
+                self._indexes.move_to_end(owner_id)
+            return index
+
+    def put(self, owner_id: int, index: SimilarityIndex):
+        with self._lock:
+            self._indexes[owner_id] = index
+            self._indexes.move_to_end(owner_id)
+            total = sum(len(cached) for cached in self._indexes.values())
+            while total > self.max_notes and len(self._indexes) > 1:
+                _, evicted = self._indexes.popitem(last=False)
+                total -= len(evicted)
+
+    def build_lock(self, owner_id: int) -> threading.Lock:
+        """
+        Lock held while loading or refreshing an owner's index, so
+        concurrent requests do the work once.
+        """
+        with self._lock:
+            return self._build_locks.setdefault(owner_id, threading.Lock())
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+# Shared by all requests in this process
+index_cache = SimilarityIndexCache()
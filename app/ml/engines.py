@@ -0,0 +1,341 @@
+"""
+Pluggable sentiment engines.
+
+Every engine scores text as a (polarity, subjectivity) pair and shares the
+positive/neutral/negative thresholds. The engine used by default is chosen
+per deployment with SENTIMENT_ENGINE and can be overridden per request with
+`?engine=` on the analysis endpoints.
+
+- textblob: TextBlob's pattern analyzer, the reference implementation
+- lexicon: the same pattern lexicon compiled into lookup tables and scored
+  in a single pass, several times faster
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Engine used when a request does not pick one
+SENTIMENT_ENGINE = os.getenv("SENTIMENT_ENGINE", "textblob")
+# Load engines at startup instead of on the first analysis
+SENTIMENT_WARMUP = os.getenv("SENTIMENT_WARMUP", "true").lower() in ("1", "true", "yes")
+SENTIMENT_WARMUP_ENGINES = [name.strip() for name in os.getenv("SENTIMENT_WARMUP_ENGINES", SENTIMENT_ENGINE).split(",") if name.strip()]
+
+WARMUP_TEXT = "Warming up: a really good, not bad at all day :)"
+
+_TOKEN = re.compile(r"\w+|[^\w\s]+", re.UNICODE)
+
+# Polarity thresholds used to turn a score into a label
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+def classify_polarity(polarity: float) -> str:
+    """
+    Map a polarity score (-1 to 1) to 'positive', 'neutral', or 'negative'.
+    """
+    if polarity > POSITIVE_THRESHOLD:
+        return "positive"
+    if polarity < NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+class SentimentScore(NamedTuple):
+    polarity: float
+    subjectivity: float
+
+class SentimentEngine:
+    """
+    Base class for sentiment engines; subclasses implement score().
+
+    Engines load their models lazily on first use, or up front with load(),
+    so importing the app stays fast. Engines that tokenize text themselves
+    also override tokenize() and analyze(), so keyword extraction can reuse
+    their tokens instead of splitting the text again.
+    """
+
+    name = ""
+
+    @property
+    def loaded(self) -> bool:
+        return True
+
+    def load(self):
+        pass
+
+    def score(self, text: str) -> SentimentScore:
+        raise NotImplementedError
+
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Split a text into words and punctuation the way score() sees it.
+        """
+        return _TOKEN.findall(text)
+
+    def analyze(self, text: str) -> Tuple[SentimentScore, List[str]]:
+        """
+        Score a text and return the tokens it was scored from.
+        """
+        return self.score(text), self.tokenize(text)
+
+    def score_batch(self, texts: List[str]) -> List[SentimentScore]:
+        return [self.score(text) for text in texts]
+
+    def classify(self, text: str) -> str:
+        return classify_polarity(self.score(text).polarity)
+
+class TextBlobEngine(SentimentEngine):
+    """
+    TextBlob's default (pattern) analyzer.
+    """
+
+    name = "textblob"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._analyzer = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._analyzer is not None
+
+    def load(self):
+        # Importing textblob pulls in nltk, and the lexicon XML is parsed on
+        # first access; do both now
+        with self._lock:
+            if self._analyzer is not None:
+                return
+            from textblob.en import sentiment as pattern_sentiment
+            len(pattern_sentiment)
+            self._analyzer = pattern_sentiment
+
+    def score(self, text: str) -> SentimentScore:
+        if self._analyzer is None:
+            self.load()
+        # Same analyzer as TextBlob(text).sentiment without building a TextBlob
+        polarity, subjectivity = self._analyzer(text)
+        return SentimentScore(polarity, subjectivity)
+
+    def tokenize(self, text: str) -> List[str]:
+        if self._analyzer is None:
+            self.load()
+        # The analyzer's own tokenizer, which keeps case and punctuation
+        return " ".join(self._analyzer.tokenizer(text)).split()
+
+    def analyze(self, text: str) -> Tuple[SentimentScore, List[str]]:
+        tokens = self.tokenize(text)
+        # Given a list, the analyzer skips tokenizing; it expects lowercase
+        # words, as it would have produced from the string
+        polarity, subjectivity = self._analyzer([token.lower() for token in tokens])
+        return SentimentScore(polarity, subjectivity), tokens
+
+class LexiconEngine(SentimentEngine):
+    """
+    The pattern lexicon compiled into lookup tables.
+
+    Follows the pattern analyzer's rules (modifiers such as "very", negation,
+    exclamation marks and emoticons) in one pass over the tokens, so scores
+    agree with the textblob engine for nearly all texts. The tables are
+    built from TextBlob's lexicon on first use and never change afterwards.
+    """
+
+    name = "lexicon"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._words = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._words is not None
+
+    def load(self):
+        with self._lock:
+            if self._words is not None:
+                return
+            from textblob._text import EMOTICONS
+            from textblob.en import sentiment as pattern_sentiment
+            # word -> (polarity, subjectivity, intensity, modifies the next word)
+            words = {
+                word: (*senses[None], "RB" in senses)
+                for word, senses in pattern_sentiment.items()
+                if " " not in word
+            }
+            emoticons = {
+                emoticon.lower(): polarity
+                for (_, polarity), group in EMOTICONS.items()
+                for emoticon in group
+                if not emoticon.isalpha()
+            }
+            alternatives = "|".join(re.escape(emoticon) for emoticon in sorted(emoticons, key=len, reverse=True))
+            starts = re.escape("".join(sorted({emoticon[0] for emoticon in emoticons})))
+            # Split contractions the way pattern does: "don't" -> do, n, t
+            self._find_tokens = re.compile(
+                rf"(?=[{starts}])(?:{alternatives})|[^\W_]+(?=n't)|[^\W_]+(?:[-*][^\W_]+)*|!"
+            ).findall
+            self._emoticons = emoticons
+            self._negations = frozenset(pattern_sentiment.negations)
+            self._words = words
+
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Lowercased words, emoticons and exclamation marks; other
+        punctuation is dropped.
+        """
+        if self._words is None:
+            self.load()
+        # Plain words skip the regex; only chunks with punctuation need it
+        tokens = []
+        append = tokens.append
+        for chunk in text.lower().split():
+            if chunk.isalnum() or chunk in self._emoticons:
+                append(chunk)
+                continue
+            word = chunk.strip('.,;?"')
+            if word.isalnum():
+                append(word)
+            else:
+                tokens.extend(self._find_tokens(chunk))
+        return tokens
+
+    def score(self, text: str) -> SentimentScore:
+        return self._score_tokens(self.tokenize(text))
+
+    def analyze(self, text: str) -> Tuple[SentimentScore, List[str]]:
+        tokens = self.tokenize(text)
+        return self._score_tokens(tokens), tokens
+
+    def _score_tokens(self, tokens: List[str]) -> SentimentScore:
+        words, emoticons, negations = self._words, self._emoticons, self._negations
+
+        total_polarity = total_subjectivity = 0.0
+        count = 0
+        # Current assessment: polarity, subjectivity, intensity, negated
+        polarity = subjectivity = intensity = 0.0
+        negated = False
+        open_assessment = False
+        modifier = None  # preceding modifier word ("very good")
+        negation = False  # preceding negation ("not good")
+
+        for token in tokens:
+            entry = words.get(token)
+            if entry is not None:
+                p, s, i, modifies = entry
+                if modifier is None:
+                    if open_assessment:
+                        total_polarity += polarity * -0.5 if negated else polarity
+                        total_subjectivity += subjectivity
+                        count += 1
+                    polarity, subjectivity, intensity, negated = p, s, i, False
+                    open_assessment = True
+                else:
+                    polarity = max(-1.0, min(p * intensity, 1.0))
+                    subjectivity = max(-1.0, min(s * intensity, 1.0))
+                    intensity = i
+                if negation:
+                    intensity = 1.0 / intensity
+                    negated = True
+                modifier = token if modifies else None
+                negation = token in negations
+                continue
+
+            if token in negations:
+                negation = True
+            elif negation and len(token.strip("'")) > 1:
+                negation = False
+            if negation and modifier is not None and modifier.endswith("ly"):
+                negated = True
+                negation = False
+            elif modifier is not None and len(token) > 2:
+                modifier = None
+            if token == "!":
+                if open_assessment:
+                    polarity = max(-1.0, min(polarity * 1.25, 1.0))
+            else:
+                emoticon = emoticons.get(token)
+                if emoticon is not None:
+                    if open_assessment:
+                        total_polarity += polarity * -0.5 if negated else polarity
+                        total_subjectivity += subjectivity
+                        count += 1
+                    polarity, subjectivity, intensity, negated = emoticon, 1.0, 1.0, False
+                    open_assessment = True
+
+        if open_assessment:
+            total_polarity += polarity * -0.5 if negated else polarity
+            total_subjectivity += subjectivity
+            count += 1
+        if not count:
+            return SentimentScore(0.0, 0.0)
+        return SentimentScore(total_polarity / count, total_subjectivity / count)
+
+ENGINES: Dict[str, SentimentEngine] = {}
+
+def register_engine(engine: SentimentEngine):
+    """
+    Make an engine selectable by its name.
+    """
+    ENGINES[engine.name] = engine
+
+def get_engine(name: Optional[str] = None) -> SentimentEngine:
+    """
+    Look up an engine by name; None selects SENTIMENT_ENGINE.
+
+    Raises:
+        ValueError: If no engine with that name is registered
+    """
+    name = name or SENTIMENT_ENGINE
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"Unknown sentiment engine '{name}'; available: {', '.join(sorted(ENGINES))}")
+    return engine
+
+def warm_up(names: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Load engines and analyze a sample text so the first real analysis is fast.
+
+    Analyzing also loads the part-of-speech lexicon that tag extraction uses.
+
+    Args:
+        names (Optional[List[str]]): Engines to load; None uses SENTIMENT_WARMUP_ENGINES
+
+    Returns:
+        Dict[str, float]: Seconds spent warming up each engine
+    """
+    # Imported here so importing the engines stays light
+    from app.ml.keywords import extract_tags
+    timings = {}
+    for name in names or SENTIMENT_WARMUP_ENGINES:
+        start = time.perf_counter()
+        try:
+            engine = get_engine(name)
+            engine.load()
+            _, tokens = engine.analyze(WARMUP_TEXT)
+            extract_tags(tokens)
+        except Exception as e:
+            logger.error(f"Failed to warm up sentiment engine '{name}': {str(e)}")
+            continue
+        timings[name] = time.perf_counter() - start
+        logger.info(f"Sentiment engine '{name}' loaded in {timings[name] * 1000:.0f} ms")
+    return timings
+
+def engine_status() -> Dict[str, bool]:
+    """
+    Report which engines have loaded their models.
+    """
+    return {name: engine.loaded for name, engine in sorted(ENGINES.items())}
+
+def _reset_locks_after_fork():
+    # A fork taken while another thread was loading an engine would leave its
+    # lock held forever in the child; the child simply loads again if needed
+    for engine in ENGINES.values():
+        if hasattr(engine, "_lock"):
+            engine._lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_locks_after_fork)
+
+register_engine(TextBlobEngine())
+register_engine(LexiconEngine())
@@ -0,0 +1,95 @@
+"""
+Keyword (tag) extraction from the tokens sentiment analysis already produced.
+
+Sentiment engines return the tokens they scored (see
+SentimentEngine.analyze), so tagging a note costs no second tokenization.
+The tokens are part-of-speech tagged with the pattern tagger that ships
+with TextBlob, which needs no corpus downloads, unlike TextBlob's own noun
+phrase extractors.
+
+A tag is a run of adjectives and nouns ending in a noun, cut to its last
+TAG_MAX_WORDS words, so "the new project manager"
+becomes "new project manager". Tags are lowercased, and a trailing regular
+plural is made singular. Each note keeps its NOTE_TAGS_MAX most frequent
+tags.
+"""
+import os
+import threading
+from collections import Counter
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from app.ml.embeddings import STOPWORDS
+
+# Keyword extraction configuration
+NOTE_TAGS_MAX = int(os.getenv("NOTE_TAGS_MAX", "8"))
+TAG_MAX_WORDS = 3
+TAG_MAX_LENGTH = 64
+
+_PHRASE_TAGS = ("NN", "JJ")
+
+_lock = threading.Lock()
+_parser = None
+_singularize = None
+
+def load():
+    """
+    Load the part-of-speech lexicon, which is otherwise read on first use.
+    """
+    global _parser, _singularize
+    with _lock:
+        if _parser is not None:
+            return
+        from textblob.en import parser
+        from textblob.en.inflect import singularize
+        parser.find_tags(["warm", "up"])
+        _parser, _singularize = parser, singularize
+
+def normalize_tag(tag: str) -> str:
+    """
+    The form tags are stored and looked up in: lowercase, single spaces.
+    """
+    return " ".join(tag.lower().split())
+
+def _eligible(word: str, pos: str) -> bool:
+    return pos.startswith(_PHRASE_TAGS) and word.isalpha() and len(word) > 1 and word.lower() not in STOPWORDS
+
+def _phrases(words: List[Tuple[str, str]]) -> Iterator[str]:
+    # Runs of adjectives and nouns, each cut after its last noun. The noun
+    # phrase chunker would only add determiners and conjunctions that end a
+    # run anyway, and costs twice as much as the tagger.
+    run: List[Tuple[str, str]] = []
+    for word, pos in words + [("", "")]:
+        if _eligible(word, pos):
+            run.append((word, pos))
+            continue
+        end = len(run)
+        while end and not run[end - 1][1].startswith("NN"):
+            end -= 1
+        if end:
+            phrase = [token.lower() for token, _ in run[max(0, end - TAG_MAX_WORDS):end]]
+            if run[end - 1][1] in ("NNS", "NNPS") and phrase[-1].endswith("s"):
+                phrase[-1] = _singularize(phrase[-1])
+            tag = " ".join(phrase)
+            if len(tag) <= TAG_MAX_LENGTH:
+                yield tag
+        run = []
+
+def extract_tags(tokens: Sequence[str], limit: int = NOTE_TAGS_MAX) -> List[str]:
+    """
+    The most frequent noun phrases among a text's tokens.
+
+    Args:
+        tokens (Sequence[str]): Tokens from SentimentEngine.tokenize or analyze
+        limit (int): Maximum number of tags
+
+    Returns:
+        List[str]: Normalized tags, most frequent first, then in order of
+        first appearance
+    """
+    if not tokens or limit <= 0:
+        return []
+    if _parser is None:
+        load()
+    counts: Dict[str, int] = Counter(_phrases([(word, pos) for word, pos in _parser.find_tags(list(tokens))]))
+    # Counter keeps insertion order, so the sort is stable by first appearance
+    return [tag for tag, _ in sorted(counts.items(), key=lambda item: -item[1])[:limit]]
@@ -0,0 +1,86 @@
+"""
+MinHash signatures and LSH band keys for near-duplicate note detection.
+
+A note's content is reduced to the set of its word shingles (runs of
+DUPLICATE_SHINGLE_SIZE words). The share of positions where two MinHash
+signatures agree estimates the Jaccard similarity of the two shingle sets.
+
+To find candidates without comparing against every note, the signature is
+cut into LSH_BANDS bands and each band is hashed to a key. Two notes share
+at least one key with probability 1 - (1 - J^r)^b for r rows per band, a
+steep S-curve around (1/b)^(1/r): about 0.71 for the default 16 bands of 8
+rows. Only notes sharing a key are compared, so each insert costs a fixed
+number of index lookups however many notes there are.
+"""
+import hashlib
+import os
+import re
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from app.ml.cache import normalize_content
+
+# Duplicate detection configuration
+# "flag" marks duplicates, "reject" refuses them, "off" skips the check
+DUPLICATE_DETECTION = os.getenv("DUPLICATE_DETECTION", "flag").lower()
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+DUPLICATE_SHINGLE_SIZE = int(os.getenv("DUPLICATE_SHINGLE_SIZE", "3"))
+MINHASH_PERMUTATIONS = int(os.getenv("MINHASH_PERMUTATIONS", "128"))
+LSH_BANDS = int(os.getenv("LSH_BANDS", "16"))
+
+# Universal hashing modulo a Mersenne prime; products of 31-bit
+# coefficients and 32-bit shingle hashes fit in uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, int(_PRIME), size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+def shingles(text: str, size: int = DUPLICATE_SHINGLE_SIZE) -> np.ndarray:
+    """
+    Distinct 32-bit hashes of the text's word shingles.
+
+    Case and whitespace are ignored; text shorter than one shingle is a
+    single shingle of all its words.
+    """
+    words = _WORD.findall(normalize_content(text).lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    grams = [" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))]
+    return np.unique(np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams)))
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """
+    MinHash signature of the text's shingles, or None for text without words.
+    """
+    hashes = shingles(text)
+    if len(hashes) == 0:
+        return None
+    # One row per permutation, minimized over the shingles
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    Estimated Jaccard similarity of the texts behind two signatures.
+    """
+    return float(np.mean(first == second))
+
+def band_keys(sig: np.ndarray, bands: int = LSH_BANDS) -> List[int]:
+    """
+    One signed 64-bit key per band, distinct between bands.
+    """
+    rows = len(sig) // bands
+    keys = []
+    for band in range(bands):
+        digest = hashlib.blake2b(sig[band * rows:(band + 1) * rows].tobytes(), digest_size=8, salt=band.to_bytes(16, "little"))
+        keys.append(int.from_bytes(digest.digest(), "little", signed=True))
+    return keys
+
+def to_blob(sig: np.ndarray) -> bytes:
+    return np.asarray(sig, dtype="<u4").tobytes()
+
+def from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<u4")
@@ -1,54 +1,257 @@
 import logging
-from textblob import TextBlob
+import time
+from typing import List, NamedTuple, Optional, Tuple
+from app.api.metrics import observe_sentiment
+from app.ml.cache import sentiment_cache, content_hash
+from app.ml.engines import SentimentEngine, SentimentScore, classify_polarity, get_engine
+from app.ml.chunking import SENTIMENT_CHUNK_THRESHOLD, ChunkedAnalysis, analyze_chunks, iter_chunks
+from app.ml.keywords import extract_tags
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def analyze_sentiment(text: str) -> str:
+NEUTRAL_SCORE = SentimentScore(0.0, 0.0)
+
+class TextAnalysis(NamedTuple):
+    score: SentimentScore
+    tags: List[str]
+
+def analyze_long_text(text: str, engine: str) -> ChunkedAnalysis:
     """
-    Analyze the sentiment of the given text using TextBlob.
-    Returns 'positive', 'neutral', or 'negative'.
+    Score a text in chunks (see analyze_chunks), recording the time spent.
+    """
+    start = time.perf_counter()
+    try:
+        return analyze_chunks(text, engine)
+    finally:
+        observe_sentiment(engine, "chunked", time.perf_counter() - start)
+
+def _score_text(text: str, sentiment_engine: SentimentEngine) -> Tuple[SentimentScore, bool]:
+    # Also returns whether the score covers the whole text; one cut short by
+    # the chunk budget depends on timing and must not be cached
+    if len(text) > SENTIMENT_CHUNK_THRESHOLD:
+        chunked = analyze_long_text(text, sentiment_engine.name)
+        return chunked.score, not chunked.partial
+    start = time.perf_counter()
+    try:
+        return sentiment_engine.score(text), True
+    finally:
+        observe_sentiment(sentiment_engine.name, "whole", time.perf_counter() - start)
+
+def score_text(text: str, sentiment_engine: SentimentEngine) -> SentimentScore:
+    """
+    Score a text, analyzing texts longer than SENTIMENT_CHUNK_THRESHOLD in chunks.
+    """
+    return _score_text(text, sentiment_engine)[0]
+
+def tag_text(text: str, sentiment_engine: SentimentEngine) -> List[str]:
+    """
+    Extract a text's tags without scoring it, for texts whose score is cached.
+
+    Texts longer than SENTIMENT_CHUNK_THRESHOLD are tagged from their first
+    chunk only.
+    """
+    if len(text) > SENTIMENT_CHUNK_THRESHOLD:
+        _, end = next(iter_chunks(text), (0, 0))
+        text = text[:end]
+    return extract_tags(sentiment_engine.tokenize(text))
+
+def _analyze_text(text: str, sentiment_engine: SentimentEngine) -> Tuple[TextAnalysis, bool]:
+    # Like _score_text, also returns whether the score covers the whole text
+    if len(text) > SENTIMENT_CHUNK_THRESHOLD:
+        chunked = analyze_long_text(text, sentiment_engine.name)
+        return TextAnalysis(chunked.score, tag_text(text, sentiment_engine)), not chunked.partial
+    start = time.perf_counter()
+    try:
+        score, tokens = sentiment_engine.analyze(text)
+    finally:
+        observe_sentiment(sentiment_engine.name, "whole", time.perf_counter() - start)
+    # Tags come from the tokens the engine scored, so the text is split once
+    return TextAnalysis(score, extract_tags(tokens)), True
+
+def analyze_text(text: str, engine: Optional[str] = None) -> TextAnalysis:
+    """
+    Score the sentiment of a text and extract its tags in one pass.
+
+    Like score_sentiment with use_cache=False, plus the tags (see
+    app.ml.keywords).
+
+    Returns:
+        TextAnalysis: The score and the tags; a neutral score and no tags
+        for empty or invalid input and on errors
+    """
+    if not text or not isinstance(text, str) or len(text.strip()) == 0:
+        logger.warning("Empty or invalid text provided for sentiment analysis")
+        return TextAnalysis(NEUTRAL_SCORE, [])
+    sentiment_engine = get_engine(engine)
+    try:
+        analysis, _ = _analyze_text(text, sentiment_engine)
+        logger.info(f"{sentiment_engine.name} sentiment score: polarity {analysis.score.polarity}, subjectivity {analysis.score.subjectivity}, {len(analysis.tags)} tags")
+        return analysis
+    except Exception as e:
+        logger.error(f"Unexpected error in sentiment analysis: {str(e)}")
+        return TextAnalysis(NEUTRAL_SCORE, [])
+
+def score_sentiment(text: str, use_cache: bool = True, engine: Optional[str] = None) -> SentimentScore:
+    """
+    Score the sentiment of the given text.
+    
+    Results are cached by a hash of the engine name and the normalized
+    text, so scoring the same content again skips NLP.
     
     Args:
         text (str): The text to analyze
+        use_cache (bool): Consult and fill the in-process result cache
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
         
     Returns:
-        str: The sentiment classification ('positive', 'neutral', or 'negative')
+        SentimentScore: Polarity (-1 to 1) and subjectivity (0 to 1); (0, 0)
+        for empty or invalid input and on errors
     """
     # Input validation
     if not text or not isinstance(text, str):
         logger.warning(f"Invalid input text: {text}")
-        return "neutral"  # Default to neutral for invalid input
+        return NEUTRAL_SCORE  # Default to neutral for invalid input
         
     if len(text.strip()) == 0:
         logger.warning("Empty text provided for sentiment analysis")
-        return "neutral"  # Default to neutral for empty text
+        return NEUTRAL_SCORE  # Default to neutral for empty text
+    
+    sentiment_engine = get_engine(engine)
+    key = content_hash(text, sentiment_engine.name) if use_cache else None
+    if key is not None:
+        cached = sentiment_cache.get(key)
+        if cached is not None:
+            logger.debug(f"Sentiment cache hit: {cached}")
+            return cached
     
     try:
         # Log the text being analyzed (truncated for privacy/brevity)
         truncated = text[:50] + "..." if len(text) > 50 else text
         logger.debug(f"Analyzing sentiment for text: '{truncated}'")
         
-        # Create TextBlob object
-        blob = TextBlob(text)
-        
-        # Get the polarity score (-1 to 1)
-        polarity = blob.sentiment.polarity
+        score, complete = _score_text(text, sentiment_engine)
         
-        logger.debug(f"TextBlob polarity score: {polarity}")
-        
-        # Determine sentiment based on polarity
-        if polarity > 0.1:
-            result = "positive"
-        elif polarity < -0.1:
-            result = "negative"
-        else:
-            result = "neutral"
-            
-        logger.info(f"Sentiment analysis result: {result} (polarity: {polarity})")
-        return result
+        logger.info(f"{sentiment_engine.name} sentiment score: polarity {score.polarity}, subjectivity {score.subjectivity}")
+        if key is not None and complete:
+            sentiment_cache.put(key, score)
+        return score
         
     except Exception as e:
         logger.error(f"Unexpected error in sentiment analysis: {str(e)}")
-        return "neutral"  # Default to neutral on unexpected errors
\ No newline at end of file
+        return NEUTRAL_SCORE  # Default to neutral on unexpected errors
+
+def analyze_sentiment(text: str, use_cache: bool = True, engine: Optional[str] = None) -> str:
+    """
+    Analyze the sentiment of the given text.
+    Returns 'positive', 'neutral', or 'negative'.
+    
+    The label is the polarity from score_sentiment classified against
+    POSITIVE_THRESHOLD and NEGATIVE_THRESHOLD.
+    
+    Args:
+        text (str): The text to analyze
+        use_cache (bool): Consult and fill the in-process result cache
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
+        
+    Returns:
+        str: The sentiment classification ('positive', 'neutral', or 'negative')
+    """
+    return classify_polarity(score_sentiment(text, use_cache, engine).polarity)
+
+def score_sentiment_batch(texts: List[str], engine: Optional[str] = None) -> List[SentimentScore]:
+    """
+    Score the sentiment of many texts.
+
+    The engine still scores texts one at a time; the batch only saves by
+    scoring duplicate texts once. Results match score_sentiment with the
+    same engine and share its cache.
+
+    Args:
+        texts (List[str]): The texts to analyze
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
+
+    Returns:
+        List[SentimentScore]: One score per input text, in order
+    """
+    sentiment_engine = get_engine(engine)
+    scored = {}
+    results = []
+    for text in texts:
+        if not text or not isinstance(text, str) or len(text.strip()) == 0:
+            results.append(NEUTRAL_SCORE)
+            continue
+        score = scored.get(text)
+        if score is None:
+            key = content_hash(text, sentiment_engine.name)
+            score = sentiment_cache.get(key)
+            if score is None:
+                try:
+                    score, complete = _score_text(text, sentiment_engine)
+                    if complete:
+                        sentiment_cache.put(key, score)
+                except Exception as e:
+                    logger.error(f"Unexpected error in batch sentiment analysis: {str(e)}")
+                    score = NEUTRAL_SCORE
+            scored[text] = score
+        results.append(score)
+
+    logger.info(f"Batch sentiment analysis resolved {len(scored)} unique texts out of {len(texts)}")
+    return results
+
+def analyze_texts_batch(texts: List[str], engine: Optional[str] = None) -> List[TextAnalysis]:
+    """
+    Score the sentiment of many texts and extract their tags.
+
+    Like score_sentiment_batch, plus the tags. Texts with a cached score are
+    only tokenized for their tags.
+
+    Args:
+        texts (List[str]): The texts to analyze
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
+
+    Returns:
+        List[TextAnalysis]: One score and list of tags per input text, in order
+    """
+    sentiment_engine = get_engine(engine)
+    analyzed = {}
+    results = []
+    for text in texts:
+        if not text or not isinstance(text, str) or len(text.strip()) == 0:
+            results.append(TextAnalysis(NEUTRAL_SCORE, []))
+            continue
+        analysis = analyzed.get(text)
+        if analysis is None:
+            key = content_hash(text, sentiment_engine.name)
+            score = sentiment_cache.get(key)
+            try:
+                if score is None:
+                    analysis, complete = _analyze_text(text, sentiment_engine)
+                    if complete:
+                        sentiment_cache.put(key, analysis.score)
+                else:
+                    analysis = TextAnalysis(score, tag_text(text, sentiment_engine))
+            except Exception as e:
+                logger.error(f"Unexpected error in batch sentiment analysis: {str(e)}")
+                analysis = TextAnalysis(score or NEUTRAL_SCORE, [])
+            analyzed[text] = analysis
+        results.append(analysis)
+
+    logger.info(f"Batch sentiment analysis resolved {len(analyzed)} unique texts out of {len(texts)}")
+    return results
+
+def analyze_sentiment_batch(texts: List[str], engine: Optional[str] = None) -> List[str]:
+    """
+    Analyze the sentiment of many texts.
+
+    Labels match analyze_sentiment with the same engine; see score_sentiment_batch.
+
+    Args:
+        texts (List[str]): The texts to analyze
+        engine (Optional[str]): Name of the sentiment engine; None uses SENTIMENT_ENGINE
+
+    Returns:
+        List[str]: One sentiment classification per input text, in order
+    """
+    return [classify_polarity(score.polarity) for score in score_sentiment_batch(texts, engine)]
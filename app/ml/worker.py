@@ -0,0 +1,164 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.api.events import event_broker, publish_sentiment_completed
+from app.api.metrics import SENTIMENT_JOB_BATCH_DURATION
+from app.database import crud
+from app.database.database import SessionLocal
+from app.ml.engines import SENTIMENT_WARMUP, classify_polarity, warm_up
+from app.ml.sentiment import analyze_texts_batch
+
+logger = logging.getLogger(__name__)
+
+# Worker pool configuration
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", str(os.cpu_count() or 1)))
+SENTIMENT_JOB_BATCH_SIZE = int(os.getenv("SENTIMENT_JOB_BATCH_SIZE", "50"))
+SENTIMENT_POLL_INTERVAL = float(os.getenv("SENTIMENT_POLL_INTERVAL", "1.0"))
+AUTO_ANALYZE_NOTES = os.getenv("AUTO_ANALYZE_NOTES", "false").lower() in ("1", "true", "yes")
+
+def run_pending_jobs(db: Session, executor: Optional[Executor] = None, batch_size: int = SENTIMENT_JOB_BATCH_SIZE, batches: int = 1) -> int:
+    """
+    Claim queued analysis jobs, score and tag their notes and store the results.
+
+    Args:
+        db (Session): Database session
+        executor (Optional[Executor]): Pool used to score batches; when None
+            the batches are scored in the calling thread
+        batch_size (int): Number of notes scored per executor task
+        batches (int): Number of batches claimed in one round
+
+    Returns:
+        int: Number of jobs claimed
+    """
+    jobs = crud.claim_analysis_jobs(db, limit=batch_size * batches)
+    if not jobs:
+        return 0
+
+    missing = [job_id for job_id, _, content in jobs if content is None]
+    crud.fail_analysis_jobs(db, missing, "Note not found")
+    jobs = [job for job in jobs if job[2] is not None]
+
+    chunks = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    dispatched = time.perf_counter()
+    if executor is None:
+        pending = [(chunk, None) for chunk in chunks]
+    else:
+        pending = [
+            (chunk, executor.submit(analyze_texts_batch, [content for _, _, content in chunk]))
+            for chunk in chunks
+        ]
+
+    for chunk, future in pending:
+        job_ids = [job_id for job_id, _, _ in chunk]
+        try:
+            if future is None:
+                analyses = analyze_texts_batch([content for _, _, content in chunk])
+            else:
+                analyses = future.result()
+            SENTIMENT_JOB_BATCH_DURATION.observe(time.perf_counter() - dispatched)
+            results = [
+                (job_id, note_id, analysis)
+                for (job_id, note_id, _), analysis in zip(chunk, analyses)
+            ]
+            results = crud.complete_analysis_jobs(db, results)
+            logger.info(f"Completed {len(results)} sentiment analysis jobs")
+            if event_broker.has_subscribers():
+                owners = crud.get_note_owners(db, [note_id for _, note_id, _ in results])
+                for _, note_id, analysis in results:
+                    if owners.get(note_id) is not None:
+                        publish_sentiment_completed(owners[note_id], note_id, classify_polarity(analysis.score.polarity))
+        except Exception as e:
+            logger.error(f"Error processing sentiment analysis jobs {job_ids}: {str(e)}")
+            crud.fail_analysis_jobs(db, job_ids, str(e))
+
+    return len(jobs) + len(missing)
+
+class SentimentWorkerPool:
+    """
+    Drains the analysis job queue with a process pool.
+
+    A single dispatcher thread claims jobs from the database and fans them
+    out to worker processes, so sentiment analysis runs off the request path
+    and across all cores.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_workers: int = SENTIMENT_WORKERS,
+                 batch_size: int = SENTIMENT_JOB_BATCH_SIZE, poll_interval: float = SENTIMENT_POLL_INTERVAL):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Requeue interrupted jobs and start the dispatcher thread.
+        """
+        if self.running or self.max_workers <= 0:
+            return
+
+        db = self.session_factory()
+        try:
+            requeued = crud.requeue_running_jobs(db)
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted sentiment analysis jobs")
+        finally:
+            db.close()
+
+        self._stop_event.clear()
+        # Worker processes load the sentiment models before their first job
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=warm_up if SENTIMENT_WARMUP else None)
+        self._thread = threading.Thread(target=self._run, name="sentiment-dispatcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Sentiment worker pool started with {self.max_workers} processes")
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop claiming jobs, finish the current round and shut the pool down.
+        """
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+        self._thread = None
+        self._executor = None
+        logger.info("Sentiment worker pool stopped")
+
+    def notify(self):
+        """
+        Wake the dispatcher after new jobs were queued.
+        """
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            db = self.session_factory()
+            try:
+                claimed = run_pending_jobs(db, self._executor, self.batch_size, self.max_workers)
+            except Exception as e:
+                logger.error(f"Sentiment worker pool error: {str(e)}")
+                claimed = 0
+            finally:
+                db.close()
+
+            if claimed == 0:
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+# Shared pool started and stopped by the application lifespan
+worker_pool = SentimentWorkerPool(SessionLocal)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class AnalysisJob(Base):
+    """
+    Queued sentiment analysis of a note, drained by the background worker pool.
+    """
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    note_id = Column(Integer, ForeignKey("notes.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")
+    sentiment = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Workers claim the oldest queued jobs first
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_id", "status", "id"),
+    )
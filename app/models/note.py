@@ -1,6 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, Text, DateTime, Index, event
 from sqlalchemy.sql import func
 from app.database.database import Base
+from app.database.search import install_search_index
+from app.database.versions import install_version_triggers
+# Registers the users table that owner_id refers to and the tables the
+# version triggers write to
+from app.models.user import User  # noqa: F401
+from app.models.note_version import NoteOwnerVersion  # noqa: F401
+from app.models.note_tombstone import NoteTombstone  # noqa: F401
 
 class Note(Base):
     __tablename__ = "notes"
@@ -10,4 +17,29 @@ class Note(Base):
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    sentiment = Column(String, nullable=True)
\ No newline at end of file
+    sentiment = Column(String, nullable=True)
+    # Raw engine scores behind the sentiment label, kept so analytics and
+    # re-thresholding run as SQL instead of re-analyzing the notes
+    polarity = Column(Float, nullable=True)
+    subjectivity = Column(Float, nullable=True)
+    # Nullable so notes created before ownership existed survive the migration
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Bumped by a trigger on every update; see app.database.versions
+    version = Column(Integer, nullable=False, server_default="1")
+    # Owner's change sequence at the note's last change, also set by triggers
+    change_seq = Column(Integer, nullable=True)
+
+    # Support keyset pagination ordered by (created_at, id), globally and
+    # within one owner's notes, and reading an owner's changes in order;
+    # range scans and aggregates over an owner's sentiment scores
+    __table_args__ = (
+        Index("ix_notes_created_at_id", "created_at", "id"),
+        Index("ix_notes_owner_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_notes_owner_change_seq", "owner_id", "change_seq"),
+        Index("ix_notes_owner_polarity", "owner_id", "polarity"),
+        Index("ix_notes_owner_subjectivity", "owner_id", "subjectivity"),
+    )
+
+# Create the full-text search index and version triggers alongside the notes table
+event.listen(Note.__table__, "after_create", install_search_index)
+event.listen(Note.__table__, "after_create", install_version_triggers)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from app.database.database import Base
+
+class NoteSentimentChunk(Base):
+    """
+    Sentiment of one window of a long note, written by chunked analysis so
+    the API can show which sections drove the note's sentiment.
+    """
+    __tablename__ = "note_sentiment_chunks"
+
+    note_id = Column(Integer, ForeignKey("notes.id"), primary_key=True)
+    chunk_index = Column(Integer, primary_key=True)
+    start = Column(Integer, nullable=False)
+    end = Column(Integer, nullable=False)
+    polarity = Column(Float, nullable=False)
+    subjectivity = Column(Float, nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, LargeBinary, ForeignKey
+from app.database.database import Base
+
+class NoteEmbedding(Base):
+    """
+    Hashed TF vector of a note as a float32 blob, loaded into the in-memory
+    similarity index; see app.database.similarity.
+    """
+    __tablename__ = "note_embeddings"
+
+    note_id = Column(Integer, ForeignKey("notes.id"), primary_key=True)
+    vector = Column(LargeBinary, nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, BigInteger
+from app.database.database import Base
+
+class NoteLshBucket(Base):
+    """
+    One LSH band key of a note's MinHash signature. Notes of the same owner
+    that share a key are near-duplicate candidates.
+    """
+    __tablename__ = "note_lsh_buckets"
+
+    owner_id = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    note_id = Column(Integer, primary_key=True)
+
+    # The primary key is the lookup index, so store rows in it directly
+    __table_args__ = {"sqlite_with_rowid": False}
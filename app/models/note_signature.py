@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, LargeBinary, ForeignKey, Index
+from app.database.database import Base
+
+class NoteSignature(Base):
+    """
+    MinHash signature of a note's content, and the earlier note it was
+    found to nearly duplicate, if any; see app.database.duplicates.
+    """
+    __tablename__ = "note_signatures"
+
+    note_id = Column(Integer, ForeignKey("notes.id"), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    signature = Column(LargeBinary, nullable=False)
+    duplicate_of = Column(Integer, nullable=True)
+    similarity = Column(Float, nullable=True)
+
+    # Supports the per-owner duplicates report
+    __table_args__ = (
+        Index("ix_note_signatures_owner_duplicate_of", "owner_id", "duplicate_of"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, Index
+from app.database.database import Base
+
+class NoteTag(Base):
+    """
+    One tag of a note. The owner is kept alongside so a user's notes with a
+    tag, and their tag counts, are range scans of the primary key.
+    """
+    __tablename__ = "note_tags"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
+    note_id = Column(Integer, ForeignKey("notes.id"), primary_key=True)
+
+    # The primary key is the lookup index, so store rows in it directly;
+    # replacing a note's tags looks them up by note
+    __table_args__ = (
+        Index("ix_note_tags_note_id", "note_id"),
+        {"sqlite_with_rowid": False},
+    )
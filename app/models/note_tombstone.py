@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class NoteTombstone(Base):
+    """
+    Record of a note that left an owner's notes, written by triggers on delete
+    and reassignment so the changes feed can report it.
+    """
+    __tablename__ = "note_tombstones"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    note_id = Column(Integer, primary_key=True)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Supports reading one owner's deletions in change order
+    __table_args__ = (
+        Index("ix_note_tombstones_owner_change_seq", "owner_id", "change_seq"),
+    )
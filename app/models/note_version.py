@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class NoteOwnerVersion(Base):
+    """
+    Per-owner counter bumped by triggers on every change to the owner's notes.
+    """
+    __tablename__ = "note_owner_versions"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # Note schemas
@@ -15,18 +15,157 @@ class NoteResponse(NoteBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     sentiment: Optional[str] = None
+    polarity: Optional[float] = None
+    subjectivity: Optional[float] = None
      
 
     class Config:
         from_attributes = True
 
+class NoteSearchResult(BaseModel):
+    id: int
+    title: str
+    sentiment: Optional[str] = None
+    created_at: datetime
+    snippet: str
+    rank: float
+
+class SimilarNote(BaseModel):
+    id: int
+    title: str
+    sentiment: Optional[str] = None
+    created_at: datetime
+    score: float
+
+class DuplicateNote(BaseModel):
+    id: int
+    title: str
+    created_at: datetime
+    similarity: Optional[float] = None
+
+class DuplicateGroup(BaseModel):
+    original: DuplicateNote
+    duplicates: List[DuplicateNote]
+
+class DuplicateReport(BaseModel):
+    duplicate_notes: int
+    groups: List[DuplicateGroup]
+
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+class BulkImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[BulkImportError] = []
+    elapsed_seconds: float
+    notes_per_second: float
+
+class NoteChanges(BaseModel):
+    notes: List[NoteResponse]
+    deleted: List[int]
+    next_since: int
+    has_more: bool
+
+class SentimentChunk(BaseModel):
+    index: int
+    start: int
+    end: int
+    polarity: float
+    subjectivity: float
+    sentiment: str
+    excerpt: str
+
+class NoteSentimentChunks(BaseModel):
+    note_id: int
+    sentiment: Optional[str] = None
+    partial: bool
+    chunks: List[SentimentChunk]
+
 class SentimentResponse(BaseModel):
     id: int
     sentiment: str
+    polarity: Optional[float] = None
+    subjectivity: Optional[float] = None
+    tags: List[str] = []
     
     class Config:
         from_attributes = True
 
+class BatchAnalyzeRequest(BaseModel):
+    note_ids: Optional[List[int]] = Field(None, description="IDs of the notes to analyze")
+    all_unanalyzed: bool = Field(False, description="Analyze every note that has no sentiment score yet")
+
+class BatchAnalyzeResponse(BaseModel):
+    analyzed: int
+    counts: Dict[str, int]
+    not_found: List[int] = []
+    results: List[SentimentResponse] = []
+    elapsed_seconds: float
+    notes_per_second: float
+
+class SentimentThresholds(BaseModel):
+    positive: float
+    negative: float
+
+class DailySentiment(BaseModel):
+    date: str
+    notes: int
+    polarity: float
+    subjectivity: float
+
+class HistogramBin(BaseModel):
+    start: float
+    end: float
+    count: int
+
+class NoteStats(BaseModel):
+    total: int
+    scored: int
+    thresholds: SentimentThresholds
+    distribution: Dict[str, int]
+    average_polarity: Optional[float] = None
+    average_subjectivity: Optional[float] = None
+    daily: List[DailySentiment]
+    polarity_histogram: List[HistogramBin]
+    subjectivity_histogram: List[HistogramBin]
+
+class SentimentEngines(BaseModel):
+    default: str
+    engines: List[str]
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+class SentimentCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    persistent_hits: int
+    hit_rate: float
+
+# Job schemas
+class JobCreate(BaseModel):
+    note_id: int
+
+class JobResponse(BaseModel):
+    id: int
+    note_id: int
+    status: str
+    sentiment: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # User schemas
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
@@ -43,6 +182,18 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class PasswordHashingStats(BaseModel):
+    executor: str
+    max_workers: int
+    bcrypt_rounds: int
+    in_flight: int
+    waiting: int
+    completed: int
+    rejected: int
+    queue_time_p50_ms: float
+    queue_time_p99_ms: float
+    queue_time_max_ms: float
+
 # Token schemas
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Float, String, DateTime
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class SentimentCacheEntry(Base):
+    """
+    Persistent sentiment result for a normalized content hash.
+    """
+    __tablename__ = "sentiment_cache"
+
+    content_hash = Column(String(64), primary_key=True)
+    sentiment = Column(String, nullable=False)
+    # Null for entries stored before scores were kept; those count as misses
+    polarity = Column(Float, nullable=True)
+    subjectivity = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
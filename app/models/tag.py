@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+from app.database.database import Base
+
+class Tag(Base):
+    """
+    A keyword extracted from notes, stored once however many notes carry it;
+    see app.database.tags.
+    """
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(64), nullable=False, unique=True)
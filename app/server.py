@@ -0,0 +1,261 @@
+"""
+Production entry point: a pre-forking supervisor for N uvicorn workers.
+
+    python -m app.server [--workers N] [--host 0.0.0.0] [--port 8001]
+
+The parent process does the one-time startup work before any worker exists:
+
+- creates and upgrades the schema once, under a file lock
+- imports the app and loads the sentiment models, then freezes the garbage
+  collector so those objects stay in pages shared copy-on-write
+- binds the listening socket, which every worker accepts from
+- points PROMETHEUS_MULTIPROC_DIR at a fresh directory (a temporary one
+  unless it is set), so GET /metrics adds up the metrics of every worker
+
+It then forks the workers and supervises them: a worker that dies is
+replaced, and SIGTERM or SIGINT drains them. Each worker stops accepting,
+finishes its in-flight requests (up to GRACEFUL_TIMEOUT seconds) and runs
+the app's shutdown. Workers still running after that are killed.
+
+Workers share the database and the metrics directory; everything else is
+per process, so events and invalidations only reach the worker that handled
+the change. Each worker has its own event broker (GET /events streams only
+that worker's events), its own auth cache (another worker keeps a changed
+user's tokens for up to AUTH_CACHE_TTL_SECONDS) and its own similarity
+index (caught up from the database on its next query).
+
+`python run.py` remains the single-process development server with reload.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server configuration
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8001"))
+GRACEFUL_TIMEOUT = float(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+APP = "app.main:app"
+# A worker exiting sooner than this after its start counts as a crash loop
+MIN_WORKER_LIFETIME = 1.0
+
+logger = logging.getLogger("app.server")
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """
+    Bind the listening socket shared by all workers.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def prepare_metrics_dir():
+    """
+    Give the workers an empty PROMETHEUS_MULTIPROC_DIR to write metrics to.
+
+    Must run before anything imports prometheus_client.
+    """
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="notes-metrics-")
+        return
+    os.makedirs(path, exist_ok=True)
+    # Files left by an earlier run would be added to this run's numbers
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+def preload():
+    """
+    Prepare the database, import the app and load the sentiment models.
+
+    Everything loaded here is inherited by the workers instead of being
+    loaded again in each of them.
+    """
+    from app.database import migrations
+    from app.database.database import engine
+
+    migrations.prepare_database(engine)
+
+    import app.main  # noqa: F401
+    from app.ml.engines import SENTIMENT_WARMUP, warm_up
+
+    if SENTIMENT_WARMUP:
+        warm_up()
+    # Connections must not be shared across fork; workers open their own
+    engine.dispose()
+    # Objects created so far are never collected, so the collector does not
+    # write to (and un-share) their pages in every worker
+    gc.collect()
+    gc.freeze()
+
+class PreforkServer:
+    """
+    Forks uvicorn workers serving one shared socket and supervises them.
+
+    Only worker 0 runs the sentiment job pool: every pool requeues
+    interrupted jobs when it starts, which would steal jobs from a pool
+    running in another worker.
+    """
+
+    def __init__(self, sock: socket.socket, workers: int = WEB_CONCURRENCY,
+                 graceful_timeout: float = GRACEFUL_TIMEOUT, **uvicorn_options):
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.uvicorn_options = uvicorn_options
+        self.children: Dict[int, int] = {}
+        self.started: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self.run_worker(index)
+                code = 0
+            except BaseException:
+                logger.exception(f"Worker {index} failed")
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+        self.started[index] = time.monotonic()
+        logger.info(f"Started worker {index} (pid {pid})")
+
+    def run_worker(self, index: int):
+        """
+        Serve the app on the shared socket until told to stop.
+        """
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        if index != 0:
+            from app.ml.worker import worker_pool
+            worker_pool.max_workers = 0
+
+        config = uvicorn.Config(APP, timeout_graceful_shutdown=self.graceful_timeout, **self.uvicorn_options)
+        # uvicorn installs its own SIGTERM/SIGINT handlers, which start the drain
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def handle_stop(self, signum, frame):
+        if not self.stopping:
+            logger.info(f"Received {signal.Signals(signum).name}, draining {len(self.children)} workers")
+        self.stopping = True
+
+    def reap(self) -> Optional[int]:
+        """
+        Collect one exited worker without blocking; return its index.
+        """
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return None
+        if pid == 0 or pid not in self.children:
+            return None
+        index = self.children.pop(pid)
+        # Imported here: prometheus_client must not load before prepare_metrics_dir.
+        # The worker's in-flight requests stop counting; its totals still do
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
+        if not self.stopping:
+            logger.warning(f"Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}")
+        return index
+
+    def run(self):
+        """
+        Start the workers and supervise them until a stop signal arrives.
+        """
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while not self.stopping:
+            index = self.reap()
+            if index is None:
+                time.sleep(0.2)
+                continue
+            if time.monotonic() - self.started[index] < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            if not self.stopping:
+                self.spawn(index)
+
+        self.drain()
+
+    def drain(self):
+        """
+        Ask every worker to finish its requests and exit, then wait for them.
+        """
+        for pid in self.children:
+            self._signal(pid, signal.SIGTERM)
+        # Workers give up on open connections after graceful_timeout; allow
+        # some extra time for the app's shutdown to run
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            if self.reap() is None:
+                time.sleep(0.1)
+        for pid, index in list(self.children.items()):
+            logger.warning(f"Worker {index} (pid {pid}) did not stop in time, killing it")
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.clear()
+        self.sock.close()
+        logger.info("All workers stopped")
+
+    def _signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the notes API with several worker processes")
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY, help="worker processes (default: WEB_CONCURRENCY or the CPU count)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--graceful-timeout", type=float, default=GRACEFUL_TIMEOUT,
+                        help="seconds a draining worker waits for in-flight requests")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    start = time.perf_counter()
+    prepare_metrics_dir()
+    preload()
+    sock = bind_socket(args.host, args.port)
+    logger.info(
+        f"Preloaded in {time.perf_counter() - start:.1f}s; "
+        f"serving on {args.host}:{args.port} with {args.workers} workers"
+    )
+    PreforkServer(
+        sock, args.workers, args.graceful_timeout,
+        log_level=args.log_level,
+        ssl_keyfile=os.getenv("SSL_KEYFILE", None),
+        ssl_certfile=os.getenv("SSL_CERTFILE", None),
+    ).run()
+
+if __name__ == "__main__":
+    main()
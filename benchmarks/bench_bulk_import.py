@@ -0,0 +1,97 @@
+"""
+Bulk NDJSON import/export benchmark.
+
+Starts a uvicorn server in a temporary working directory (so it gets a fresh
+./data/notes.db), streams N generated notes into POST /notes/bulk and reads
+them back from GET /notes/export. Throughput and the server's peak RSS are
+printed after each phase; flat memory means peak RSS barely moves with N.
+
+Usage:
+    python benchmarks/bench_bulk_import.py [notes]
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER = {"username": "benchuser", "email": "bench@example.com", "password": "benchpassword"}
+WORDS = "note meeting idea project budget travel recipe garden review plan draft summary".split()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def peak_rss_mb(pid):
+    # VmHWM is the process's peak resident set size
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def generate_body(count):
+    batch = []
+    for i in range(count):
+        content = " ".join(WORDS[(i * 7 + j) % len(WORDS)] for j in range(20))
+        batch.append(json.dumps({"title": f"Imported {i}", "content": content}))
+        if len(batch) == 1000:
+            yield ("\n".join(batch) + "\n").encode()
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode()
+
+def wait_for_server(client, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            client.get("/")
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        env = dict(os.environ, SENTIMENT_WORKERS="0", PYTHONPATH=ROOT)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+                wait_for_server(client)
+                client.post("/users/register", json=USER)
+                response = client.post("/users/login", json={"username": USER["username"], "password": USER["password"]})
+                headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+                print(f"{'phase':<8} {'notes':>9} {'seconds':>8} {'notes/s':>9} {'peak RSS MB':>12}")
+                started = time.perf_counter()
+                response = client.post("/notes/bulk", content=generate_body(count), headers=headers)
+                elapsed = time.perf_counter() - started
+                imported = response.json()["imported"]
+                print(f"{'import':<8} {imported:>9} {elapsed:>8.1f} {imported / elapsed:>9.0f} {peak_rss_mb(server.pid):>12.1f}")
+
+                exported = 0
+                started = time.perf_counter()
+                with client.stream("GET", "/notes/export", headers=headers) as response:
+                    for line in response.iter_lines():
+                        if line:
+                            exported += 1
+                elapsed = time.perf_counter() - started
+                print(f"{'export':<8} {exported:>9} {elapsed:>8.1f} {exported / elapsed:>9.0f} {peak_rss_mb(server.pid):>12.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
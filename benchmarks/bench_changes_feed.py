@@ -0,0 +1,77 @@
+"""
+Incremental sync benchmark: changes feed vs. refetching every note.
+
+Seeds a temporary SQLite database with one user's notes, records the change
+watermark, applies a handful of updates and deletions, then times how long
+it takes a client to catch up by walking every page of GET /notes/ versus
+one call to the changes feed (crud.get_note_dicts_page and
+crud.get_note_changes).
+
+Usage:
+    python benchmarks/bench_changes_feed.py [notes] [changes]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.database import crud
+from app.database.database import Base, create_database_engine
+from app.models.note import Note
+
+OWNER_ID = 1
+
+def refetch_all(session):
+    rows, cursor = 0, None
+    while True:
+        notes, cursor = crud.get_note_dicts_page(session, OWNER_ID, limit=1000, cursor=cursor)
+        rows += len(notes)
+        if cursor is None:
+            return rows
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_database_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        for offset in range(0, count, 50000):
+            session.execute(insert(Note), [
+                {"title": f"Note {i}", "content": "Benchmark note content.", "owner_id": OWNER_ID}
+                for i in range(offset, min(offset + 50000, count))
+            ])
+            session.commit()
+
+        since = crud.get_owner_version(session, OWNER_ID)[0]
+        for note_id in range(1, changes // 2 + 1):
+            session.execute(update(Note).where(Note.id == note_id).values(sentiment="positive"))
+        session.commit()
+        for note_id in range(count, count - (changes - changes // 2), -1):
+            crud.delete_note(session, note_id, OWNER_ID)
+
+        start = time.perf_counter()
+        rows = refetch_all(session)
+        refetch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        feed = crud.get_note_changes(session, OWNER_ID, since=since)
+        incremental = time.perf_counter() - start
+
+        session.close()
+        engine.dispose()
+
+    print(f"{'method':<14} {'rows':>9} {'ms':>9}")
+    print(f"{'refetch all':<14} {rows:>9} {refetch * 1000:>9.1f}")
+    print(f"{'changes feed':<14} {len(feed['notes']) + len(feed['deleted']):>9} {incremental * 1000:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Cold-start benchmark: app import time and first-analysis latency.
+
+Each run starts a fresh Python process against a temporary SQLite database,
+times `import app.main`, then times the first and second sentiment analysis
+either lazily (models load inside the first call) or after the startup
+warm-up the lifespan runs. Medians over the runs are printed.
+
+Usage:
+    python benchmarks/bench_cold_start.py [runs] [engine]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, logging, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter() - start
+logging.disable(logging.INFO)
+from app.ml.engines import warm_up
+from app.ml.sentiment import analyze_sentiment
+warmup = 0.0
+if sys.argv[1] == "warm":
+    start = time.perf_counter()
+    warm_up([sys.argv[2]])
+    warmup = time.perf_counter() - start
+timings = []
+for text in ("What a great day, I love it!", "The meeting was long and boring."):
+    start = time.perf_counter()
+    analyze_sentiment(text, use_cache=False, engine=sys.argv[2])
+    timings.append(time.perf_counter() - start)
+print(json.dumps({"import": imported, "warmup": warmup, "first": timings[0], "second": timings[1]}))
+"""
+
+def run(mode, engine, tmp):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/bench.db", SENTIMENT_WORKERS="0")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, mode, engine], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    engine = sys.argv[2] if len(sys.argv) > 2 else "textblob"
+
+    print(f"{'mode':<6} {'import ms':>10} {'warm-up ms':>11} {'1st analyze ms':>15} {'2nd analyze ms':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("lazy", "warm"):
+            results = [run(mode, engine, tmp) for _ in range(runs)]
+            median = {key: statistics.median(result[key] for result in results) * 1000 for key in results[0]}
+            print(
+                f"{mode:<6} {median['import']:>10.0f} {median['warmup']:>11.0f} "
+                f"{median['first']:>15.2f} {median['second']:>15.2f}"
+            )
+
+if __name__ == "__main__":
+    main()
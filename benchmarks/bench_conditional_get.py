@@ -0,0 +1,80 @@
+"""
+Polling benchmark for conditional GET on note reads.
+
+Drives the real FastAPI app in-process over ASGI against a temporary SQLite
+database and polls GET /notes/?limit=100 and GET /notes/{id} the way the
+frontend does, once with plain requests and once revalidating with
+If-None-Match. Requests/sec, mean latency and bytes transferred per request
+are printed for each.
+
+Usage:
+    python benchmarks/bench_conditional_get.py [requests]
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.api.auth import UserSnapshot, get_current_active_user
+from app.database.database import Base, create_database_engine, get_db
+
+USER = UserSnapshot(id=1, username="benchuser", is_active=True)
+
+async def poll(client, url, count, revalidate):
+    etag = None
+    transferred = 0
+    started = time.perf_counter()
+    for _ in range(count):
+        headers = {"If-None-Match": etag} if revalidate and etag else {}
+        response = await client.get(url, headers=headers)
+        etag = response.headers.get("ETag", etag)
+        transferred += len(response.content)
+    return time.perf_counter() - started, transferred
+
+async def run(count):
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        note_id = None
+        for i in range(100):
+            response = await client.post("/notes/", json={"title": f"Note {i}", "content": "Polling benchmark note content. " * 8})
+            note_id = response.json()["id"]
+
+        print(f"{'endpoint':<14} {'mode':<12} {'req/s':>8} {'mean ms':>8} {'bytes/req':>10}")
+        for name, url in (("list 100", "/notes/?limit=100"), ("single note", f"/notes/{note_id}")):
+            for mode, revalidate in (("full", False), ("conditional", True)):
+                elapsed, transferred = await poll(client, url, count, revalidate)
+                print(f"{name:<14} {mode:<12} {count / elapsed:>8.1f} {elapsed / count * 1000:>8.2f} {transferred / count:>10.0f}")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_database_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_get_current_active_user():
+            return USER
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_active_user] = override_get_current_active_user
+        asyncio.run(run(count))
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
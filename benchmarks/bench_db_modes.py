@@ -0,0 +1,106 @@
+"""
+Load test the API in sync and async database modes.
+
+For each DATABASE_MODE a uvicorn server is started in a temporary working
+directory (so it gets a fresh ./data/notes.db), seeded with notes, and then
+hit by N concurrent clients mixing GET /notes/?limit=20 and GET /notes/{id}.
+Requests/sec and p50/p99 latency are printed per mode.
+
+Usage:
+    python benchmarks/bench_db_modes.py [clients] [seconds]
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER = {"username": "benchuser", "email": "bench@example.com", "password": "benchpassword"}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def start_server(mode, workdir, port):
+    env = dict(os.environ, DATABASE_MODE=mode, SENTIMENT_WORKERS="0", PYTHONPATH=ROOT)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+async def wait_for_server(base_url, timeout=30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get("/")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def load(base_url, clients, seconds):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.post("/users/register", json=USER)
+        response = await client.post("/users/login", json={"username": USER["username"], "password": USER["password"]})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        note_ids = []
+        for i in range(200):
+            response = await client.post("/notes/", json={"title": f"Note {i}", "content": "Load test note content."}, headers=headers)
+            note_ids.append(response.json()["id"])
+
+        latencies, errors = [], []
+        deadline = time.perf_counter() + seconds
+
+        async def worker(seed):
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                url = "/notes/?limit=20" if rng.random() < 0.5 else f"/notes/{rng.choice(note_ids)}"
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                    if response.status_code >= 400:
+                        errors.append(response.status_code)
+                except httpx.TransportError as e:
+                    errors.append(type(e).__name__)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        return latencies, errors, time.perf_counter() - started
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    print(f"{'mode':<6} {'clients':>8} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as workdir:
+            port = free_port()
+            server = start_server(mode, workdir, port)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                asyncio.run(wait_for_server(base_url))
+                latencies, errors, elapsed = asyncio.run(load(base_url, clients, seconds))
+            finally:
+                server.terminate()
+                server.wait()
+        print(f"{mode:<6} {clients:>8} {len(latencies):>9} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 0.50):>9.1f} {percentile(latencies, 0.99):>9.1f} {len(errors):>7}")
+
+if __name__ == "__main__":
+    main()
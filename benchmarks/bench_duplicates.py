@@ -0,0 +1,110 @@
+"""
+Near-duplicate detection benchmark.
+
+Grows one user's notes through several table sizes (random words drawn from
+a Zipf-distributed vocabulary, one in ten notes a lightly edited copy of an
+earlier one) and at each size times, per new note:
+
+- signature: the MinHash signature of its content
+- lsh insert: find_duplicate plus index_note, as create_note does
+- brute force: comparing the signature against every stored signature
+  (over the first BRUTE_FORCE_INSERTS inserts only, as it grows linearly)
+
+Usage:
+    python benchmarks/bench_duplicates.py [largest_size] [inserts]
+"""
+import itertools
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OWNER_ID = 1
+BRUTE_FORCE_INSERTS = 10
+
+def make_vocabulary(rng, size=20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    inserts = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    logging.disable(logging.INFO)
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    from sqlalchemy import insert, select, text
+    from app.database import duplicates
+    from app.database.database import SessionLocal, engine
+    from app.database.migrations import prepare_database
+    from app.ml import minhash
+    from app.models.note import Note
+    from app.models.note_signature import NoteSignature
+
+    prepare_database(engine)
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+    contents = []
+
+    def next_content():
+        if contents and rng.random() < 0.1:
+            words = rng.choice(contents).split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            content = " ".join(words)
+        else:
+            content = " ".join(rng.choices(vocabulary, cum_weights=weights, k=rng.randint(20, 80)))
+        contents.append(content)
+        return content
+
+    db = SessionLocal()
+    db.execute(text("INSERT INTO users (id, username, email, hashed_password, is_active) VALUES (1, 'bench', 'bench@example.com', 'x', 1)"))
+    db.commit()
+
+    def insert_note(content):
+        return db.execute(insert(Note).values(title="Bench", content=content, owner_id=OWNER_ID)).inserted_primary_key[0]
+
+    sizes = [size for size in (1000, 10000, 100000, 1000000) if size < largest] + [largest]
+    print(f"{'notes':>9} {'signature ms':>13} {'lsh insert ms':>14} {'brute force ms':>15} {'flagged':>8}")
+    count = 0
+    for size in sizes:
+        # Grow the table without timing; index_missing signs and flags as create_note would
+        for start in range(count, size, 10000):
+            db.execute(insert(Note), [
+                {"title": "Bench", "content": next_content(), "owner_id": OWNER_ID} for _ in range(start, min(start + 10000, size))
+            ])
+            db.commit()
+            duplicates.index_missing(db, OWNER_ID)
+        count = size
+
+        signature_ms, insert_ms, brute_ms, flagged = [], [], [], 0
+        for i in range(inserts):
+            content = next_content()
+            start = time.perf_counter()
+            sig = minhash.signature(content)
+            signature_ms.append((time.perf_counter() - start) * 1000)
+
+            if i < BRUTE_FORCE_INSERTS:
+                start = time.perf_counter()
+                for blob in db.execute(select(NoteSignature.signature).where(NoteSignature.owner_id == OWNER_ID)).scalars():
+                    minhash.similarity(sig, minhash.from_blob(blob))
+                brute_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            duplicate = duplicates.find_duplicate(db, OWNER_ID, sig)
+            duplicates.index_note(db, insert_note(content), OWNER_ID, sig, duplicate)
+            db.commit()
+            insert_ms.append((time.perf_counter() - start) * 1000)
+            flagged += duplicate is not None
+            count += 1
+        print(f"{size:>9} {statistics.median(signature_ms):>13.3f} {statistics.median(insert_ms):>14.2f} "
+              f"{statistics.median(brute_ms):>15.1f} {flagged:>8}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Fan-out benchmark for the server-sent events broker.
+
+Opens many subscriptions spread over a set of users on one event loop and
+publishes note events to random users from a separate thread, the way
+threadpool routes and the sentiment dispatcher do. A share of the
+subscribers never read, to show that slow consumers stay bounded by
+EVENTS_QUEUE_SIZE instead of growing. Delivery latency to the live
+consumers, publish throughput and the buffered events left behind are
+printed.
+
+Usage:
+    python benchmarks/bench_events.py [subscribers] [events]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.events import EventBroker
+
+USERS = 100
+SLOW_SHARE = 0.1
+
+async def consume(subscription, latencies):
+    while True:
+        message = await subscription.queue.get()
+        if message.startswith(b"id:"):
+            sent = float(message.rsplit(b'"sent":', 1)[1].split(b"}", 1)[0])
+            latencies.append(time.perf_counter() - sent)
+
+async def run(subscribers, events):
+    broker = EventBroker(max_subscribers=subscribers, queue_size=100)
+    latencies = []
+    tasks, slow = [], []
+    for i in range(subscribers):
+        subscription = broker.subscribe(i % USERS + 1)
+        if i < subscribers * SLOW_SHARE:
+            slow.append(subscription)
+        else:
+            tasks.append(asyncio.create_task(consume(subscription, latencies)))
+
+    def publish():
+        rng = random.Random(0)
+        for i in range(events):
+            broker.publish(rng.randint(1, USERS), "note.created", {"id": i, "sent": time.perf_counter()})
+            if i % 100 == 0:
+                time.sleep(0.001)
+
+    started = time.perf_counter()
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    while publisher.is_alive():
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.2)
+    for task in tasks:
+        task.cancel()
+
+    stats = broker.stats()
+    latencies.sort()
+    print(f"subscribers:       {subscribers} ({len(slow)} never read)")
+    print(f"events published:  {stats['published']} in {elapsed:.2f}s ({stats['published'] / elapsed:.0f}/s)")
+    print(f"deliveries:        {len(latencies)}")
+    print(f"latency p50/p99:   {statistics.median(latencies) * 1000:.2f} / {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    print(f"max slow backlog:  {max(s.queue.qsize() for s in slow)} events (dropped {stats['dropped']})")
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    asyncio.run(run(subscribers, events))
+
+if __name__ == "__main__":
+    main()
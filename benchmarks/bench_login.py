@@ -0,0 +1,96 @@
+"""
+Login storm benchmark: login latency and its impact on unrelated endpoints.
+
+Drives the real FastAPI app in-process over ASGI against a temporary SQLite
+database. Login clients hammer POST /users/login while reader clients list
+notes with GET /notes/; p50/p99 latency and requests/sec are printed for
+both. Run it on two commits to compare before and after a change.
+
+Usage:
+    python benchmarks/bench_login.py [login_clients] [reader_clients] [seconds]
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database.database import Base, get_db
+
+USER = {"username": "benchuser", "email": "bench@example.com", "password": "benchpassword"}
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+async def worker(client, method, url, deadline, latencies, errors, **kwargs):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+
+async def run(login_clients, reader_clients, seconds):
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=120) as client:
+        await client.post("/users/register", json=USER)
+        response = await client.post("/users/login", json={"username": USER["username"], "password": USER["password"]})
+        token = response.json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        for i in range(50):
+            await client.post("/notes/", json={"title": f"Note {i}", "content": "Benchmark note content for listing."}, headers=auth)
+
+        results = {}
+        deadline = time.perf_counter() + seconds
+        tasks = []
+        for name, count, method, url, kwargs in [
+            ("login", login_clients, "POST", "/users/login",
+             {"json": {"username": USER["username"], "password": USER["password"]}}),
+            ("list notes", reader_clients, "GET", "/notes/?limit=20", {"headers": auth}),
+        ]:
+            latencies, errors = [], []
+            results[name] = (latencies, errors)
+            tasks += [worker(client, method, url, deadline, latencies, errors, **kwargs) for _ in range(count)]
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    print(f"{'endpoint':<12} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, (latencies, errors) in results.items():
+        print(f"{name:<12} {len(latencies):>9} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 0.50):>9.1f} {percentile(latencies, 0.99):>9.1f} {len(errors):>7}")
+
+def main():
+    login_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    reader_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        asyncio.run(run(login_clients, reader_clients, seconds))
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Long-note benchmark: whole-text vs. chunked sentiment analysis.
+
+Builds notes of increasing size from a fixed set of sentences and scores
+each one in a single engine call and with chunked analysis (sequentially,
+with a process pool, and with a time budget). Wall time, peak Python memory
+(tracemalloc) and the resulting polarity are printed for each.
+
+Usage:
+    python benchmarks/bench_long_notes.py [engine] [workers]
+"""
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.chunking import analyze_chunks
+from app.ml.engines import get_engine
+
+SIZES = [100_000, 1_000_000, 5_000_000]
+SENTENCES = [
+    "I love this product, it's amazing!",
+    "The meeting was long and boring.",
+    "Call the dentist to reschedule the appointment.",
+    "What a terrible, horrible day :(",
+    "Lovely walk in the park with the kids.",
+    "The build is broken again and nobody knows why.",
+]
+
+def build_note(size):
+    rng = random.Random(size)
+    paragraphs, length = [], 0
+    while length < size:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 12)))
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:size]
+
+def measure(label, size, run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    polarity, note = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{size / 1e6:>6.1f} MB  {label:<18} {elapsed:>8.2f} {peak / 1e6:>9.1f} {polarity:>9.4f}  {note}")
+
+def main():
+    engine = sys.argv[1] if len(sys.argv) > 1 else "textblob"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    logging.disable(logging.INFO)
+    get_engine(engine).load()
+
+    print(f"{'note':>9}  {'mode':<18} {'seconds':>8} {'peak MB':>9} {'polarity':>9}")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for size in SIZES:
+            text = build_note(size)
+
+            def whole():
+                return get_engine(engine).score(text).polarity, ""
+
+            def chunked(**kwargs):
+                result = analyze_chunks(text, engine, budget=float("inf"), **kwargs)
+                return result.score.polarity, f"{len(result.chunks)} chunks"
+
+            def budgeted():
+                result = analyze_chunks(text, engine, budget=0.5)
+                return result.score.polarity, f"{len(result.chunks)} chunks, partial={result.partial}"
+
+            measure("whole text", size, whole)
+            measure("chunked", size, chunked)
+            measure(f"chunked x{workers} proc", size, lambda: chunked(executor=executor))
+            measure("chunked, 0.5s", size, budgeted)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Instrumentation overhead benchmark.
+
+Builds two copies of a small app whose route runs one primary-key SELECT
+against an in-memory SQLite database: one plain, and one with
+MetricsMiddleware and the query listeners installed. Requests are driven
+in-process through httpx's ASGI transport, and the median per-request time
+of each is printed along with the overhead and the cost of rendering
+/metrics.
+
+Usage:
+    python benchmarks/bench_metrics.py [requests] [rounds]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.api.metrics import MetricsMiddleware, instrument_engine, render_metrics
+
+def build_app(instrumented):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (name) VALUES ('first')"))
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+        instrument_engine(engine)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            return {"name": conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id}).scalar()}
+
+    return app
+
+async def time_requests(app, count):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get("/items/1")
+        start = time.perf_counter()
+        for _ in range(count):
+            await client.get("/items/1")
+        return (time.perf_counter() - start) / count * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    plain, instrumented = build_app(False), build_app(True)
+    results = {"plain": [], "instrumented": []}
+    # Alternate so drift affects both equally
+    for _ in range(rounds):
+        results["plain"].append(asyncio.run(time_requests(plain, count)))
+        results["instrumented"].append(asyncio.run(time_requests(instrumented, count)))
+
+    base = statistics.median(results["plain"])
+    print(f"{'app':<14} {'us/request':>11} {'overhead us':>12}")
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        print(f"{name:<14} {median:>11.1f} {median - base:>+12.1f}")
+
+    start = time.perf_counter()
+    body = render_metrics()
+    print(f"render /metrics: {(time.perf_counter() - start) * 1000:.2f} ms, {len(body)} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Note listing serialization microbenchmark.
+
+Seeds an in-memory SQLite database with notes, then times building the JSON
+body of GET /notes/ pages two ways:
+
+- orm: ORM Note objects validated through NoteResponse and rendered by
+  FastAPI's own response path (serialize_response + JSONResponse)
+- fast: column tuples turned into dicts and rendered with orjson, as the
+  listing route does now; also with ?fields=id,title,sentiment
+
+Times are reported per 1,000 notes, both for serialization alone and for
+query plus serialization.
+
+Usage:
+    python benchmarks/bench_note_serialization.py [page_size] [repetitions]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.database import crud
+from app.database.database import Base
+from app.models.note import Note
+
+OWNER_ID = 1
+
+def listing_route():
+    return next(route for route in app.routes if getattr(route, "path", None) == "/notes/" and "GET" in route.methods)
+
+def seed(session, count):
+    session.execute(insert(Note), [
+        {
+            "title": f"Note {i}",
+            "content": f"Meeting notes number {i}: discussed the budget, the release plan and next steps.",
+            "sentiment": ("positive", "neutral", "negative")[i % 3],
+            "owner_id": OWNER_ID,
+        }
+        for i in range(count)
+    ])
+    session.commit()
+
+def median_ms_per_1000(fn, page_size, repetitions):
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings) * 1000 / page_size
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    seed(session, page_size)
+    field = listing_route().response_field
+    projection = crud.parse_note_fields("id,title,sentiment")
+
+    def orm_serialize(notes):
+        content = asyncio.run(serialize_response(field=field, response_content=notes, is_coroutine=False))
+        return JSONResponse(content).body
+
+    def fast_serialize(notes):
+        return ORJSONResponse(notes).body
+
+    def orm_query():
+        return crud.get_notes_page(session, OWNER_ID, limit=page_size)[0]
+
+    def fast_query(fields=crud.NOTE_FIELDS):
+        return crud.get_note_dicts_page(session, OWNER_ID, fields, limit=page_size)[0]
+
+    orm_notes = orm_query()
+    fast_notes = fast_query()
+    projected_notes = fast_query(projection)
+    cases = [
+        ("orm", lambda: orm_serialize(orm_notes), lambda: orm_serialize(orm_query())),
+        ("fast", lambda: fast_serialize(fast_notes), lambda: fast_serialize(fast_query())),
+        ("fast, 3 fields", lambda: fast_serialize(projected_notes), lambda: fast_serialize(fast_query(projection))),
+    ]
+
+    print(f"{'path':<16} {'serialize ms/1k':>16} {'query+serialize ms/1k':>22}")
+    for name, serialize_only, end_to_end in cases:
+        session.expire_all()
+        print(f"{name:<16} {median_ms_per_1000(serialize_only, page_size, repetitions):>16.2f} "
+              f"{median_ms_per_1000(end_to_end, page_size, repetitions):>22.2f}")
+
+    session.close()
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Sentiment analytics benchmark: SQL aggregates vs. re-analysis.
+
+Seeds an in-memory SQLite database with one user's notes (scored with the
+selected engine and spread over 90 days), then times:
+
+- sql stats: analytics.get_sentiment_stats, the query behind GET /notes/stats
+- sql stats, other thresholds: the same with non-default thresholds
+- re-analysis: scoring every note's content again and bucketing the
+  polarities in Python, which is what re-thresholding took when only the
+  label was stored
+
+Usage:
+    python benchmarks/bench_note_stats.py [number_of_notes] [engine]
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import analytics
+from app.database.database import Base
+from app.ml.engines import get_engine
+from app.models.note import Note
+
+OWNER_ID = 1
+SENTENCES = [
+    "I love this product, it's amazing!",
+    "The meeting was long and boring.",
+    "Call the dentist to reschedule the appointment.",
+    "What a terrible, horrible day :(",
+    "Lovely walk in the park with the kids.",
+    "The build is broken again and nobody knows why.",
+]
+
+def seed(session, count, engine):
+    rng = random.Random(42)
+    sentiment_engine = get_engine(engine)
+    rows = []
+    for i in range(count):
+        content = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 6)))
+        polarity, subjectivity = sentiment_engine.score(content)
+        rows.append({
+            "title": f"Note {i}",
+            "content": content,
+            "polarity": polarity,
+            "subjectivity": subjectivity,
+            "sentiment": sentiment_engine.classify(content),
+            "owner_id": OWNER_ID,
+        })
+    session.execute(insert(Note), rows)
+    session.execute(text("UPDATE notes SET created_at = datetime('now', '-' || (id % 90) || ' days')"))
+    session.commit()
+
+def median_ms(fn, repetitions):
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engine = sys.argv[2] if len(sys.argv) > 2 else "textblob"
+    logging.disable(logging.INFO)
+
+    db_engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=db_engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    seed(session, count, engine)
+    sentiment_engine = get_engine(engine)
+
+    def reanalyze():
+        counts = {"positive": 0, "neutral": 0, "negative": 0}
+        for content in session.execute(select(Note.content).where(Note.owner_id == OWNER_ID)).scalars():
+            polarity = sentiment_engine.score(content).polarity
+            counts["positive" if polarity > 0.3 else "negative" if polarity < -0.3 else "neutral"] += 1
+        return counts
+
+    print(f"{count} notes, {engine} engine")
+    print(f"{'mode':<28} {'ms':>10}")
+    print(f"{'sql stats':<28} {median_ms(lambda: analytics.get_sentiment_stats(session, OWNER_ID), 20):>10.1f}")
+    other = lambda: analytics.get_sentiment_stats(session, OWNER_ID, positive_threshold=0.3, negative_threshold=-0.3, bins=20)
+    print(f"{'sql stats, other thresholds':<28} {median_ms(other, 20):>10.1f}")
+    print(f"{'re-analysis':<28} {median_ms(reanalyze, 1):>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Owner-scoped note listing benchmark.
+
+Seeds a temporary SQLite database with notes spread over many users plus
+one "small" user with a fixed handful of notes, then times the first and a
+deeper page of crud.get_notes_page for the small user and a busy one. With
+the (owner_id, created_at, id) index the small user's latency should stay
+flat as the total note count grows.
+
+Usage:
+    python benchmarks/bench_owner_listing.py [total_notes ...]
+"""
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import crud
+from app.database.database import Base, create_database_engine
+from app.models.note import Note
+
+USERS = 100
+SMALL_USER_ID = USERS + 1
+SMALL_USER_NOTES = 50
+
+def seed(session, count, chunk_size=50000):
+    for offset in range(0, count, chunk_size):
+        session.execute(insert(Note), [
+            {"title": f"Note {i}", "content": "Benchmark note content.", "owner_id": i % USERS + 1}
+            for i in range(offset, min(offset + chunk_size, count))
+        ])
+        session.commit()
+    session.execute(insert(Note), [
+        {"title": f"Small {i}", "content": "Benchmark note content.", "owner_id": SMALL_USER_ID}
+        for i in range(SMALL_USER_NOTES)
+    ])
+    session.commit()
+
+def time_pages(session, owner_id, repetitions=50):
+    first, second = [], []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        _, cursor = crud.get_notes_page(session, owner_id, limit=20)
+        first.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        crud.get_notes_page(session, owner_id, limit=20, cursor=cursor)
+        second.append((time.perf_counter() - start) * 1000)
+    return statistics.median(first), statistics.median(second)
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    logging.disable(logging.INFO)
+
+    print(f"{'total notes':>12} {'user':<6} {'user notes':>10} {'page 1 ms':>10} {'page 2 ms':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_database_engine(f"sqlite:///{tmp}/bench.db")
+            Base.metadata.create_all(bind=engine)
+            session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+            seed(session, size)
+            for name, owner_id, notes in (("small", SMALL_USER_ID, SMALL_USER_NOTES), ("busy", 1, size // USERS)):
+                first, second = time_pages(session, owner_id)
+                print(f"{size:>12} {name:<6} {notes:>10} {first:>10.2f} {second:>10.2f}")
+            session.close()
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measure full-text search latency on a large notes table.
+
+Seeds a temporary SQLite database with generated notes (1,000,000 by
+default), then runs a set of representative queries through
+search.search_notes and prints p50/p95/max latency for each.
+
+Usage:
+    python benchmarks/bench_search.py [number_of_notes] [repetitions]
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import accumulate
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base
+from app.database import search
+from app.models.note import Note
+
+# Named words are the most frequent; the long tail is synthetic, so term
+# frequencies follow a Zipf-like curve as in real notes
+TOPIC_WORDS = (
+    "meeting project garden coffee budget travel recipe family doctor invoice "
+    "report weekend holiday tomatoes basil design review deadline client "
+    "sprint release bug feature music book movie exercise running yoga "
+    "groceries bread cheese wine train flight hotel museum beach mountain"
+).split()
+VOCABULARY = TOPIC_WORDS + [f"word{i}" for i in range(20000)]
+CUM_WEIGHTS = list(accumulate(1.0 / (rank + 10) for rank in range(len(VOCABULARY))))
+RARE_WORDS = ["xylophone", "quasar", "zeppelin"]
+SENTIMENTS = ["positive", "neutral", "negative", None]
+OWNER_ID = 1
+
+QUERIES = [
+    ("common term", {"query": "coffee"}),
+    ("two terms", {"query": "garden tomatoes"}),
+    ("prefix", {"query": "proj*"}),
+    ("rare term", {"query": "quasar"}),
+    ("term + sentiment", {"query": "budget", "sentiment": "negative"}),
+    ("term + date range", {"query": "travel", "created_after": datetime(2000, 1, 1)}),
+]
+
+def seed(session, count, chunk_size=50000):
+    rng = random.Random(42)
+    start = time.perf_counter()
+    for offset in range(0, count, chunk_size):
+        rows = []
+        for i in range(offset, min(offset + chunk_size, count)):
+            words = rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=30)
+            if i % 10000 == 0:
+                words.append(rng.choice(RARE_WORDS))
+            rows.append({
+                "title": " ".join(rng.choices(TOPIC_WORDS, k=3)).capitalize(),
+                "content": " ".join(words) + ".",
+                "sentiment": rng.choice(SENTIMENTS),
+                "owner_id": OWNER_ID,
+            })
+        session.execute(insert(Note), rows)
+        session.commit()
+        print(f"  seeded {min(offset + chunk_size, count)} notes ({time.perf_counter() - start:.1f}s)")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+        print(f"Seeding {count} notes (search index maintained by triggers)")
+        seed(session, count)
+
+        print(f"\n{'query':<20} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'results':>8}")
+        for name, kwargs in QUERIES:
+            timings = []
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                results = search.search_notes(session, owner_id=OWNER_ID, limit=20, **kwargs)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{name:<20} {statistics.median(timings):>8.2f} {p95:>8.2f} {timings[-1]:>8.2f} {len(results):>8}")
+
+        session.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
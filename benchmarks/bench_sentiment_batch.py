@@ -0,0 +1,84 @@
+"""
+Compare single-note sentiment analysis with the batch pipeline.
+
+Seeds a temporary SQLite database with notes, analyzes them once by looping
+over crud.analyze_note_sentiment (one TextBlob and one commit per note) and
+once with crud.analyze_notes_sentiment_batch, and prints notes/sec for both.
+
+Usage:
+    python benchmarks/bench_sentiment_batch.py [number_of_notes]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base
+from app.database import crud
+from app.models.note import Note
+
+SAMPLE_TEXTS = [
+    "I love this product, it's amazing!",
+    "The service was excellent and the staff were very helpful.",
+    "This is terrible, I hate it.",
+    "The worst experience of my life, very disappointing.",
+    "The product arrived today.",
+    "I received the package yesterday.",
+]
+
+OWNER_ID = 1
+
+def seed(session, count):
+    rows = [
+        {
+            "title": f"Note {i}",
+            "content": f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} Entry number {i}.",
+            "owner_id": OWNER_ID,
+        }
+        for i in range(count)
+    ]
+    session.execute(insert(Note), rows)
+    session.commit()
+
+def reset(session):
+    session.execute(update(Note).values(sentiment=None))
+    session.commit()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        seed(session, count)
+        ids = [note_id for (note_id,) in session.query(Note.id).all()]
+
+        start = time.perf_counter()
+        for note_id in ids:
+            crud.analyze_note_sentiment(session, note_id, OWNER_ID)
+        single = time.perf_counter() - start
+
+        reset(session)
+
+        start = time.perf_counter()
+        result = crud.analyze_notes_sentiment_batch(session, OWNER_ID)
+        batch = time.perf_counter() - start
+
+        session.close()
+        engine.dispose()
+
+    print(f"Notes analyzed:   {count}")
+    print(f"Single-note loop: {single:.3f}s ({count / single:.1f} notes/sec)")
+    print(f"Batch pipeline:   {batch:.3f}s ({result['notes_per_second']:.1f} notes/sec)")
+    print(f"Speedup:          {single / batch:.1f}x")
+
+if __name__ == "__main__":
+    main()
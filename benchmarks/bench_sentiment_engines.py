@@ -0,0 +1,78 @@
+"""
+Accuracy vs. throughput of the sentiment engines.
+
+Scores a fixed, hand-labelled set of sentences with every registered engine
+and reports accuracy against the labels and agreement with the textblob
+engine. Throughput is measured on notes built deterministically from those
+sentences (1-12 per note), without the result cache.
+
+Usage:
+    python benchmarks/bench_sentiment_engines.py [number_of_notes]
+"""
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.engines import ENGINES, classify_polarity, get_engine
+
+LABELLED = [
+    ("I love this product, it's amazing!", "positive"),
+    ("The service was excellent and the staff were very helpful.", "positive"),
+    ("This is the best experience I've ever had.", "positive"),
+    ("I'm extremely satisfied with the quality of this item.", "positive"),
+    ("This is not bad at all.", "positive"),
+    ("Great meeting today, the team shipped the release early!", "positive"),
+    ("Lovely walk in the park with the kids :)", "positive"),
+    ("Really happy with how the presentation went.", "positive"),
+    ("This is terrible, I hate it.", "negative"),
+    ("The worst experience of my life, very disappointing.", "negative"),
+    ("Poor quality and bad customer service.", "negative"),
+    ("I regret buying this product, it's awful.", "negative"),
+    ("The build is broken again and nobody knows why :(", "negative"),
+    ("Horrible traffic, I was late and angry.", "negative"),
+    ("The food was cold and the waiter was rude.", "negative"),
+    ("Sad news about the project being cancelled.", "negative"),
+    ("The product arrived today.", "neutral"),
+    ("It is what it is.", "neutral"),
+    ("I received the package yesterday.", "neutral"),
+    ("The color is blue.", "neutral"),
+    ("Meeting moved to Thursday at 3pm.", "neutral"),
+    ("Buy milk, eggs and bread.", "neutral"),
+    ("Call the dentist to reschedule the appointment.", "neutral"),
+    ("This is okay, nothing special.", "neutral"),
+]
+
+def build_notes(count):
+    rng = random.Random(42)
+    sentences = [text for text, _ in LABELLED]
+    return [" ".join(rng.choice(sentences) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    logging.disable(logging.INFO)
+    notes = build_notes(count)
+    reference = get_engine("textblob")
+    reference_labels = [reference.classify(note) for note in notes]
+
+    print(f"{'engine':<10} {'accuracy':>9} {'agreement':>10} {'us/note':>9} {'notes/sec':>11}")
+    for name in sorted(ENGINES):
+        engine = get_engine(name)
+        engine.score("warm up")
+        correct = sum(engine.classify(text) == label for text, label in LABELLED)
+
+        start = time.perf_counter()
+        scores = engine.score_batch(notes)
+        elapsed = time.perf_counter() - start
+
+        agreement = sum(classify_polarity(score.polarity) == label for score, label in zip(scores, reference_labels))
+        print(
+            f"{name:<10} {correct / len(LABELLED):>9.1%} {agreement / count:>10.1%} "
+            f"{elapsed / count * 1e6:>9.1f} {count / elapsed:>11.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
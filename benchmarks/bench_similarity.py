@@ -0,0 +1,110 @@
+"""
+Semantic similarity benchmark.
+
+Seeds a temporary SQLite database with one user's notes (random words drawn
+from a Zipf-distributed vocabulary, with embeddings stored as create_note
+does), then times:
+
+- embed: embed_note per note
+- load index: reading the stored vectors into a fresh in-memory index
+- similar: a GET /notes/{id}/similar query (similarity.similar_notes)
+- semantic search: a free-text query (similarity.semantic_search)
+- index query only: the matrix-vector product and top-k selection
+- catch up: the first query after another process created a note
+
+Usage:
+    python benchmarks/bench_similarity.py [number_of_notes] [queries]
+"""
+import itertools
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OWNER_ID = 1
+
+def make_vocabulary(rng, size=20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+def median_ms(fn, repetitions):
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    logging.disable(logging.INFO)
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    from sqlalchemy import insert, text
+    from app.database import similarity
+    from app.database.database import SessionLocal, engine
+    from app.database.migrations import prepare_database
+    from app.ml.embeddings import EMBEDDING_DIMENSIONS, embed_note, embed_text, index_cache, to_blob
+    from app.models.note import Note
+    from app.models.note_embedding import NoteEmbedding
+
+    prepare_database(engine)
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+
+    db = SessionLocal()
+    db.execute(text("INSERT INTO users (id, username, email, hashed_password, is_active) VALUES (1, 'bench', 'bench@example.com', 'x', 1)"))
+    embed_seconds = 0.0
+    batch = 10000
+    for start in range(0, count, batch):
+        notes, embeddings = [], []
+        for i in range(start, min(start + batch, count)):
+            title = " ".join(rng.choices(vocabulary, cum_weights=weights, k=3))
+            content = " ".join(rng.choices(vocabulary, cum_weights=weights, k=rng.randint(10, 60)))
+            began = time.perf_counter()
+            vector = embed_note(title, content)
+            embed_seconds += time.perf_counter() - began
+            notes.append({"id": i + 1, "title": title, "content": content, "owner_id": OWNER_ID})
+            embeddings.append({"note_id": i + 1, "vector": to_blob(vector)})
+        db.execute(insert(Note), notes)
+        db.execute(insert(NoteEmbedding), embeddings)
+        db.commit()
+
+    start = time.perf_counter()
+    index = similarity.get_owner_index(db, OWNER_ID)
+    load_seconds = time.perf_counter() - start
+
+    note_ids = [rng.randint(1, count) for _ in range(queries)]
+    texts = [" ".join(rng.choices(vocabulary, cum_weights=weights, k=5)) for _ in range(queries)]
+    vectors = [embed_text(query) for query in texts]
+    it = iter(range(10 ** 9))
+
+    print(f"{count} notes, {EMBEDDING_DIMENSIONS} dimensions, {EMBEDDING_DIMENSIONS * 4 * count / 2 ** 20:.0f} MB of vectors")
+    print(f"{'operation':<22} {'ms':>10}")
+    print(f"{'embed (per note)':<22} {embed_seconds / count * 1000:>10.3f}")
+    print(f"{'load index':<22} {load_seconds * 1000:>10.0f}")
+    print(f"{'index query only':<22} {median_ms(lambda: index.query(vectors[next(it) % queries], 10), queries):>10.1f}")
+    print(f"{'similar':<22} {median_ms(lambda: similarity.similar_notes(db, note_ids[next(it) % queries], OWNER_ID), queries):>10.1f}")
+    print(f"{'semantic search':<22} {median_ms(lambda: similarity.semantic_search(db, texts[next(it) % queries], OWNER_ID), queries):>10.1f}")
+
+    def create_elsewhere():
+        # A note written by another process: stored, but not added to this index
+        db.execute(insert(Note), [{"title": "Elsewhere", "content": " ".join(rng.choices(vocabulary, cum_weights=weights, k=20)), "owner_id": OWNER_ID}])
+        db.commit()
+        start = time.perf_counter()
+        similarity.get_owner_index(db, OWNER_ID)
+        return (time.perf_counter() - start) * 1000
+    print(f"{'catch up':<22} {statistics.median(create_elsewhere() for _ in range(5)):>10.1f}")
+    index_cache.clear()
+    db.close()
+
+if __name__ == "__main__":
+    main()
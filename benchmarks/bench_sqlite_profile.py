@@ -0,0 +1,106 @@
+"""
+Mixed read/write benchmark of the SQLite engine profiles.
+
+For each DATABASE_PROFILE a fresh on-disk database is seeded with notes,
+then reader threads page through GET /notes/-style keyset queries while
+writer threads create notes and analyze their sentiment through the crud
+layer. Operations/sec, p50/p99 latency and failed operations (e.g.
+"database is locked") are printed per profile and operation type.
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py [readers] [writers] [seconds]
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import crud
+from app.database.database import Base, create_database_engine
+from app.models.schemas import NoteCreate
+
+OWNER_ID = 1
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def reader(SessionLocal, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            notes, cursor = crud.get_notes_page(db, OWNER_ID, limit=20)
+            if cursor:
+                crud.get_notes_page(db, OWNER_ID, limit=20, cursor=cursor)
+        except (HTTPException, OperationalError) as e:
+            errors.append(str(e))
+        finally:
+            db.close()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+def writer(SessionLocal, deadline, latencies, errors, seed):
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            note = crud.create_note(db, NoteCreate(title=f"Writer {seed}", content=f"Benchmark note {seed}-{i} is great."), OWNER_ID)
+            crud.analyze_note_sentiment(db, note.id, OWNER_ID)
+        except (HTTPException, OperationalError) as e:
+            errors.append(str(e))
+        finally:
+            db.close()
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+def run(profile, readers, writers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_database_engine(f"sqlite:///{tmp}/bench.db", profile)
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        db = SessionLocal()
+        for i in range(500):
+            crud.create_note(db, NoteCreate(title=f"Seed {i}", content="Seed note content for reading."), OWNER_ID)
+        db.close()
+
+        results = {"read": ([], []), "write": ([], [])}
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=reader, args=(SessionLocal, deadline, *results["read"]))
+                   for _ in range(readers)]
+        threads += [threading.Thread(target=writer, args=(SessionLocal, deadline, *results["write"], n))
+                    for n in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    for op, (latencies, errors) in results.items():
+        print(f"{profile:<8} {op:<6} {len(latencies):>7} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 0.50):>9.1f} {percentile(latencies, 0.99):>9.1f} {len(errors):>7}")
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    logging.disable(logging.WARNING)
+
+    print(f"{'profile':<8} {'op':<6} {'ops':>7} {'ops/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for profile in ("default", "tuned"):
+        run(profile, readers, writers, seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""
+Reproducible load-test and microbenchmark suite with JSON output.
+
+Subcommands:
+
+- seed: create a SQLite database with N users and M notes. Contents,
+  timestamps and ownership are derived from --seed, so the same arguments
+  always produce the same data.
+- run: drive the real app through scenarios (login, list at a deep page by
+  cursor and by offset, create, analyze). Each scenario runs for a fixed
+  time with closed-loop concurrent clients, either in-process over ASGI,
+  against a local uvicorn server, or against the pre-forking production
+  server (app.server) with --workers processes. Reports p50/p95/p99/max latency, req/s and
+  error counts per scenario.
+- micro: time analyze_sentiment (per engine, uncached), crud.get_notes at a
+  shallow and a deep offset, and bcrypt hashing and verification in isolation.
+- compare: diff two result files and exit with status 1 when a result got
+  slower than --threshold percent at p95 or in throughput.
+
+Results are written as JSON (--output, or stdout) together with the commit,
+Python version and CPU count, so runs on two commits can be compared:
+
+    python benchmarks/bench_suite.py run --output before.json
+    git checkout other-commit
+    python benchmarks/bench_suite.py run --output after.json
+    python benchmarks/bench_suite.py compare before.json after.json
+
+Usage:
+    python benchmarks/bench_suite.py seed --db bench.db [--users 10] [--notes 100000]
+    python benchmarks/bench_suite.py run [--db bench.db] [--transport asgi|uvicorn|server] [--workers N] [--scenarios login,list_deep,...]
+                                         [--concurrency 8] [--duration 10] [--output results.json]
+    python benchmarks/bench_suite.py micro [--db bench.db] [--output micro.json]
+    python benchmarks/bench_suite.py compare before.json after.json [--threshold 10]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import httpx
+
+PASSWORD = "benchpassword"
+SENTENCES = [
+    "I love this product, it's amazing!",
+    "The meeting was long and boring.",
+    "Call the dentist to reschedule the appointment.",
+    "What a terrible, horrible day :(",
+    "Lovely walk in the park with the kids.",
+    "The build is broken again and nobody knows why.",
+    "Buy milk, eggs and bread.",
+    "Great progress on the release today.",
+]
+SCENARIOS = ["login", "list_deep", "list_deep_offset", "create", "analyze"]
+PAGE_SIZE = 50
+
+# The app reads DATABASE_URL and the worker settings when it is imported, so
+# app modules are only imported after main() has set them
+def configure_app(db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SENTIMENT_WORKERS", "0")
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def summarize(latencies_ms, elapsed, errors=0):
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "per_sec": len(latencies_ms) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": sum(latencies_ms) / len(latencies_ms) if latencies_ms else 0.0,
+        "p50_ms": percentile(latencies_ms, 0.50),
+        "p95_ms": percentile(latencies_ms, 0.95),
+        "p99_ms": percentile(latencies_ms, 0.99),
+        "max_ms": max(latencies_ms, default=0.0),
+    }
+
+def metadata(args, **extra):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "command": args.command,
+        **extra,
+    }
+
+def write_results(results, output):
+    body = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w") as out:
+            out.write(body + "\n")
+    else:
+        print(body)
+
+def print_table(results):
+    print(f"{'name':<28} {'requests':>9} {'per sec':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}", file=sys.stderr)
+    for name, stats in results.items():
+        print(
+            f"{name:<28} {stats['requests']:>9} {stats['per_sec']:>9.1f} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['errors']:>7}",
+            file=sys.stderr,
+        )
+
+# Seeding
+def seed_database(users, notes, seed=42):
+    """
+    Fill the configured database with bench users and notes; returns the seeding time.
+    """
+    import app.main  # noqa: F401  Creates the schema, triggers and indexes
+    from sqlalchemy import insert
+    from app.api.auth import get_password_hash
+    from app.database.database import engine
+    from app.models.user import User
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    # One bcrypt hash shared by every user keeps seeding fast; logins still pay the full cost
+    hashed_password = get_password_hash(PASSWORD)
+    base = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"username": f"bench{i}", "email": f"bench{i}@example.com", "hashed_password": hashed_password, "is_active": True}
+            for i in range(users)
+        ])
+        owner_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM users WHERE username LIKE 'bench%' ORDER BY id")]
+        for offset in range(0, notes, 10000):
+            rows = []
+            for i in range(offset, min(offset + 10000, notes)):
+                content = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 8))) + f" (#{i})"
+                created_at = (base + timedelta(seconds=i * 30)).strftime("%Y-%m-%d %H:%M:%S")
+                rows.append((f"Note {i}", content, owner_ids[i % len(owner_ids)], created_at))
+            conn.exec_driver_sql("INSERT INTO notes (title, content, owner_id, created_at) VALUES (?, ?, ?, ?)", rows)
+    engine.dispose()
+    return time.perf_counter() - start
+
+def ensure_seeded(args):
+    """
+    Seed --db if it has no bench users yet (or a temporary database without --db).
+    """
+    import sqlite3
+
+    if os.path.exists(args.db):
+        with sqlite3.connect(args.db) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if "users" in tables and conn.execute("SELECT 1 FROM users WHERE username LIKE 'bench%'").fetchone():
+                return
+    elapsed = seed_database(args.users, args.notes, args.seed)
+    print(f"Seeded {args.users} users and {args.notes} notes in {elapsed:.1f}s", file=sys.stderr)
+
+def bench_fixture(db_path, depth):
+    """
+    Read the bench users and, for the first one, note IDs and the cursor of the page at `depth`.
+    """
+    import sqlite3
+    from app.database.pagination import encode_cursor
+
+    with sqlite3.connect(db_path) as conn:
+        users = [row[0] for row in conn.execute("SELECT username FROM users WHERE username LIKE 'bench%' ORDER BY id")]
+        owner_id = conn.execute("SELECT id FROM users WHERE username = ?", (users[0],)).fetchone()[0]
+        note_ids = [row[0] for row in conn.execute("SELECT id FROM notes WHERE owner_id = ? ORDER BY id", (owner_id,))]
+        depth = min(depth, max(len(note_ids) - PAGE_SIZE, 0))
+        row = conn.execute(
+            "SELECT created_at, id FROM notes WHERE owner_id = ? ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+            (owner_id, max(depth - 1, 0)),
+        ).fetchone()
+    cursor = encode_cursor(row[0], row[1]) if row is not None and depth else None
+    return users, note_ids, cursor, depth
+
+# Scenarios
+def build_scenarios(users, note_ids, cursor, depth, headers):
+    rng = random.Random(7)
+    counter = iter(range(10 ** 9))
+
+    def login():
+        username = rng.choice(users)
+        return "POST", "/users/login", {"json": {"username": username, "password": PASSWORD}}
+
+    def list_deep():
+        params = {"limit": PAGE_SIZE}
+        if cursor:
+            params["cursor"] = cursor
+        return "GET", "/notes/", {"params": params, "headers": headers}
+
+    def list_deep_offset():
+        return "GET", "/notes/", {"params": {"limit": PAGE_SIZE, "skip": depth}, "headers": headers}
+
+    def create():
+        i = next(counter)
+        content = " ".join(rng.choice(SENTENCES) for _ in range(3)) + f" (bench create {i})"
+        return "POST", "/notes/", {"json": {"title": f"Bench {i}", "content": content}, "headers": headers}
+
+    def analyze():
+        return "GET", f"/notes/{rng.choice(note_ids)}/analyze", {"headers": headers}
+
+    return {"login": login, "list_deep": list_deep, "list_deep_offset": list_deep_offset, "create": create, "analyze": analyze}
+
+async def client_loop(client, make_request, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        method, url, kwargs = make_request()
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+
+async def run_scenarios(client, args):
+    users, note_ids, cursor, depth = bench_fixture(args.db, args.depth)
+    response = await client.post("/users/login", json={"username": users[0], "password": PASSWORD})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    scenarios = build_scenarios(users, note_ids, cursor, depth, headers)
+
+    results = {}
+    for name in args.scenarios:
+        # Warm up caches and connections before measuring
+        for _ in range(args.warmup):
+            method, url, kwargs = scenarios[name]()
+            await client.request(method, url, **kwargs)
+        latencies, errors = [], []
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*[
+            client_loop(client, scenarios[name], deadline, latencies, errors) for _ in range(args.concurrency)
+        ])
+        results[name] = summarize(latencies, time.perf_counter() - start, len(errors))
+    return results, depth
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_until_ready(client, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+async def run_asgi(args):
+    from app.main import app
+    from app.ml.engines import warm_up
+
+    # httpx does not run the lifespan, so load the models here
+    warm_up()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        return await run_scenarios(client, args)
+
+async def run_uvicorn(args):
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    if args.transport == "server":
+        command = [sys.executable, "-m", "app.server", "--workers", str(args.workers), "--port", str(port),
+                   "--host", "127.0.0.1", "--log-level", "warning"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    with tempfile.TemporaryDirectory() as workdir:
+        server = subprocess.Popen(
+            command,
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+                await wait_until_ready(client)
+                return await run_scenarios(client, args)
+        finally:
+            server.terminate()
+            server.wait()
+
+def command_seed(args):
+    elapsed = seed_database(args.users, args.notes, args.seed)
+    print(f"Seeded {args.users} users and {args.notes} notes into {args.db} in {elapsed:.1f}s", file=sys.stderr)
+
+def command_run(args):
+    ensure_seeded(args)
+    run = run_asgi if args.transport == "asgi" else run_uvicorn
+    results, depth = asyncio.run(run(args))
+    print_table(results)
+    write_results({
+        "meta": metadata(
+            args, transport=args.transport, workers=args.workers if args.transport == "server" else 1,
+            concurrency=args.concurrency, duration=args.duration,
+            page_depth=depth, page_size=PAGE_SIZE,
+        ),
+        "results": results,
+    }, args.output)
+
+def time_calls(fn, iterations):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    return summarize(latencies, time.perf_counter() - start)
+
+def command_micro(args):
+    ensure_seeded(args)
+    from app.database import crud
+    from app.api.auth import get_password_hash, verify_password
+    from app.database.database import SessionLocal
+    from app.ml.engines import ENGINES, warm_up
+    from app.ml.sentiment import analyze_sentiment
+
+    warm_up(list(ENGINES))
+    rng = random.Random(args.seed)
+    texts = [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 8))) for _ in range(1000)]
+    results = {}
+    for name in sorted(ENGINES):
+        samples = iter(texts * (args.iterations // len(texts) + 1))
+        results[f"analyze_sentiment[{name}]"] = time_calls(
+            lambda: analyze_sentiment(next(samples), use_cache=False, engine=name), args.iterations
+        )
+
+    users, _, _, depth = bench_fixture(args.db, args.depth)
+    db = SessionLocal()
+    try:
+        owner_id = crud.get_user_by_username(db, users[0]).id
+        for skip in (0, depth):
+            results[f"crud.get_notes[skip={skip}]"] = time_calls(
+                lambda: crud.get_notes(db, owner_id, skip=skip, limit=PAGE_SIZE), max(args.iterations // 10, 10)
+            )
+    finally:
+        db.close()
+
+    hashed_password = get_password_hash(PASSWORD)
+    results["password_hash"] = time_calls(lambda: get_password_hash(PASSWORD), args.hash_iterations)
+    results["password_verify"] = time_calls(lambda: verify_password(PASSWORD, hashed_password), args.hash_iterations)
+
+    print_table(results)
+    write_results({"meta": metadata(args, page_depth=depth, page_size=PAGE_SIZE), "results": results}, args.output)
+
+def command_compare(args):
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before, after = json.load(before_file)["results"], json.load(after_file)["results"]
+
+    regressions = []
+    print(f"{'name':<28} {'p50':>9} {'p95':>9} {'p99':>9} {'per sec':>9}")
+    for name in before:
+        if name not in after:
+            continue
+        changes = {
+            key: (after[name][key] - before[name][key]) / before[name][key] * 100 if before[name][key] else 0.0
+            for key in ("p50_ms", "p95_ms", "p99_ms", "per_sec")
+        }
+        print(f"{name:<28} " + " ".join(f"{changes[key]:>+8.1f}%" for key in ("p50_ms", "p95_ms", "p99_ms", "per_sec")))
+        if changes["p95_ms"] > args.threshold or changes["per_sec"] < -args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"Regressions over {args.threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load tests and microbenchmarks with JSON results")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_data_arguments(subparser):
+        subparser.add_argument("--db", help="SQLite database file; seeded when it has no bench users (default: a temporary file)")
+        subparser.add_argument("--users", type=int, default=10)
+        subparser.add_argument("--notes", type=int, default=100000)
+        subparser.add_argument("--seed", type=int, default=42)
+        subparser.add_argument("--depth", type=int, default=5000, help="notes skipped before the deep page")
+        subparser.add_argument("--output", help="write JSON results here instead of stdout")
+
+    seed = subparsers.add_parser("seed", help="create a bench database")
+    add_data_arguments(seed)
+
+    run = subparsers.add_parser("run", help="run load-test scenarios against the app")
+    add_data_arguments(run)
+    run.add_argument("--transport", choices=["asgi", "uvicorn", "server"], default="asgi")
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes of --transport server")
+    run.add_argument("--scenarios", type=lambda value: value.split(","), default=SCENARIOS)
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    run.add_argument("--warmup", type=int, default=20, help="requests per scenario before measuring")
+
+    micro = subparsers.add_parser("micro", help="run isolated microbenchmarks")
+    add_data_arguments(micro)
+    micro.add_argument("--iterations", type=int, default=2000)
+    micro.add_argument("--hash-iterations", type=int, default=10)
+
+    compare = subparsers.add_parser("compare", help="compare two result files")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    compare.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+
+    args = parser.parse_args()
+    if args.command == "seed" and args.db is None:
+        parser.error("seed needs --db")
+    if args.command == "compare":
+        command_compare(args)
+        return
+    if args.command == "run":
+        unknown = [name for name in args.scenarios if name not in SCENARIOS]
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db is None:
+            args.db = os.path.join(tmp, "bench.db")
+        args.db = os.path.abspath(args.db)
+        configure_app(args.db)
+        {"seed": command_seed, "run": command_run, "micro": command_micro}[args.command](args)
+
+if __name__ == "__main__":
+    main()
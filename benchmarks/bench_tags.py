@@ -0,0 +1,120 @@
+"""
+Tag extraction and tag lookup benchmark.
+
+Builds notes deterministically from a set of note-like sentences (1-12 per
+note) and times, per note and engine:
+
+- score only: sentiment as before tagging existed
+- analyze + tags: one tokenization shared by sentiment and tag extraction
+- score + retokenize: sentiment, then tags from a second tokenization
+
+It then stores the tags of one user's notes in a temporary SQLite database
+and times a page of GET /notes?tag= for a common and a rare tag, and
+GET /tags.
+
+Usage:
+    python benchmarks/bench_tags.py [number_of_notes] [stored_notes]
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OWNER_ID = 1
+
+SENTENCES = [
+    "The new project manager presented the quarterly budget review.",
+    "I love the machine learning roadmap, but the database migration plan is not great!",
+    "Call Sarah about the API rate limits before Friday.",
+    "Buy tomatoes, basil and fresh bread for the dinner party.",
+    "The build is broken again and nobody knows why :(",
+    "Lovely walk in the park with the kids and the dog.",
+    "Horrible traffic on the highway, I was late for the dentist appointment.",
+    "Great meeting today, the team shipped the release early!",
+    "Remember to renew the car insurance and compare quotes.",
+    "The hotel room was small but the breakfast buffet was excellent.",
+    "Read the chapter on distributed systems and write a short summary.",
+    "Sad news about the marketing campaign being cancelled.",
+]
+
+def build_notes(count):
+    rng = random.Random(42)
+    return [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+
+def per_note_ms(fn, notes):
+    start = time.perf_counter()
+    for note in notes:
+        fn(note)
+    return (time.perf_counter() - start) / len(notes) * 1000
+
+def median_ms(fn, repetitions=50):
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    stored = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    logging.disable(logging.INFO)
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    from sqlalchemy import insert, text
+    from app.database import crud, tags
+    from app.database.database import SessionLocal, engine
+    from app.database.migrations import prepare_database
+    from app.ml.engines import ENGINES, warm_up
+    from app.ml.keywords import extract_tags
+    from app.models.note import Note
+
+    warm_up(list(ENGINES))
+    notes = build_notes(count)
+    print(f"{count} notes, ms per note")
+    print(f"{'engine':<10} {'score only':>11} {'analyze + tags':>15} {'score + retokenize':>19}")
+    for name, sentiment_engine in sorted(ENGINES.items()):
+        score_only = per_note_ms(sentiment_engine.score, notes)
+        shared = per_note_ms(lambda note: extract_tags(sentiment_engine.analyze(note)[1]), notes)
+        twice = per_note_ms(lambda note: (sentiment_engine.score(note), extract_tags(sentiment_engine.tokenize(note))), notes)
+        print(f"{name:<10} {score_only:>11.3f} {shared:>15.3f} {twice:>19.3f}")
+
+    prepare_database(engine)
+    db = SessionLocal()
+    db.execute(text("INSERT INTO users (id, username, email, hashed_password, is_active) VALUES (1, 'bench', 'bench@example.com', 'x', 1)"))
+    # Tags depend only on the sentences, so extract them once per distinct note text
+    contents = build_notes(min(stored, 5000))
+    extracted = {content: extract_tags(ENGINES["lexicon"].tokenize(content)) for content in set(contents)}
+    # About 20 notes also carry a rare tag
+    rare_every = max(stored // 20, 1)
+    batch = 5000
+    for start in range(0, stored, batch):
+        rows = [
+            {"id": i + 1, "title": "Bench", "content": contents[i % len(contents)], "owner_id": OWNER_ID}
+            for i in range(start, min(start + batch, stored))
+        ]
+        db.execute(insert(Note), rows)
+        tags.set_note_tags(db, {
+            row["id"]: extracted[row["content"]] + (["rare tag"] if row["id"] % rare_every == 0 else [])
+            for row in rows
+        })
+        db.commit()
+
+    counts = {tag["tag"]: tag["count"] for tag in tags.get_tag_counts(db, OWNER_ID, limit=1000)}
+    common = max(counts, key=counts.get)
+    print(f"\n{stored} stored notes, {len(counts)} distinct tags")
+    print(f"{'operation':<40} {'ms':>8}")
+    print(f"{'GET /tags':<40} {median_ms(lambda: tags.get_tag_counts(db, OWNER_ID)):>8.1f}")
+    for tag in (common, "rare tag"):
+        label = f"GET /notes?tag={tag} ({counts[tag]} notes)"
+        print(f"{label:<40} {median_ms(lambda: crud.get_note_dicts_page(db, OWNER_ID, ('id', 'title'), limit=20, tag=tag)):>8.1f}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
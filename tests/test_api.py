@@ -1,3 +1,4 @@
+import json
 import os
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -9,6 +10,7 @@ os.makedirs("./data", exist_ok=True)
 
 # Import app after ensuring data directory exists
 from app.main import app
+from app.ml.engines import warm_up
 from app.database.database import Base, get_db
 import os
 
@@ -38,11 +40,13 @@ def override_get_db():
         db.close()
 
 # Override the authentication dependency for testing
-from app.api.auth import get_current_active_user
+from app.api.auth import get_current_active_user, UserSnapshot
 
 # Create a mock user for testing
+test_user = UserSnapshot(id=1, username="testuser", email="test@example.com", is_active=True)
+
 async def override_get_current_active_user():
-    return {"id": 1, "username": "testuser", "email": "test@example.com", "is_active": True}
+    return test_user
 
 app.dependency_overrides[get_db] = override_get_db
 app.dependency_overrides[get_current_active_user] = override_get_current_active_user
@@ -68,6 +72,15 @@ def test_read_main():
     assert response.status_code == 200
     assert "Welcome to the AI-Powered Notes API" in response.json()["message"]
 
+def test_readiness_after_warm_up():
+    """Test that the readiness endpoint reports loaded models."""
+    warm_up()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ready"] is True
+    assert "textblob" in data["engines"]
+
 def test_create_note():
     """Test creating a note."""
     response = client.post("/notes/", json=test_note, headers=headers)
@@ -110,6 +123,17 @@ def test_analyze_note():
     assert "sentiment" in data
     assert data["sentiment"] in ["positive", "neutral", "negative"]
 
+def test_analyze_note_with_engine():
+    """Test picking the sentiment engine per request."""
+    test_create_note()
+    
+    response = client.get(f"/notes/{created_note_id}/analyze?engine=lexicon", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["sentiment"] in ["positive", "neutral", "negative"]
+    
+    response = client.get(f"/notes/{created_note_id}/analyze?engine=missing", headers=headers)
+    assert response.status_code == 400
+
 def test_invalid_api_key():
     """Test that invalid API key is rejected."""
     # The root endpoint doesn't require API key authentication
@@ -127,4 +151,638 @@ def test_validation_error():
         "content": "Too short"  # Content less than 10 chars should fail
     }
     response = client.post("/notes/", json=invalid_note, headers=headers)
-    assert response.status_code == 422  # Unprocessable Entity
\ No newline at end of file
+    assert response.status_code == 422  # Unprocessable Entity
+
+def test_batch_analyze_notes():
+    """Test analyzing several notes in one request."""
+    first = client.post("/notes/", json=test_note, headers=headers).json()
+    second = client.post("/notes/", json={
+        "title": "Happy Note",
+        "content": "I love this product, it's amazing!"
+    }, headers=headers).json()
+    
+    response = client.post("/notes/analyze", json={"note_ids": [first["id"], second["id"], 999999]}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["analyzed"] == 2
+    assert data["not_found"] == [999999]
+    sentiments = {result["id"]: result["sentiment"] for result in data["results"]}
+    assert sentiments[second["id"]] == "positive"
+    assert data["notes_per_second"] >= 0
+    
+    # Analyzed notes keep their sentiment
+    response = client.get(f"/notes/{second['id']}", headers=headers)
+    assert response.json()["sentiment"] == "positive"
+
+def test_batch_analyze_all_unanalyzed():
+    """Test backfilling sentiment for every unanalyzed note."""
+    client.post("/notes/", json=test_note, headers=headers)
+    response = client.post("/notes/analyze", json={"all_unanalyzed": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["analyzed"] >= 1
+    
+    # Nothing is left to analyze afterwards
+    response = client.post("/notes/analyze", json={"all_unanalyzed": True}, headers=headers)
+    assert response.json()["analyzed"] == 0
+
+def test_batch_analyze_requires_selection():
+    """Test that a batch request must select notes."""
+    response = client.post("/notes/analyze", json={}, headers=headers)
+    assert response.status_code == 400
+
+def test_analysis_job_queue():
+    """Test queueing analysis on create and draining the job queue."""
+    from app.ml.worker import run_pending_jobs
+    
+    response = client.post("/notes/?analyze=true", json={
+        "title": "Queued Note",
+        "content": "I love this product, it's amazing!"
+    }, headers=headers)
+    assert response.status_code == 201
+    job_id = int(response.headers["X-Analysis-Job-Id"])
+    
+    response = client.get(f"/jobs/{job_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    
+    # Drain the queue inline, as a worker process would
+    db = TestingSessionLocal()
+    try:
+        assert run_pending_jobs(db) >= 1
+    finally:
+        db.close()
+    
+    data = client.get(f"/jobs/{job_id}", headers=headers).json()
+    assert data["status"] == "completed"
+    assert data["sentiment"] == "positive"
+    note_id = data["note_id"]
+    assert client.get(f"/notes/{note_id}", headers=headers).json()["sentiment"] == "positive"
+    assert note_id in [note["id"] for note in client.get("/notes/", params={"tag": "product"}, headers=headers).json()]
+
+def test_delete_note_drops_its_jobs():
+    """Test that deleting a note removes its queued jobs and discards running ones."""
+    from app.database import crud
+    from app.models.job import AnalysisJob
+    from app.ml.sentiment import analyze_texts_batch
+    
+    queued = client.post("/notes/?analyze=true", json=test_note, headers=headers)
+    job_id = int(queued.headers["X-Analysis-Job-Id"])
+    db = TestingSessionLocal()
+    try:
+        running = crud.enqueue_analysis_job(db, queued.json()["id"], owner_id=1).id
+        db.query(AnalysisJob).filter(AnalysisJob.id == running).update({"status": "running"})
+        db.commit()
+        assert client.delete(f"/notes/{queued.json()['id']}", headers=headers).status_code == 204
+        assert db.query(AnalysisJob).filter(AnalysisJob.id.in_([job_id, running])).count() == 0
+        
+        # A worker finishing the running job must not touch a note that reuses the ID
+        reused = client.post("/notes/", json={"title": "Reused", "content": "Something else entirely, written later."}, headers=headers).json()
+        assert reused["id"] == queued.json()["id"]
+        analysis = analyze_texts_batch(["I love this product, it's amazing!"])[0]
+        assert crud.complete_analysis_jobs(db, [(running, reused["id"], analysis)]) == []
+    finally:
+        db.close()
+    assert client.get(f"/notes/{reused['id']}", headers=headers).json()["sentiment"] is None
+
+def test_create_job_for_missing_note():
+    """Test that jobs cannot be queued for unknown notes."""
+    response = client.post("/jobs/", json={"note_id": 999999}, headers=headers)
+    assert response.status_code == 404
+    response = client.get("/jobs/999999", headers=headers)
+    assert response.status_code == 404
+
+def test_reanalysis_uses_cache():
+    """Test that re-analyzing an unchanged note is served from the cache."""
+    response = client.post("/notes/", json={
+        "title": "Cached Note",
+        "content": "The service was excellent and the staff were very helpful."
+    }, headers=headers)
+    note_id = response.json()["id"]
+    
+    first = client.get(f"/notes/{note_id}/analyze", headers=headers).json()
+    hits = client.get("/sentiment/cache", headers=headers).json()["hits"]
+    second = client.get(f"/notes/{note_id}/analyze", headers=headers).json()
+    
+    assert second["sentiment"] == first["sentiment"]
+    assert client.get("/sentiment/cache", headers=headers).json()["hits"] == hits + 1
+
+def test_long_note_chunk_scores():
+    """Test that long notes are analyzed in windows whose scores can be read back."""
+    content = "The meeting was fine and we planned next week. " * 200 + "\n\n" + "This was a terrible, horrible, awful mess. " * 100
+    response = client.post("/notes/", json={"title": "Long Note", "content": content}, headers=headers)
+    note_id = response.json()["id"]
+    
+    assert client.get(f"/notes/{note_id}/analyze", headers=headers).status_code == 200
+    response = client.get(f"/notes/{note_id}/chunks?order=impact&limit=3", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["partial"] is False
+    assert len(data["chunks"]) == 3
+    assert data["chunks"][0]["sentiment"] == "negative"
+    assert "terrible" in data["chunks"][0]["excerpt"]
+    
+    assert client.get("/notes/999999/chunks", headers=headers).status_code == 404
+
+def test_long_note_cut_short_is_not_cached(monkeypatch):
+    """Test that a chunked analysis stopped by the budget is redone, not served from the cache."""
+    from app.ml import sentiment
+    from app.ml.chunking import analyze_chunks
+    content = "The launch went well and the team is proud of it. " * 300
+    note_id = client.post("/notes/", json={"title": "Budget Note", "content": content}, headers=headers).json()["id"]
+    
+    monkeypatch.setattr(sentiment, "analyze_chunks", lambda text, engine: analyze_chunks(text, engine, budget=0))
+    assert client.get(f"/notes/{note_id}/analyze", headers=headers).status_code == 200
+    assert client.get(f"/notes/{note_id}/chunks", headers=headers).json()["partial"] is True
+    hits = client.get("/sentiment/cache", headers=headers).json()["hits"]
+    assert client.get(f"/notes/{note_id}/analyze", headers=headers).status_code == 200
+    assert client.get("/sentiment/cache", headers=headers).json()["hits"] == hits
+    assert sentiment.score_sentiment(content) == sentiment.score_sentiment(content)
+    assert client.get("/sentiment/cache", headers=headers).json()["hits"] == hits
+    
+    monkeypatch.undo()
+    assert client.get(f"/notes/{note_id}/analyze", headers=headers).json()["sentiment"] == "positive"
+    assert client.get(f"/notes/{note_id}/chunks", headers=headers).json()["partial"] is False
+
+def test_note_stats():
+    """Test sentiment analytics over stored scores, including re-thresholding."""
+    stats_user = UserSnapshot(id=3, username="statsuser", email="stats@example.com", is_active=True)
+    app.dependency_overrides[get_current_active_user] = lambda: stats_user
+    try:
+        for content in ("I love this product, it's amazing!", "This is terrible, I hate it.", "The product arrived today."):
+            client.post("/notes/", json={"title": "Stats", "content": content}, headers=headers)
+        assert client.post("/notes/analyze", json={"all_unanalyzed": True}, headers=headers).json()["analyzed"] == 3
+        assert all(note["polarity"] is not None for note in client.get("/notes/", headers=headers).json())
+        client.post("/notes/", json={"title": "Stats", "content": "Not analyzed yet, no score."}, headers=headers)
+        
+        response = client.get("/notes/stats", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["total"], data["scored"]) == (4, 3)
+        assert data["distribution"] == {"positive": 1, "neutral": 1, "negative": 1, "unanalyzed": 1}
+        assert sum(bin["count"] for bin in data["polarity_histogram"]) == 3
+        assert len(data["subjectivity_histogram"]) == 10
+        assert sum(day["notes"] for day in data["daily"]) == 3
+        
+        # Other thresholds reclassify the stored scores
+        data = client.get("/notes/stats", params={"positive_threshold": 0.9, "negative_threshold": -0.9, "bins": 4}, headers=headers).json()
+        assert data["distribution"]["neutral"] == 3
+        assert len(data["polarity_histogram"]) == 4
+        assert client.get("/notes/stats", params={"positive_threshold": -0.5}, headers=headers).status_code == 400
+    finally:
+        app.dependency_overrides[get_current_active_user] = override_get_current_active_user
+
+def test_cursor_pagination():
+    """Test walking the note listing with keyset cursors."""
+    for i in range(5):
+        client.post("/notes/", json={"title": f"Page Note {i}", "content": test_note["content"]}, headers=headers)
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/notes/", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(note["id"] for note in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    
+    # Every note appears exactly once, newest first
+    assert len(seen) == len(set(seen))
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(client.get("/notes/", params={"limit": 1000}, headers=headers).json())
+
+def test_read_notes_field_projection():
+    """Test the fast listing path with and without a field projection."""
+    client.post("/notes/", json=test_note, headers=headers)
+    response = client.get("/notes/", params={"limit": 1}, headers=headers)
+    assert response.status_code == 200
+    note = response.json()[0]
+    assert set(note) == {"id", "title", "content", "created_at", "updated_at", "sentiment", "polarity", "subjectivity"}
+    assert client.get(f"/notes/{note['id']}", headers=headers).json() == note
+    
+    response = client.get("/notes/", params={"fields": "id,title,sentiment", "limit": 2}, headers=headers)
+    assert all(list(note) == ["id", "title", "sentiment"] for note in response.json())
+    assert "X-Next-Cursor" in response.headers
+    
+    response = client.get("/notes/", params={"fields": "title,owner_id"}, headers=headers)
+    assert response.status_code == 400
+
+def test_conditional_get_note():
+    """Test ETag and Last-Modified handling for a single note."""
+    note_id = client.post("/notes/", json=test_note, headers=headers).json()["id"]
+    response = client.get(f"/notes/{note_id}", headers=headers)
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+    
+    response = client.get(f"/notes/{note_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    
+    response = client.get(f"/notes/{note_id}", headers={**headers, "If-Modified-Since": response.headers["Last-Modified"]})
+    assert response.status_code == 304
+    
+    # Any update, including a sentiment written by analysis, changes the ETag
+    client.get(f"/notes/{note_id}/analyze", headers=headers)
+    response = client.get(f"/notes/{note_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_conditional_get_reused_note_id():
+    """Test that a note created under a deleted note's ID does not match its ETag."""
+    note_id = client.post("/notes/", json=test_note, headers=headers).json()["id"]
+    etag = client.get(f"/notes/{note_id}", headers=headers).headers["ETag"]
+    client.delete(f"/notes/{note_id}", headers=headers)
+    
+    other = client.post("/notes/", json={"title": "Other Note", "content": "Different content."}, headers=headers).json()
+    assert other["id"] == note_id
+    response = client.get(f"/notes/{note_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Other Note"
+
+def test_conditional_get_notes_listing():
+    """Test that listing ETags change with the user's notes and the page requested."""
+    response = client.get("/notes/", params={"limit": 5}, headers=headers)
+    etag = response.headers["ETag"]
+    
+    response = client.get("/notes/", params={"limit": 5}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    
+    other_page = client.get("/notes/", params={"limit": 6}, headers={**headers, "If-None-Match": etag})
+    assert other_page.status_code == 200
+    
+    client.post("/notes/", json=test_note, headers=headers)
+    response = client.get("/notes/", params={"limit": 5}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_invalid_cursor():
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/notes/", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+def test_search_notes():
+    """Test full-text search with ranking, snippets and filters."""
+    client.post("/notes/", json={
+        "title": "Garden planning",
+        "content": "Plant tomatoes and basil along the sunny fence this spring."
+    }, headers=headers)
+    response = client.post("/notes/", json={
+        "title": "Shopping list",
+        "content": "Buy tomatoes, bread and coffee for the weekend."
+    }, headers=headers)
+    client.get(f"/notes/{response.json()['id']}/analyze", headers=headers)
+    
+    response = client.get("/notes/search", params={"q": "tomatoes"}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert {"Garden planning", "Shopping list"} <= {result["title"] for result in results}
+    assert all("<mark>" in result["snippet"] for result in results)
+    
+    # Stemming and prefix matching
+    response = client.get("/notes/search", params={"q": "plant* garden"}, headers=headers)
+    assert [result["title"] for result in response.json()] == ["Garden planning"]
+    
+    # Sentiment filter only keeps analyzed notes
+    response = client.get("/notes/search", params={"q": "tomatoes", "sentiment": "positive"}, headers=headers)
+    assert all(result["sentiment"] == "positive" for result in response.json())
+    
+    # FTS5 syntax in user input is treated as plain words
+    response = client.get("/notes/search", params={"q": 'tomatoes" OR (-'}, headers=headers)
+    assert response.status_code == 200
+
+def test_similar_notes_and_semantic_search():
+    """Test related notes and semantic search, including bulk-imported, unembedded and deleted notes."""
+    from sqlalchemy import delete
+    from app.database import similarity
+    from app.ml.embeddings import index_cache
+    from app.models.note_embedding import NoteEmbedding
+    app.dependency_overrides[get_current_active_user] = lambda: UserSnapshot(id=4, username="similar", email="similar@example.com", is_active=True)
+    try:
+        def create(title, content):
+            return client.post("/notes/", json={"title": title, "content": content}, headers=headers).json()["id"]
+        garden = create("Garden planning", "Plant tomatoes and basil along the sunny fence this spring.")
+        harvest = create("Tomato harvest", "The tomatoes in the garden are ripe; pick them before the rain.")
+        budget = create("Quarterly budget", "Review the spreadsheet of expenses with finance on Monday.")
+        
+        response = client.get(f"/notes/{garden}/similar", headers=headers)
+        assert response.status_code == 200
+        results = response.json()
+        assert results[0]["id"] == harvest
+        assert garden not in [result["id"] for result in results]
+        assert budget not in [result["id"] for result in results]
+        assert 0 < results[0]["score"] <= 1
+        
+        response = client.get("/notes/search/semantic", params={"q": "monday finance expenses"}, headers=headers)
+        assert [result["id"] for result in response.json()][:1] == [budget]
+        assert client.get("/notes/search/semantic", params={"q": "the and of"}, headers=headers).json() == []
+        
+        # Bulk imports are embedded when they are inserted
+        client.post("/notes/bulk", content=json.dumps({"title": "Seedlings", "content": "Basil seedlings for the garden fence."}), headers=headers)
+        titles = [result["title"] for result in client.get(f"/notes/{garden}/similar", headers=headers).json()]
+        assert "Seedlings" in titles
+        
+        # Notes without a stored vector are left out rather than embedded by a read
+        fence = create("Fence garden", "Paint the garden fence near the tomatoes and basil.")
+        db = TestingSessionLocal()
+        try:
+            db.execute(delete(NoteEmbedding).where(NoteEmbedding.note_id == fence))
+            db.commit()
+            index_cache.clear()
+            assert fence not in [result["id"] for result in client.get(f"/notes/{garden}/similar", headers=headers).json()]
+            assert db.get(NoteEmbedding, fence) is None
+            assert similarity.embed_all(db) == 1
+            index_cache.clear()
+            assert fence in [result["id"] for result in client.get(f"/notes/{garden}/similar", headers=headers).json()]
+        finally:
+            db.close()
+        
+        assert client.delete(f"/notes/{harvest}", headers=headers).status_code == 204
+        assert harvest not in [result["id"] for result in client.get(f"/notes/{garden}/similar", headers=headers).json()]
+        assert client.get("/notes/999999/similar", headers=headers).status_code == 404
+    finally:
+        app.dependency_overrides[get_current_active_user] = override_get_current_active_user
+    assert client.get(f"/notes/{garden}/similar", headers=headers).status_code == 404
+
+def test_near_duplicate_notes():
+    """Test near-duplicate flagging, rejection, the duplicates report and deleting an original."""
+    app.dependency_overrides[get_current_active_user] = lambda: UserSnapshot(id=5, username="duplicates", email="duplicates@example.com", is_active=True)
+    try:
+        content = "Remember to renew the car insurance before the end of the month and compare quotes from three providers."
+        original = client.post("/notes/", json={"title": "Insurance", "content": content}, headers=headers)
+        assert "X-Duplicate-Of" not in original.headers
+        original = original.json()["id"]
+        
+        copy = client.post("/notes/", json={"title": "Insurance again", "content": content.upper() + "  "}, headers=headers)
+        assert copy.status_code == 201
+        assert copy.headers["X-Duplicate-Of"] == str(original)
+        assert float(copy.headers["X-Duplicate-Similarity"]) == 1.0
+        edited = client.post("/notes/", json={"title": "Insurance edit", "content": content + " Ask about the discount."}, headers=headers)
+        assert edited.headers["X-Duplicate-Of"] == str(original)
+        
+        response = client.post("/notes/", params={"on_duplicate": "reject"}, json={"title": "Insurance", "content": content}, headers=headers)
+        assert response.status_code == 409
+        assert response.json()["detail"]["duplicate_of"] == original
+        unrelated = client.post("/notes/", params={"on_duplicate": "reject"}, json={"title": "Groceries", "content": "Buy oat milk, eggs and a loaf of sourdough bread."}, headers=headers)
+        assert unrelated.status_code == 201
+        assert "X-Duplicate-Of" not in unrelated.headers
+        
+        report = client.get("/notes/duplicates", headers=headers).json()
+        assert report["duplicate_notes"] == 2
+        assert len(report["groups"]) == 1
+        assert report["groups"][0]["original"]["id"] == original
+        assert [note["id"] for note in report["groups"][0]["duplicates"]] == [copy.json()["id"], edited.json()["id"]]
+        
+        # The oldest copy takes the deleted original's place
+        assert client.delete(f"/notes/{original}", headers=headers).status_code == 204
+        report = client.get("/notes/duplicates", headers=headers).json()
+        assert report["groups"][0]["original"]["id"] == copy.json()["id"]
+        assert [note["id"] for note in report["groups"][0]["duplicates"]] == [edited.json()["id"]]
+        
+        # Bulk imports are checked as they are inserted, including within one chunk
+        pasted = {"title": "Pasted", "content": "Water the tomato plants every other morning and check the leaves for aphids."}
+        body = "\n".join(json.dumps(note) for note in [pasted, {**pasted, "title": "Pasted twice"}])
+        assert client.post("/notes/bulk", content=body, headers=headers).json()["imported"] == 2
+        groups = client.get("/notes/duplicates", headers=headers).json()["groups"]
+        assert [group["original"]["title"] for group in groups] == [copy.json()["title"], "Pasted"]
+        assert groups[1]["duplicates"][0]["title"] == "Pasted twice"
+    finally:
+        app.dependency_overrides[get_current_active_user] = override_get_current_active_user
+    groups = client.get("/notes/duplicates", headers=headers).json()["groups"]
+    assert copy.json()["id"] not in [group["original"]["id"] for group in groups]
+
+def test_duplicate_candidates_read_a_bounded_number_of_rows():
+    """Test that finding duplicates does not read every copy of a much-pasted text."""
+    from sqlalchemy import insert
+    from app.database import duplicates
+    from app.ml import minhash
+    from app.models.note import Note
+    
+    sig = minhash.signature("The same meeting notes pasted over and over again by an eager user.")
+    db = TestingSessionLocal()
+    raw = db.connection().connection.driver_connection
+    steps = []
+    
+    def count_step():
+        steps[-1] += 1
+    
+    try:
+        indexed = 0
+        for copies in (200, 2000):
+            for _ in range(indexed, copies):
+                note_id = db.execute(insert(Note).values(title="Copy", content="Copy", owner_id=7)).inserted_primary_key[0]
+                duplicates.index_note(db, note_id, 7, sig)
+            db.commit()
+            indexed = copies
+            steps.append(0)
+            raw.set_progress_handler(count_step, 100)
+            assert duplicates.find_duplicate(db, 7, sig) is not None
+            raw.set_progress_handler(None, 0)
+        # Ten times the copies, about the same work
+        assert steps[1] < steps[0] * 1.5
+    finally:
+        raw.set_progress_handler(None, 0)
+        db.close()
+
+def test_note_tags():
+    """Test tag extraction on single and batch analysis, GET /tags and GET /notes?tag=."""
+    app.dependency_overrides[get_current_active_user] = lambda: UserSnapshot(id=6, username="tags", email="tags@example.com", is_active=True)
+    try:
+        def create(title, content):
+            return client.post("/notes/", json={"title": title, "content": content}, headers=headers).json()["id"]
+        garden = create("Garden", "Buy tomatoes and basil for the sunny fence this spring.")
+        harvest = create("Harvest", "The tomatoes in the garden are ripe; pick them before the rain.")
+        budget = create("Budget", "Review the quarterly budget with finance on Monday.")
+        assert client.get("/tags/", headers=headers).json() == []
+        
+        response = client.get(f"/notes/{garden}/analyze", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["tags"] == ["basil", "spring", "sunny fence", "tomato"]
+        # Re-analysis keeps the tags
+        assert client.get(f"/notes/{garden}/analyze", headers=headers).json()["tags"] == ["basil", "spring", "sunny fence", "tomato"]
+        client.post("/notes/analyze", json={"note_ids": [harvest, budget]}, headers=headers)
+        
+        counts = {tag["tag"]: tag["count"] for tag in client.get("/tags/", headers=headers).json()}
+        assert counts["tomato"] == 2
+        assert counts["quarterly budget"] == 1
+        assert client.get("/tags/", params={"limit": 1}, headers=headers).json() == [{"tag": "tomato", "count": 2}]
+        
+        listing = client.get("/notes/", params={"tag": "Tomato"}, headers=headers)
+        assert [note["id"] for note in listing.json()] == [harvest, garden]
+        assert client.get("/notes/", params={"tag": "tomato", "limit": 1, "skip": 1}, headers=headers).json()[0]["id"] == garden
+        assert client.get("/notes/", params={"tag": "unknown"}, headers=headers).json() == []
+        
+        # A note analyzed before tags existed gets them on its next analysis;
+        # its tag listings change but the note itself was not edited
+        from app.models.note_tag import NoteTag
+        db = TestingSessionLocal()
+        db.query(NoteTag).filter(NoteTag.note_id == budget).delete()
+        db.commit()
+        db.close()
+        listing = client.get("/notes/", params={"tag": "quarterly budget"}, headers=headers)
+        assert listing.json() == []
+        note_etag = client.get(f"/notes/{budget}", headers=headers).headers["ETag"]
+        assert client.get(f"/notes/{budget}/analyze", headers=headers).json()["tags"] == ["finance", "monday", "quarterly budget", "review"]
+        assert client.get(f"/notes/{budget}", headers={**headers, "If-None-Match": note_etag}).status_code == 304
+        response = client.get("/notes/", params={"tag": "quarterly budget"}, headers={**headers, "If-None-Match": listing.headers["ETag"]})
+        assert response.status_code == 200
+        assert [note["id"] for note in response.json()] == [budget]
+        
+        assert client.delete(f"/notes/{harvest}", headers=headers).status_code == 204
+        assert {tag["tag"]: tag["count"] for tag in client.get("/tags/", headers=headers).json()}["tomato"] == 1
+    finally:
+        app.dependency_overrides[get_current_active_user] = override_get_current_active_user
+    assert garden not in [note["id"] for note in client.get("/notes/", params={"tag": "tomato"}, headers=headers).json()]
+
+def test_bulk_import_and_export():
+    """Test NDJSON bulk import with per-line errors and the NDJSON export."""
+    lines = [
+        json.dumps({"title": "Bulk one", "content": "First bulk imported note."}),
+        "",
+        json.dumps({"title": "Bulk two", "content": "too short"}),
+        "{not json",
+        json.dumps({"title": "Bulk three", "content": "Third bulk imported note."}),
+    ]
+    response = client.post("/notes/bulk", content="\n".join(lines), headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 2
+    assert data["failed"] == 2
+    assert [error["line"] for error in data["errors"]] == [3, 4]
+    assert "content" in data["errors"][0]["error"]
+    
+    response = client.get("/notes/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert {"Bulk one", "Bulk three"} <= {note["title"] for note in exported}
+    assert [note["id"] for note in exported] == sorted(note["id"] for note in exported)
+
+def test_ndjson_lines_split_across_chunks_and_capped():
+    """Test that NDJSON lines are reassembled across chunks and overlong lines are dropped unbuffered."""
+    import asyncio
+    from app.api.notes import _iter_ndjson_lines
+    
+    class ChunkedRequest:
+        def __init__(self, chunks):
+            self.chunks = chunks
+        async def stream(self):
+            for chunk in self.chunks:
+                yield chunk
+    
+    async def split(chunks):
+        return [line async for line in _iter_ndjson_lines(ChunkedRequest(chunks), max_line_bytes=8)]
+    
+    chunks = [b"one\ntw", b"o\n", b"0123456", b"789abc\nthree\n\nlast-but-", b"far-too-long"]
+    assert asyncio.run(split(chunks)) == [(1, b"one"), (2, b"two"), (3, None), (4, b"three"), (5, b""), (6, None)]
+    assert asyncio.run(split([b"x" * 20 + b"\nok"])) == [(1, None), (2, b"ok")]
+
+def test_notes_are_scoped_to_owner():
+    """Test that notes, search, export and jobs only expose the caller's notes."""
+    response = client.post("/notes/", json={
+        "title": "Private plans",
+        "content": "Only the owner should see these zebra plans."
+    }, headers=headers)
+    note_id = response.json()["id"]
+    
+    other_user = UserSnapshot(id=2, username="otheruser", email="other@example.com", is_active=True)
+    app.dependency_overrides[get_current_active_user] = lambda: other_user
+    try:
+        assert client.get(f"/notes/{note_id}", headers=headers).status_code == 404
+        assert client.get(f"/notes/{note_id}/analyze", headers=headers).status_code == 404
+        assert note_id not in [note["id"] for note in client.get("/notes/", headers=headers).json()]
+        assert client.get("/notes/search", params={"q": "zebra"}, headers=headers).json() == []
+        assert "zebra" not in client.get("/notes/export", headers=headers).text
+        assert client.post("/jobs/", json={"note_id": note_id}, headers=headers).status_code == 404
+        response = client.post("/notes/analyze", json={"note_ids": [note_id]}, headers=headers)
+        assert response.json()["not_found"] == [note_id]
+    finally:
+        app.dependency_overrides[get_current_active_user] = override_get_current_active_user
+    
+    assert client.get(f"/notes/{note_id}", headers=headers).status_code == 200
+
+def test_note_changes_feed():
+    """Test incremental sync of created, updated and deleted notes."""
+    full = client.get("/notes/changes", headers=headers).json()
+    while full["has_more"]:
+        full = client.get("/notes/changes", params={"since": full["next_since"]}, headers=headers).json()
+    since = full["next_since"]
+    assert client.get("/notes/changes", params={"since": since}, headers=headers).json()["notes"] == []
+    
+    first = client.post("/notes/", json=test_note, headers=headers).json()["id"]
+    second = client.post("/notes/", json=test_note, headers=headers).json()["id"]
+    response = client.get("/notes/changes", params={"since": since, "limit": 1}, headers=headers).json()
+    assert [note["id"] for note in response["notes"]] == [first]
+    assert response["has_more"]
+    
+    client.get(f"/notes/{first}/analyze", headers=headers)
+    assert client.delete(f"/notes/{second}", headers=headers).status_code == 204
+    assert client.delete(f"/notes/{second}", headers=headers).status_code == 404
+    assert client.get(f"/notes/{second}", headers=headers).status_code == 404
+    
+    response = client.get("/notes/changes", params={"since": response["next_since"]}, headers=headers).json()
+    assert [note["id"] for note in response["notes"]] == [first]
+    assert response["notes"][0]["sentiment"] is not None
+    assert response["deleted"] == [second]
+    assert not response["has_more"]
+    
+    response = client.get("/notes/changes", params={"since": response["next_since"]}, headers=headers).json()
+    assert response["notes"] == [] and response["deleted"] == []
+    
+    # SQLite gives the next note the deleted newest note's ID; it is live, not deleted
+    since = response["next_since"]
+    third = client.post("/notes/", json=test_note, headers=headers).json()["id"]
+    assert client.delete(f"/notes/{third}", headers=headers).status_code == 204
+    reused = client.post("/notes/", json=test_note, headers=headers).json()["id"]
+    assert reused == third
+    response = client.get("/notes/changes", params={"since": since}, headers=headers).json()
+    assert [note["id"] for note in response["notes"]] == [reused]
+    assert response["deleted"] == []
+
+def test_register_and_login():
+    """Test registration and both login endpoints with off-thread hashing."""
+    user = {"username": "hasheduser", "email": "hashed@example.com", "password": "supersecret"}
+    response = client.post("/users/register", json=user)
+    assert response.status_code == 201
+    assert response.json()["username"] == user["username"]
+    
+    # Duplicates are rejected before hashing
+    response = client.post("/users/register", json=user)
+    assert response.status_code == 400
+    
+    response = client.post("/users/login", json={"username": user["username"], "password": user["password"]})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+    
+    response = client.post("/users/token", data={"username": user["username"], "password": user["password"]})
+    assert response.status_code == 200
+    
+    response = client.post("/users/login", json={"username": user["username"], "password": "wrongpassword"})
+    assert response.status_code == 401
+
+def test_login_rehashes_outdated_cost():
+    """Test that logging in upgrades a hash made with a different bcrypt cost."""
+    from passlib.hash import bcrypt
+    from app.api.hashing import BCRYPT_ROUNDS
+    from app.models.user import User
+    
+    db = TestingSessionLocal()
+    try:
+        db.add(User(username="legacyuser", email="legacy@example.com",
+                    hashed_password=bcrypt.using(rounds=4).hash("legacypassword")))
+        db.commit()
+    finally:
+        db.close()
+    
+    response = client.post("/users/login", json={"username": "legacyuser", "password": "legacypassword"})
+    assert response.status_code == 200
+    
+    db = TestingSessionLocal()
+    try:
+        stored = db.query(User).filter(User.username == "legacyuser").first().hashed_password
+        assert stored.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+    finally:
+        db.close()
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database.database import Base
+from app.database import async_crud, crud
+from app.models.schemas import NoteCreate
+
+def run_with_session(coro_factory):
+    """Run a coroutine against a fresh in-memory aiosqlite database."""
+    async def runner():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with session_factory() as db:
+                return await coro_factory(db)
+        finally:
+            await engine.dispose()
+    return asyncio.run(runner())
+
+def test_async_create_and_page_notes():
+    """Test creating notes and walking pages through the async crud layer."""
+    async def scenario(db):
+        for i in range(3):
+            await async_crud.create_note(db, NoteCreate(title=f"Async {i}", content="Async note content here."), owner_id=1)
+        first, cursor = await async_crud.get_note_dicts_page(db, 1, ("title",), limit=2)
+        second, last_cursor = await async_crud.get_note_dicts_page(db, 1, ("title",), limit=2, cursor=cursor)
+        skipped = await async_crud.get_notes(db, 1, skip=1, limit=1)
+        return first, second, last_cursor, skipped
+    
+    first, second, last_cursor, skipped = run_with_session(scenario)
+    assert first == [{"title": "Async 2"}, {"title": "Async 1"}]
+    assert second == [{"title": "Async 0"}]
+    assert last_cursor is None
+    assert [note.title for note in skipped] == ["Async 1"]
+
+def test_async_analyze_note_sentiment():
+    """Test sentiment analysis and tagging through the async crud layer."""
+    async def scenario(db):
+        note = await async_crud.create_note(db, NoteCreate(title="Async", content="I love this product, it's amazing!"), owner_id=1)
+        analyzed = await async_crud.analyze_note_sentiment(db, note.id, 1)
+        tagged, _ = await async_crud.get_note_dicts_page(db, 1, ("id",), tag="product")
+        return analyzed.sentiment, analyzed.tags, tagged, await async_crud.get_note(db, 999999, 1)
+    
+    sentiment, tags, tagged, missing = run_with_session(scenario)
+    assert sentiment == "positive"
+    assert tags == ["love", "product"]
+    assert tagged == [{"id": 1}]
+    assert missing is None
+
+def test_async_create_note_prepares_off_the_event_loop(monkeypatch):
+    """Test that the embedding and signature of a new note are computed in the threadpool."""
+    threads = []
+    prepare_note = crud.prepare_note
+    def recording_prepare_note(*args):
+        threads.append(threading.current_thread())
+        return prepare_note(*args)
+    monkeypatch.setattr(crud, "prepare_note", recording_prepare_note)
+    
+    async def scenario(db):
+        note = await async_crud.create_note(db, NoteCreate(title="Threaded", content="Computed in a worker thread."), owner_id=1)
+        return note.id, threading.current_thread()
+    
+    note_id, loop_thread = run_with_session(scenario)
+    assert note_id == 1
+    assert threads and threads[0] is not loop_thread
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.database import Base
+from app.database import crud
+from app.api import auth
+from app.models.user import User
+
+# Separate in-memory database for exercising the real authentication path
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+def make_user(db, username):
+    user = User(username=username, email=f"{username}@example.com", hashed_password="not-a-real-hash")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def authenticate(token, db):
+    response = Response()
+    user = asyncio.run(auth.get_current_user(response=response, token=token, db=db))
+    return user, response.headers["Server-Timing"]
+
+def test_token_verification_is_cached():
+    """Test that a verified token is served from the cache."""
+    auth.auth_cache.clear()
+    db = TestingSessionLocal()
+    try:
+        user = make_user(db, "cacheduser")
+        token = auth.create_access_token(auth.user_token_claims(user))
+        
+        first, timing = authenticate(token, db)
+        # The lookup does not keep a connection checked out for the request
+        assert not db.in_transaction()
+        assert first.id == user.id
+        assert 'desc="db"' in timing
+        
+        second, timing = authenticate(token, db)
+        assert second == first
+        assert 'desc="cache"' in timing
+    finally:
+        db.close()
+
+def test_deactivation_invalidates_cached_user():
+    """Test that changing a user drops its cached tokens."""
+    auth.auth_cache.clear()
+    db = TestingSessionLocal()
+    try:
+        user = make_user(db, "deactivated")
+        token = auth.create_access_token(auth.user_token_claims(user))
+        assert authenticate(token, db)[0].is_active
+        
+        crud.set_user_active(db, user.id, False)
+        snapshot, timing = authenticate(token, db)
+        assert 'desc="db"' in timing
+        assert not snapshot.is_active
+        with pytest.raises(HTTPException):
+            asyncio.run(auth.get_current_active_user(snapshot))
+    finally:
+        db.close()
+
+def test_invalidation_during_lookup_is_not_cached(monkeypatch):
+    """Test that a user changed between the lookup and the cache write is looked up again."""
+    auth.auth_cache.clear()
+    db = TestingSessionLocal()
+    try:
+        user = make_user(db, "racing")
+        token = auth.create_access_token(auth.user_token_claims(user))
+        get_user = crud.get_user
+        def get_user_then_deactivate(db, user_id):
+            # The snapshot is loaded, then another request deactivates the user
+            db_user = get_user(db, user_id)
+            auth.auth_cache.invalidate_user(user_id)
+            return db_user
+        monkeypatch.setattr(crud, "get_user", get_user_then_deactivate)
+        assert 'desc="db"' in authenticate(token, db)[1]
+        monkeypatch.undo()
+        
+        assert 'desc="db"' in authenticate(token, db)[1]
+        assert 'desc="cache"' in authenticate(token, db)[1]
+    finally:
+        db.close()
+
+def test_user_change_invalidates_again_at_commit():
+    """Test that a snapshot read between a user's flush and commit cannot be cached."""
+    auth.auth_cache.clear()
+    db = TestingSessionLocal()
+    try:
+        user = make_user(db, "flushing")
+        user.is_active = False
+        db.flush()
+        flushed = auth.auth_cache.generation(user.id)
+        db.commit()
+        assert auth.auth_cache.generation(user.id) > flushed
+    finally:
+        db.close()
+
+def test_invalid_token_is_rejected():
+    """Test that a tampered token is rejected before any lookup."""
+    db = TestingSessionLocal()
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            authenticate("not-a-token", db)
+        assert exc_info.value.status_code == 401
+    finally:
+        db.close()
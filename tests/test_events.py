@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.events import EventBroker, RESYNC_MESSAGE
+
+class FakeRequest:
+    async def is_disconnected(self):
+        return False
+
+def test_events_reach_only_the_owner():
+    """Test that events published from another thread reach the owner's stream."""
+    async def scenario():
+        broker = EventBroker(max_subscribers=10, queue_size=10, heartbeat_seconds=5)
+        mine, theirs = broker.subscribe(1), broker.subscribe(2)
+        stream = broker.stream(mine, FakeRequest())
+        assert await stream.__anext__() == b"retry: 5000\n\n"
+
+        publisher = threading.Thread(target=broker.publish, args=(1, "note.created", {"id": 7, "title": "Hello"}))
+        publisher.start()
+        publisher.join()
+        message = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        assert theirs.queue.empty()
+
+        await stream.aclose()
+        return message, broker.stats()
+
+    message, stats = asyncio.run(scenario())
+    assert message == b'id: 1\nevent: note.created\ndata: {"id":7,"title":"Hello"}\n\n'
+    # Closing the stream unsubscribed it
+    assert stats["subscribers"] == 1
+
+def test_slow_consumer_gets_resync_instead_of_backlog():
+    """Test that a full queue is replaced by one resync event."""
+    async def scenario():
+        broker = EventBroker(max_subscribers=10, queue_size=3)
+        subscription = broker.subscribe(1)
+        for i in range(10):
+            broker.publish(1, "note.deleted", {"id": i})
+        await asyncio.sleep(0)
+        messages = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+        return messages, subscription.dropped
+
+    messages, dropped = asyncio.run(scenario())
+    assert len(messages) <= 3
+    assert RESYNC_MESSAGE in messages
+    assert dropped > 0
+
+def test_subscriber_limit():
+    """Test that connections beyond the limit are refused with 503."""
+    async def scenario():
+        broker = EventBroker(max_subscribers=1)
+        broker.subscribe(1)
+        with pytest.raises(HTTPException) as exc_info:
+            broker.subscribe(1)
+        return exc_info.value.status_code
+
+    assert asyncio.run(scenario()) == 503
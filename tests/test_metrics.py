@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.api.metrics import MetricsMiddleware, instrument_engine, observe_sentiment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_multiprocess_metrics_are_added_up(tmp_path):
+    """Test that with PROMETHEUS_MULTIPROC_DIR every process's requests are reported."""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    record = "from app.api.metrics import HTTP_REQUESTS; HTTP_REQUESTS.labels('GET', '/', '200').inc()"
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", record], env=env, cwd=ROOT, check=True)
+    render = "from app.api.metrics import render_metrics; print(render_metrics().decode())"
+    output = subprocess.run([sys.executable, "-c", render], env=env, cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    assert 'http_requests_total{method="GET",route="/",status="200"} 2.0' in output
+
+def test_requests_are_recorded_by_route_template():
+    """Test status codes, per-request database and sentiment time, and route labels."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    instrument_engine(engine)
+    instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        observe_sentiment("textblob", "whole", 0.002)
+        return {"id": item_id}
+
+    selects = sample("db_query_duration_seconds_count", operation="SELECT")
+    client = TestClient(app)
+    assert client.get("/metrics-test/1").status_code == 200
+    assert client.get("/metrics-test/2").status_code == 200
+    assert client.get("/metrics-test/abc").status_code == 422
+    assert client.get("/no-such-route").status_code == 404
+
+    route = "/metrics-test/{item_id}"
+    assert sample("http_requests_total", method="GET", route=route, status="200") == 2
+    assert sample("http_requests_total", method="GET", route=route, status="422") == 1
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    assert sample("http_requests_in_flight") == 0
+    # Listeners were installed once, so each query is counted once
+    assert sample("db_query_duration_seconds_count", operation="SELECT") == selects + 2
+    assert sample("http_request_db_duration_seconds_count", method="GET", route=route) == 3
+    assert sample("http_request_sentiment_duration_seconds_sum", method="GET", route=route) == 0.004
+
+def test_metrics_endpoint():
+    """Test that the app serves its metrics in the Prometheus text format."""
+    from app.main import app
+
+    client = TestClient(app)
+    client.get("/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in response.text
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
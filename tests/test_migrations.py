@@ -0,0 +1,91 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from app.database.database import Base
+from app.database import analytics, migrations
+from app.models import note, user  # noqa: F401
+
+def test_upgrade_adds_note_owner():
+    """Test that upgrading an old database adds owner_id, versions and change sequences."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE notes (
+                id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, content TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME, sentiment VARCHAR
+            )
+        """))
+        conn.execute(text("INSERT INTO notes (title, content) VALUES ('Old', 'Written before owners existed.')"))
+    Base.metadata.create_all(bind=engine)
+    
+    migrations.upgrade(engine)
+    migrations.upgrade(engine)
+    
+    inspector = inspect(engine)
+    assert {"owner_id", "version", "polarity", "subjectivity"} <= {column["name"] for column in inspector.get_columns("notes")}
+    assert {"ix_notes_owner_created_at_id", "ix_notes_owner_polarity"} <= {index["name"] for index in inspector.get_indexes("notes")}
+    
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, email, hashed_password) VALUES ('owner', 'owner@example.com', 'x')"))
+    assert migrations.assign_unowned_notes(engine, "owner") == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT owner_id, version, change_seq FROM notes")).one() == (1, 2, 1)
+        assert conn.execute(text("SELECT version FROM note_owner_versions WHERE owner_id = 1")).scalar_one() == 1
+    
+    # Notes that already had an owner are backfilled with their ID as change_seq
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE notes SET id = 7"))
+        conn.execute(text("UPDATE notes SET change_seq = NULL"))
+    migrations.upgrade(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT change_seq FROM notes")).scalar_one() == 7
+        assert conn.execute(text("SELECT version FROM note_owner_versions WHERE owner_id = 1")).scalar_one() == 7
+
+def test_upgrade_drops_tombstones_of_live_notes():
+    """Test that upgrading removes tombstones left for note IDs that were reused by the same owner."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO notes (id, title, content, owner_id) VALUES (1, 'a', 'Back under a reused ID.', 1)"))
+        conn.execute(text("""
+            INSERT INTO note_tombstones (owner_id, note_id, change_seq) VALUES (1, 1, 1), (1, 2, 2), (2, 1, 3)
+        """))
+    
+    migrations.upgrade(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT owner_id, note_id FROM note_tombstones ORDER BY owner_id, note_id")).all() == [
+            (1, 2), (2, 1)
+        ]
+
+def test_relabel_sentiments():
+    """Test that stored labels are reclassified from stored scores, touching only changed notes."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO notes (title, content, owner_id, sentiment, polarity) VALUES
+            ('a', 'Scored above the new threshold.', 1, 'positive', 0.5),
+            ('b', 'Scored below the new threshold.', 1, 'positive', 0.2),
+            ('c', 'Labelled before scores were kept.', 1, 'positive', NULL)
+        """))
+    
+    assert analytics.relabel_sentiments(engine, positive_threshold=0.3, negative_threshold=-0.3) == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT sentiment, version FROM notes ORDER BY id")).all() == [
+            ("positive", 1), ("neutral", 2), ("positive", 1)
+        ]
+
+def test_prepare_database_runs_once_per_process(tmp_path, monkeypatch):
+    """Test that preparing a file database creates it under a lock next to it, once."""
+    url = f"sqlite:///{tmp_path / 'db' / 'notes.db'}"
+    engine = create_engine(url)
+    calls = []
+    monkeypatch.setattr(migrations, "upgrade", lambda engine: calls.append(engine))
+
+    migrations.prepare_database(engine)
+    migrations.prepare_database(engine)
+
+    assert len(calls) == 1
+    assert "notes" in inspect(engine).get_table_names()
+    assert migrations.migration_lock_path(url) == str(tmp_path / "db" / "notes.db.migrate.lock")
+    assert (tmp_path / "db" / "notes.db.migrate.lock").exists()
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from app.ml.cache import SentimentCache, content_hash
+from app.ml.chunking import analyze_chunks, iter_chunks
+from app.ml.embeddings import SimilarityIndex, embed_note, embed_text, from_blobs, to_blob
+from app.ml.engines import engine_status, get_engine, warm_up
+from app.ml.keywords import extract_tags
+from app.ml.sentiment import analyze_sentiment, analyze_sentiment_batch, analyze_texts_batch
+
+
+def test_content_hash_normalizes_whitespace():
+    """Test that equivalent contents share a cache key."""
+    assert content_hash("I love  this\nproduct ") == content_hash("I love this product")
+    assert content_hash("I love this product") != content_hash("I hate this product")
+
+def test_sentiment_cache_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = SentimentCache(max_size=2)
+    cache.put("a", "positive")
+    cache.put("b", "negative")
+    assert cache.get("a") == "positive"
+    cache.put("c", "neutral")
+    
+    assert cache.get("b") is None
+    assert cache.get("c") == "neutral"
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+def test_batch_matches_single_analysis():
+    """Test that batch scoring agrees with single-text analysis."""
+    texts = [
+        "I love this product, it's amazing!",
+        "This is terrible, I hate it.",
+        "The product arrived today.",
+        "",
+        "I love this product, it's amazing!",
+    ]
+    assert analyze_sentiment_batch(texts) == [analyze_sentiment(text) for text in texts]
+
+def test_lexicon_engine_matches_textblob():
+    """Test that the compiled lexicon engine scores like TextBlob."""
+    texts = [
+        "I love this product, it's amazing!",
+        "I don't like it, it's not very good!!",
+        "Not bad at all :)",
+        "What a terrible, horrible day :(",
+        "The meeting is at 3pm.",
+    ]
+    textblob, lexicon = get_engine("textblob"), get_engine("lexicon")
+    for text in texts:
+        assert lexicon.score(text) == pytest.approx(textblob.score(text))
+
+def test_analyze_returns_score_and_tokens():
+    """Test that analyze() scores like score() and returns the tokens for tagging."""
+    text = "I don't love the new project manager's budget review :("
+    for name in ("textblob", "lexicon"):
+        engine = get_engine(name)
+        score, tokens = engine.analyze(text)
+        assert score == engine.score(text)
+        assert tokens == engine.tokenize(text)
+
+def test_extract_tags_from_noun_phrases():
+    """Test tag extraction from the noun phrases of an engine's tokens."""
+    text = ("The budget review is due on Friday. The new project manager presented "
+            "the budget review, and tomatoes and basil grow along the fence.")
+    for name in ("textblob", "lexicon"):
+        tags = extract_tags(get_engine(name).tokenize(text))
+        assert tags[0] == "budget review"
+        assert {"new project manager", "tomato", "basil", "fence"} <= set(tags)
+        assert "the" not in " ".join(tags).split()
+    assert extract_tags(get_engine("textblob").tokenize(text), limit=2) == tags[:2]
+    assert extract_tags([]) == []
+    analysis = analyze_texts_batch(["Lovely garden tomatoes!", ""])
+    assert analysis[0].tags == ["lovely garden tomato"] and analysis[1].tags == []
+
+def test_engines_have_separate_cache_keys():
+    """Test that engine selection is part of the cache key."""
+    assert content_hash("Great day", "lexicon") != content_hash("Great day", "textblob")
+    assert analyze_sentiment("Great day", engine="lexicon") == "positive"
+    with pytest.raises(ValueError):
+        get_engine("missing")
+
+def test_warm_up_loads_engines():
+    """Test that warming up loads an engine's models."""
+    timings = warm_up(["lexicon", "missing"])
+    assert list(timings) == ["lexicon"]
+    assert engine_status()["lexicon"] is True
+
+def test_iter_chunks_splits_at_boundaries():
+    """Test that windows cover the text and end at sentence or paragraph breaks."""
+    text = "\n\n".join("I love this. The day was long and boring. " * 20 for _ in range(10))
+    spans = list(iter_chunks(text, size=500))
+    assert all(end - start <= 500 for start, end in spans)
+    assert "".join(text[start:end] for start, end in spans) == text
+    assert all(text[end - 2:end] in ("\n\n", ". ") for _, end in spans[:-1])
+
+def test_analyze_chunks_budget_returns_partial_result():
+    """Test that chunked analysis stops early when out of budget."""
+    text = "What a wonderful day. " * 5000
+    complete = analyze_chunks(text, "lexicon", size=1000)
+    assert not complete.partial
+    assert complete.score.polarity == pytest.approx(get_engine("lexicon").score("What a wonderful day.").polarity)
+    
+    partial = analyze_chunks(text, "lexicon", size=1000, budget=0)
+    assert partial.partial
+    assert len(partial.chunks) < len(complete.chunks)
+
+def test_similarity_index_add_remove_query():
+    """Test top-k queries as notes are added, replaced and removed."""
+    notes = {
+        1: ("Garden", "Plant tomatoes and basil in the garden."),
+        2: ("Tomatoes", "Ripe tomatoes from the garden."),
+        3: ("Budget", "Quarterly budget spreadsheet for finance."),
+        4: ("Finance", "Finance review of the budget."),
+    }
+    vectors = np.array([embed_note(*notes[note_id]) for note_id in notes])
+    assert np.allclose(from_blobs([to_blob(vector) for vector in vectors]), vectors)
+    
+    index = SimilarityIndex(dimensions=vectors.shape[1])
+    index.add(list(notes), vectors)
+    assert [note_id for note_id, _ in index.query(embed_text("budget finance"), k=2)] in ([3, 4], [4, 3])
+    assert index.query(vectors[0], k=1, exclude=[1])[0][0] == 2
+    
+    # Removing moves the last row into the freed slot
+    index.remove([1, 99])
+    assert len(index) == 3 and 1 not in index
+    assert index.query(vectors[1], k=3)[0] == (2, pytest.approx(1.0))
+    assert np.allclose(index.vector(4), vectors[3])
+    
+    index.add([4], vectors[:1])
+    assert len(index) == 3
+    assert np.allclose(index.vector(4), vectors[0])
+    assert index.query(embed_text("no such words here"), k=3) == []